@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Cold-start benchmark based on `python -X importtime`.
+
+Imports each module in a fresh interpreter, reports its cumulative import
+time and the heaviest dependencies, and checks that the core modules
+(scanner, aggregates, layout, export) never load a plotting library.
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+from typing import Dict, Any, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CORE_MODULES = [
+    'disk_analyzer',
+    'scan_stats',
+    'scan_order',
+    'directory_tree',
+    'color_palette',
+    'visualization_config',
+    'treemap_layout',
+    'raster_renderer',
+    'spatial_index',
+    'snapshot',
+    'query_engine',
+    'snapshot_diff',
+    'duplicate_finder',
+    'instrumentation',
+    'multi_root',
+    'scan_checkpoint',
+    'segment_store',
+    'name_index',
+    'index_daemon',
+    'exporter',
+    'main',
+]
+GUI_MODULES = ['disk_visualizer']
+PLOTTING_PACKAGES = ('matplotlib', 'tkinter', '_tkinter', 'PIL')
+
+
+def measure_import(module: str, repeats: int = 3) -> Dict[str, Any]:
+    """Best-of-N cumulative import time of module in a fresh interpreter"""
+    best = None
+    for _ in range(repeats):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=REPO_ROOT, capture_output=True, text=True,
+            env=dict(os.environ, MPLBACKEND='Agg')
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+        entries = _parse_importtime(proc.stderr)
+        total = sum(e['self_us'] for e in entries)
+        if best is None or total < best['total_us']:
+            best = {'entries': entries, 'total_us': total}
+
+    entries = best['entries']
+    module_entry = next((e for e in entries if e['name'] == module), None)
+    loaded = {e['name'].split('.')[0] for e in entries}
+    # Direct dependencies of the measured module are listed one level below it
+    heaviest = sorted((e for e in entries if e['depth'] == 1), key=lambda e: e['cumulative_us'], reverse=True)[:5]
+    return {
+        'module': module,
+        'cumulative_ms': (module_entry['cumulative_us'] if module_entry else best['total_us']) / 1000,
+        'modules_loaded': len(entries),
+        'plotting_loaded': sorted(p for p in PLOTTING_PACKAGES if p in loaded),
+        'heaviest': [{'name': e['name'], 'cumulative_ms': e['cumulative_us'] / 1000} for e in heaviest],
+    }
+
+
+def _parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        # Nesting is shown as two spaces per level in front of the name
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        entries.append({
+            'name': name.strip(),
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            'depth': depth,
+        })
+    return entries
+
+
+def run(modules: List[str], repeats: int) -> Dict[str, Any]:
+    return {
+        'python': sys.version.split()[0],
+        'results': [measure_import(m, repeats) for m in modules],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--json', help='Write results to this file')
+    parser.add_argument('--include-gui', action='store_true', help='Also measure the GUI modules')
+    args = parser.parse_args()
+
+    modules = CORE_MODULES + (GUI_MODULES if args.include_gui else [])
+    report = run(modules, args.repeats)
+
+    failed = False
+    for result in report['results']:
+        heaviest = ', '.join(f"{h['name']} {h['cumulative_ms']:.1f}" for h in result['heaviest'][:3])
+        print(f"{result['module']:<22} {result['cumulative_ms']:8.1f} ms  "
+              f"{result['modules_loaded']:4d} modules  [{heaviest}]")
+        if result['module'] in CORE_MODULES and result['plotting_loaded']:
+            print(f"  ERROR: core module loads {', '.join(result['plotting_loaded'])}", file=sys.stderr)
+            failed = True
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
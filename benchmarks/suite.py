@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""Throughput benchmarks for the scan -> aggregate -> layout -> draw pipeline.
+
+Each scenario is timed best-of-N after a warm-up run and reported with its
+item count and rate. Results are written as JSON; pass a previous result
+with --baseline to fail the run when a scenario got slower than its
+regression threshold allows.
+
+    python3 benchmarks/suite.py --json before.json
+    python3 benchmarks/suite.py --baseline before.json --json after.json
+
+--memory adds a per-phase allocation report (tracemalloc) and the peak RSS
+to the results. It is measured in a separate pass after the timings,
+because tracing would distort them.
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import shutil
+import logging
+import platform
+import argparse
+import statistics
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synthetic_tree import SHAPES, EXTENSIONS, create_tree, synthetic_entries  # noqa: E402
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import numpy as np  # noqa: E402
+
+from disk_analyzer import DiskAnalyzer  # noqa: E402
+from directory_tree import DirectoryTree  # noqa: E402
+from treemap_layout import TreemapLayout  # noqa: E402
+from color_palette import rects_rgba, colors_rgba, ExtensionTable  # noqa: E402
+from spatial_index import GridIndex  # noqa: E402
+from raster_renderer import RasterRenderer, rect_geometry  # noqa: E402
+from main import normalize_fileinfo_list, measure_pipeline  # noqa: E402
+from instrumentation import PhaseRecorder  # noqa: E402
+
+RESULT_FORMAT = 'visualdisk-benchmark'
+DEFAULT_THRESHOLD = 1.25
+# Scenarios dominated by the file system or by matplotlib vary more between runs
+THRESHOLDS = {
+    'scan': 1.5,
+    'render': 1.5,
+}
+LAYOUT_SIZES = (1000, 100000, 1000000)
+CANVAS = (1600, 1000)
+
+
+class Scenario:
+    def __init__(self, name: str, items: int, setup: Callable[[], Any], run: Callable[[Any], Any],
+                 unit: str = 'items'):
+        self.name = name
+        self.items = items
+        self.setup = setup
+        self.run = run
+        self.unit = unit
+
+
+def time_scenario(scenario: Scenario, repeats: int) -> Dict[str, Any]:
+    state = scenario.setup()
+    scenario.run(state)  # Warm-up: caches, lazy imports, allocator
+    runs = []
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        scenario.run(state)
+        runs.append(time.perf_counter() - start)
+    best = min(runs)
+    return {
+        'items': scenario.items,
+        'unit': scenario.unit,
+        'best_s': best,
+        'median_s': statistics.median(runs),
+        'runs_s': runs,
+        'items_per_s': scenario.items / best if best > 0 else None,
+    }
+
+
+def scan_scenarios(workdir: str, scale: float) -> List[Scenario]:
+    scenarios = []
+    for shape in SHAPES:
+        root = os.path.join(workdir, shape)
+        info = create_tree(root, shape, scale)
+        count = info['files'] + info['directories']
+
+        def run(root, count=count, expected=info['files']):
+            analyzer = DiskAnalyzer(max_depth=1000, max_files=count * 2, timeout_seconds=3600)
+            files = analyzer.scan_directory(root)
+            assert len(files) >= expected, f"scan found {len(files)} of {expected} files"
+            return files
+
+        scenarios.append(Scenario(f"scan_{shape}", count, lambda root=root: root, run, 'entries'))
+    return scenarios
+
+
+def pipeline_scenarios(sizes: Tuple[int, ...], workdir: str) -> List[Scenario]:
+    scenarios = []
+    width, height = CANVAS
+    mid = sizes[min(1, len(sizes) - 1)]
+
+    entries = synthetic_entries(mid)
+    scenarios.append(Scenario(f"normalize_{mid}", mid, lambda: entries, normalize_fileinfo_list))
+
+    normalized = normalize_fileinfo_list(entries)
+
+    def aggregate(data):
+        tree = DirectoryTree('/synthetic')
+        tree.add_files(data)
+        return tree
+    scenarios.append(Scenario(f"aggregate_{mid}", mid, lambda: normalized, aggregate))
+
+    for n in sizes:
+        def setup(n=n):
+            tree = aggregate(normalize_fileinfo_list(synthetic_entries(n, seed=n)))
+            tree.root.sorted_entries()
+            return tree
+
+        def layout(tree):
+            # The tree is built in setup (aggregate_* times that), so this is the layout pass alone
+            return TreemapLayout(width, height, 0, 2).layout_tree(tree.root)
+        scenarios.append(Scenario(f"layout_{n}", n, setup, layout))
+
+    def rects_setup():
+        tree = aggregate(normalized)
+        return TreemapLayout(width, height, 0, 2).layout_tree(tree.root)
+
+    rects = rects_setup()
+    scenarios.append(Scenario('colors_rects', len(rects), lambda: rects, rects_rgba, 'rects'))
+
+    big = max(sizes)
+
+    def colors_setup():
+        table = ExtensionTable()
+        ids = np.array([table.ext_id(ext) for ext in EXTENSIONS])
+        rng = np.random.default_rng(0)
+        return table, ids[rng.integers(0, len(ids), big)], rng.pareto(1.1, big) * 1000
+    scenarios.append(Scenario(f"colors_{big}", big, colors_setup,
+                              lambda s: colors_rgba(s[1], s[2], s[0])))
+
+    queries = 100000
+
+    def hit_setup():
+        rng = np.random.default_rng(1)
+        return GridIndex(rects, width, height), rng.random((queries, 2)) * (width, height)
+
+    def hit_test(state):
+        index, points = state
+        for x, y in points:
+            index.query_index(x, y)
+    scenarios.append(Scenario('hit_test', queries, hit_setup, hit_test, 'queries'))
+    scenarios.append(Scenario('index_build', len(rects), lambda: rects,
+                              lambda r: GridIndex(r, width, height), 'rects'))
+
+    def raster(state):
+        renderer, geometry, colors = state
+        renderer.render(geometry, colors)
+    scenarios.append(Scenario('render_raster', len(rects),
+                              lambda: (RasterRenderer(width, height), rect_geometry(rects), rects_rgba(rects)),
+                              raster, 'rects'))
+
+    try:
+        import matplotlib  # noqa: F401
+    except ImportError:
+        logging.warning("matplotlib not installed; skipping render_export")
+        return scenarios
+
+    from exporter import export_treemap
+
+    def export(path):
+        export_treemap(normalized, '/synthetic', path, width=width, height=height)
+    export_path = os.path.join(workdir, 'map.png')
+    scenarios.append(Scenario('render_export', mid, lambda: export_path, export))
+    return scenarios
+
+
+def memory_report(workdir: str, scale: float, items: int, skip_scan: bool) -> Dict[str, Any]:
+    """Per-phase traced allocations for a scan of the wide tree and the pipeline over items entries"""
+    recorder = PhaseRecorder()
+    recorder.start()
+    try:
+        if not skip_scan:
+            root = os.path.join(workdir, 'memory-wide')
+            info = create_tree(root, 'wide', scale)
+            analyzer = DiskAnalyzer(max_depth=1000, max_files=info['files'] * 2, timeout_seconds=3600)
+            with recorder.phase('scan') as phase:
+                phase.entries = len(analyzer.scan_directory(root))
+            del analyzer
+        measure_pipeline(recorder, synthetic_entries(items), '/synthetic', *CANVAS)
+        for line in recorder.report_lines():
+            print(line)
+        return recorder.to_dict()
+    finally:
+        recorder.stop()
+
+
+def run(args) -> Dict[str, Any]:
+    logging.basicConfig(level=logging.WARNING)
+    # The scanner logs every entry at INFO; that would dominate what is measured
+    logging.getLogger().setLevel(logging.WARNING)
+
+    sizes = tuple(s for s in LAYOUT_SIZES if s <= args.max_items)
+    results = {}
+    workdir = tempfile.mkdtemp(prefix='vd-bench-')
+    try:
+        scenarios = [] if args.skip_scan else scan_scenarios(workdir, args.scale)
+        scenarios += pipeline_scenarios(sizes, workdir)
+        for scenario in scenarios:
+            if args.only and not any(scenario.name.startswith(p) for p in args.only):
+                continue
+            result = time_scenario(scenario, args.repeats)
+            results[scenario.name] = result
+            rate = f"{result['items_per_s']:>14,.0f} {scenario.unit}/s" if result['items_per_s'] else ''
+            print(f"{scenario.name:<18} {result['items']:>9,} {scenario.unit:<8} "
+                  f"{result['best_s'] * 1000:10.2f} ms  {rate}")
+        memory = None
+        if args.memory:
+            print()
+            memory = memory_report(workdir, args.scale, sizes[min(1, len(sizes) - 1)], args.skip_scan)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'format': RESULT_FORMAT,
+        'created': time.time(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'repeats': args.repeats,
+        'scale': args.scale,
+        'scenarios': results,
+        'memory': memory,
+    }
+
+
+def threshold_for(name: str, default: float) -> float:
+    for prefix, threshold in THRESHOLDS.items():
+        if name.startswith(prefix):
+            return max(threshold, default)
+    return default
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], default: float) -> List[str]:
+    """Names of scenarios slower than their threshold relative to the baseline"""
+    regressions = []
+    print(f"\n{'scenario':<18} {'baseline':>11} {'now':>11} {'ratio':>7}")
+    for name, result in report['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if base is None:
+            continue
+        ratio = result['best_s'] / base['best_s'] if base['best_s'] > 0 else 1.0
+        limit = threshold_for(name, default)
+        flag = '  REGRESSION' if ratio > limit else ''
+        print(f"{name:<18} {base['best_s'] * 1000:9.2f}ms {result['best_s'] * 1000:9.2f}ms {ratio:6.2f}x{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the VisualDisk benchmark suite")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--scale', type=float, default=1.0, help='Size multiplier for the on-disk trees')
+    parser.add_argument('--max-items', type=int, default=max(LAYOUT_SIZES),
+                        help='Largest layout size to run (e.g. 100000 for a quick run)')
+    parser.add_argument('--skip-scan', action='store_true', help='Skip the on-disk scan scenarios')
+    parser.add_argument('--only', action='append', metavar='PREFIX', help='Run only scenarios with this prefix')
+    parser.add_argument('--memory', action='store_true', help='Add per-phase memory accounting and peak RSS')
+    parser.add_argument('--json', help='Write results to this file')
+    parser.add_argument('--baseline', help='Compare with an earlier --json result')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Allowed slowdown ratio before failing (default: {DEFAULT_THRESHOLD})')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('format') != RESULT_FORMAT:
+            sys.exit(f"Not a benchmark result: {args.baseline}")
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Deterministic synthetic directory trees for benchmarks.
+
+Four shapes stress different parts of the pipeline:
+
+- wide:  a few levels, many entries per directory (listing and sorting cost)
+- deep:  a long chain of nested directories (recursion depth, path length)
+- tiny:  very many small files (per-entry overhead)
+- huge:  a few very large files (size arithmetic, culling of everything else)
+
+`create_tree` writes a shape to disk; files larger than a few KB are made
+sparse with truncate, so a "huge" tree takes almost no disk space. The
+scanner only reads metadata, so sparse files behave like real ones.
+`synthetic_entries` produces the equivalent FileInfo list in memory for
+scenarios that need far more entries than is practical to create on disk.
+"""
+
+import os
+import sys
+import random
+from typing import Dict, Iterator, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from disk_analyzer import FileInfo  # noqa: E402
+
+SHAPES = ('wide', 'deep', 'tiny', 'huge')
+EXTENSIONS = ('.py', '.txt', '.jpg', '.png', '.log', '.gz', '.json', '.mp4', '.so', '')
+WRITE_LIMIT = 4096  # Larger files are created sparse
+
+
+def _layout(shape: str, scale: float, rng: random.Random) -> Iterator[Tuple[str, int]]:
+    """Yield (relative path, size) for every file of a shape"""
+    def n(count):
+        return max(1, int(count * scale))
+
+    def name(i):
+        return f"f{i:06d}{EXTENSIONS[rng.randrange(len(EXTENSIONS))]}"
+
+    if shape == 'wide':
+        for d in range(n(40)):
+            for i in range(n(250)):
+                yield f"w{d:03d}/{name(i)}", int(rng.paretovariate(1.2) * 2048)
+    elif shape == 'deep':
+        path = ''
+        for level in range(60):
+            path = f"{path}level{level:02d}/"
+            for i in range(n(40)):
+                yield f"{path}{name(i)}", int(rng.paretovariate(1.2) * 4096)
+    elif shape == 'tiny':
+        for d in range(n(100)):
+            for i in range(n(200)):
+                yield f"t{d // 10:02d}/t{d:03d}/{name(i)}", rng.randint(1, 512)
+    elif shape == 'huge':
+        for i in range(max(4, n(12))):
+            yield f"h{i % 3}/{name(i)}", rng.randint(1, 64) * 1024 ** 3
+    else:
+        raise ValueError(f"Unknown shape: {shape}")
+
+
+def create_tree(root: str, shape: str, scale: float = 1.0, seed: int = 0) -> Dict[str, int]:
+    """Create a shape under root; returns file and byte counts"""
+    rng = random.Random(f"{shape}:{seed}")
+    files = 0
+    total = 0
+    made = set()
+    for rel, size in _layout(shape, scale, rng):
+        path = os.path.join(root, rel)
+        parent = os.path.dirname(path)
+        if parent not in made:
+            os.makedirs(parent, exist_ok=True)
+            made.add(parent)
+        with open(path, 'wb') as f:
+            if size <= WRITE_LIMIT:
+                f.write(b'\0' * size)
+            else:
+                f.truncate(size)
+        files += 1
+        total += size
+    return {'files': files, 'directories': len(made), 'bytes': total}
+
+
+def synthetic_entries(count: int, seed: int = 0, root: str = '/synthetic') -> List[FileInfo]:
+    """count files spread over a three-level tree, with a heavy-tailed size distribution"""
+    rng = random.Random(seed)
+    fanout = max(2, int(round(count ** (1 / 4))))
+    entries = []
+    for i in range(count):
+        a, b, c = rng.randrange(fanout), rng.randrange(fanout), rng.randrange(fanout)
+        ext = EXTENSIONS[rng.randrange(len(EXTENSIONS))]
+        entries.append(FileInfo(
+            path=f"{root}/a{a}/b{b}/c{c}/f{i}{ext}",
+            size=int(rng.paretovariate(1.1) * 1000),
+            is_dir=False,
+            depth=4,
+            mtime=1.6e9 + rng.random() * 1e8,
+        ))
+    return entries
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Create a synthetic tree")
+    parser.add_argument('root')
+    parser.add_argument('--shape', choices=SHAPES, default='wide')
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    print(create_tree(args.root, args.shape, args.scale, args.seed))
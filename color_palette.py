@@ -0,0 +1,796 @@
+# color_palette.py
+
+import hashlib
+import math
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+
+# Base colors by type group. Groups are merged in order, so an extension listed
+# in several groups takes the color (and group) of its last occurrence.
+TYPE_GROUPS: Dict[str, Dict[str, str]] = {
+    'Text files': {
+        '.txt': '#c8c8ff',
+        '.md': '#c8c8ff',
+        '.rst': '#c8c8ff',
+        '.rtf': '#c8c8ff',
+        '.tex': '#c8c8ff',
+        '.log': '#c8c8ff',
+        '.readme': '#c8c8ff',
+        '.changelog': '#c8c8ff',
+        '.news': '#c8c8ff',
+        '.authors': '#c8c8ff',
+        '.license': '#c8c8ff',
+        '.copying': '#c8c8ff',
+        '.todo': '#c8c8ff',
+        '.manifest': '#c8c8ff',
+        '.install': '#c8c8ff',
+    },
+    'Programming languages': {
+        '.py': '#64c896',
+        '.pyw': '#64c896',
+        '.pyc': '#64c896',
+        '.pyo': '#64c896',
+        '.pyd': '#64c896',
+        '.js': '#ffc864',
+        '.jsx': '#ffc864',
+        '.ts': '#ffc864',
+        '.tsx': '#ffc864',
+        '.mjs': '#ffc864',
+        '.cjs': '#ffc864',
+        '.c': '#96c8ff',
+        '.cc': '#96c8ff',
+        '.cpp': '#96c8ff',
+        '.cxx': '#96c8ff',
+        '.c++': '#96c8ff',
+        '.h': '#96c8ff',
+        '.hpp': '#96c8ff',
+        '.hxx': '#96c8ff',
+        '.h++': '#96c8ff',
+        '.java': '#ff9664',
+        '.class': '#ff9664',
+        '.jar': '#ff9664',
+        '.war': '#ff9664',
+        '.ear': '#ff9664',
+        '.cs': '#9696ff',
+        '.vb': '#9696ff',
+        '.fs': '#9696ff',
+        '.go': '#64ffff',
+        '.rs': '#ff6464',
+        '.rb': '#ff6496',
+        '.php': '#6496ff',
+        '.php3': '#6496ff',
+        '.php4': '#6496ff',
+        '.php5': '#6496ff',
+        '.phtml': '#6496ff',
+        '.pl': '#96ff64',
+        '.pm': '#96ff64',
+        '.perl': '#96ff64',
+        '.r': '#64ff96',
+        '.rdata': '#64ff96',
+        '.rds': '#64ff96',
+        '.swift': '#ffff64',
+        '.kt': '#ff96ff',
+        '.kts': '#ff96ff',
+        '.scala': '#ff6464',
+        '.groovy': '#96c8ff',
+        '.lua': '#6496ff',
+        '.m': '#ff9664',
+        '.mm': '#ff9664',
+        '.pas': '#9696ff',
+        '.pp': '#9696ff',
+        '.ada': '#96ff64',
+        '.adb': '#96ff64',
+        '.ads': '#96ff64',
+        '.f': '#64ffff',
+        '.f90': '#64ffff',
+        '.f95': '#64ffff',
+        '.f03': '#64ffff',
+        '.f08': '#64ffff',
+        '.for': '#64ffff',
+        '.ftn': '#64ffff',
+        '.cob': '#c864ff',
+        '.cbl': '#c864ff',
+        '.lisp': '#ff6496',
+        '.lsp': '#ff6496',
+        '.cl': '#ff6496',
+        '.scm': '#ff6496',
+        '.ss': '#ff6496',
+        '.rkt': '#ff6496',
+        '.hs': '#96ff64',
+        '.lhs': '#96ff64',
+        '.ml': '#64ff96',
+        '.mli': '#64ff96',
+        '.elm': '#64c896',
+        '.clj': '#ff6496',
+        '.cljs': '#ff6496',
+        '.cljc': '#ff6496',
+        '.erl': '#ff6464',
+        '.hrl': '#ff6464',
+        '.ex': '#6496ff',
+        '.exs': '#6496ff',
+        '.jl': '#96ff64',
+        '.dart': '#64c896',
+        '.v': '#96c8ff',
+        '.vh': '#96c8ff',
+        '.sv': '#96c8ff',
+        '.svh': '#96c8ff',
+        '.vhd': '#96c8ff',
+        '.vhdl': '#96c8ff',
+        '.tcl': '#ff9664',
+        '.tk': '#ff9664',
+        '.awk': '#c8c8ff',
+        '.sed': '#c8c8ff',
+        '.nim': '#ffff64',
+        '.nims': '#ffff64',
+        '.cr': '#c8c8ff',
+        '.zig': '#ff9664',
+        '.d': '#ff6464',
+        '.di': '#ff6464',
+        '.odin': '#64c896',
+        '.pony': '#ff6496',
+        '.purs': '#96ff64',
+        '.elm': '#64c896',
+        '.coffee': '#96c8ff',
+        '.litcoffee': '#96c8ff',
+    },
+    'Web technologies': {
+        '.html': '#ff9664',
+        '.htm': '#ff9664',
+        '.xhtml': '#ff9664',
+        '.xml': '#ff9664',
+        '.xsl': '#ff9664',
+        '.xslt': '#ff9664',
+        '.css': '#9696ff',
+        '.scss': '#9696ff',
+        '.sass': '#9696ff',
+        '.less': '#9696ff',
+        '.styl': '#9696ff',
+        '.stylus': '#9696ff',
+        '.json': '#ffc864',
+        '.jsonl': '#ffc864',
+        '.yaml': '#ffc864',
+        '.yml': '#ffc864',
+        '.toml': '#ffc864',
+        '.ini': '#ffc864',
+        '.cfg': '#ffc864',
+        '.conf': '#ffc864',
+        '.config': '#ffc864',
+        '.properties': '#ffc864',
+        '.prop': '#ffc864',
+        '.env': '#ffc864',
+        '.rc': '#ffc864',
+        '.profile': '#ffc864',
+        '.bashrc': '#ffc864',
+        '.zshrc': '#ffc864',
+        '.vimrc': '#ffc864',
+        '.tmux.conf': '#ffc864',
+        '.gitconfig': '#ffc864',
+        '.gitignore': '#ffc864',
+        '.gitattributes': '#ffc864',
+        '.editorconfig': '#ffc864',
+        '.htaccess': '#ffc864',
+        '.htpasswd': '#ffc864',
+    },
+    'Shell scripts': {
+        '.sh': '#96ff64',
+        '.bash': '#96ff64',
+        '.zsh': '#96ff64',
+        '.fish': '#96ff64',
+        '.csh': '#96ff64',
+        '.tcsh': '#96ff64',
+        '.ksh': '#96ff64',
+        '.dash': '#96ff64',
+        '.bat': '#96ff64',
+        '.cmd': '#96ff64',
+        '.ps1': '#96ff64',
+        '.psm1': '#96ff64',
+        '.psd1': '#96ff64',
+    },
+    'Images': {
+        '.jpg': '#ff6496',
+        '.jpeg': '#ff6496',
+        '.png': '#ff6496',
+        '.gif': '#ff6496',
+        '.bmp': '#ff6496',
+        '.tiff': '#ff6496',
+        '.tif': '#ff6496',
+        '.webp': '#ff6496',
+        '.ico': '#ff6496',
+        '.svg': '#ff6496',
+        '.eps': '#ff6496',
+        '.ps': '#ff6496',
+        '.ai': '#ff6496',
+        '.psd': '#ff6496',
+        '.xcf': '#ff6496',
+        '.raw': '#ff6496',
+        '.cr2': '#ff6496',
+        '.nef': '#ff6496',
+        '.dng': '#ff6496',
+        '.heic': '#ff6496',
+        '.heif': '#ff6496',
+        '.avif': '#ff6496',
+        '.jp2': '#ff6496',
+        '.j2k': '#ff6496',
+        '.jpf': '#ff6496',
+        '.jpx': '#ff6496',
+        '.jpm': '#ff6496',
+        '.mj2': '#ff6496',
+    },
+    'Audio': {
+        '.mp3': '#64ff96',
+        '.wav': '#64ff96',
+        '.flac': '#64ff96',
+        '.aac': '#64ff96',
+        '.ogg': '#64ff96',
+        '.oga': '#64ff96',
+        '.wma': '#64ff96',
+        '.m4a': '#64ff96',
+        '.mp4a': '#64ff96',
+        '.aiff': '#64ff96',
+        '.aif': '#64ff96',
+        '.au': '#64ff96',
+        '.snd': '#64ff96',
+        '.mid': '#64ff96',
+        '.midi': '#64ff96',
+        '.kar': '#64ff96',
+        '.mpga': '#64ff96',
+        '.mp2': '#64ff96',
+        '.mp2a': '#64ff96',
+        '.m2a': '#64ff96',
+        '.m3a': '#64ff96',
+        '.oga': '#64ff96',
+        '.spx': '#64ff96',
+        '.s3m': '#64ff96',
+        '.sil': '#64ff96',
+        '.uva': '#64ff96',
+        '.uvva': '#64ff96',
+        '.eol': '#64ff96',
+        '.dra': '#64ff96',
+        '.dts': '#64ff96',
+        '.dtshd': '#64ff96',
+        '.lvp': '#64ff96',
+        '.pya': '#64ff96',
+        '.ecelp4800': '#64ff96',
+        '.ecelp7470': '#64ff96',
+        '.ecelp9600': '#64ff96',
+        '.rip': '#64ff96',
+        '.weba': '#64ff96',
+        '.aac': '#64ff96',
+        '.adp': '#64ff96',
+        '.au': '#64ff96',
+        '.snd': '#64ff96',
+        '.mid': '#64ff96',
+        '.midi': '#64ff96',
+        '.kar': '#64ff96',
+        '.rmi': '#64ff96',
+    },
+    'Video': {
+        '.mp4': '#96ff64',
+        '.avi': '#96ff64',
+        '.mov': '#96ff64',
+        '.wmv': '#96ff64',
+        '.flv': '#96ff64',
+        '.webm': '#96ff64',
+        '.mkv': '#96ff64',
+        '.m4v': '#96ff64',
+        '.mpg': '#96ff64',
+        '.mpeg': '#96ff64',
+        '.mpe': '#96ff64',
+        '.ogv': '#96ff64',
+        '.qt': '#96ff64',
+        '.rm': '#96ff64',
+        '.rmvb': '#96ff64',
+        '.asf': '#96ff64',
+        '.amv': '#96ff64',
+        '.mp4v': '#96ff64',
+        '.mpv': '#96ff64',
+        '.m2v': '#96ff64',
+        '.svi': '#96ff64',
+        '.3gp': '#96ff64',
+        '.3g2': '#96ff64',
+        '.mxf': '#96ff64',
+        '.roq': '#96ff64',
+        '.nsv': '#96ff64',
+        '.f4v': '#96ff64',
+        '.f4p': '#96ff64',
+        '.f4a': '#96ff64',
+        '.f4b': '#96ff64',
+        '.vob': '#96ff64',
+        '.ogm': '#96ff64',
+        '.drc': '#96ff64',
+        '.gif': '#96ff64',
+        '.gifv': '#96ff64',
+        '.mng': '#96ff64',
+        '.avi': '#96ff64',
+        '.mts': '#96ff64',
+        '.m2ts': '#96ff64',
+        '.ts': '#96ff64',
+        '.yuv': '#96ff64',
+        '.rmvb': '#96ff64',
+        '.viv': '#96ff64',
+        '.asf': '#96ff64',
+        '.amv': '#96ff64',
+        '.m4p': '#96ff64',
+        '.m4v': '#96ff64',
+        '.mpv': '#96ff64',
+        '.mp2': '#96ff64',
+        '.mpe': '#96ff64',
+        '.mpv': '#96ff64',
+        '.m2v': '#96ff64',
+        '.svi': '#96ff64',
+        '.3gp': '#96ff64',
+        '.3g2': '#96ff64',
+        '.mxf': '#96ff64',
+        '.roq': '#96ff64',
+        '.nsv': '#96ff64',
+    },
+    'Documents': {
+        '.pdf': '#ff6464',
+        '.doc': '#6496ff',
+        '.docx': '#6496ff',
+        '.xls': '#64ff96',
+        '.xlsx': '#64ff96',
+        '.ppt': '#ff9664',
+        '.pptx': '#ff9664',
+        '.odt': '#6496ff',
+        '.ods': '#64ff96',
+        '.odp': '#ff9664',
+        '.odg': '#ff6496',
+        '.odf': '#c8c8ff',
+        '.odb': '#c864ff',
+        '.odc': '#c864ff',
+        '.odm': '#c864ff',
+        '.ott': '#6496ff',
+        '.ots': '#64ff96',
+        '.otp': '#ff9664',
+        '.otg': '#ff6496',
+        '.otf': '#c8c8ff',
+        '.rtf': '#c8c8ff',
+        '.pages': '#6496ff',
+        '.numbers': '#64ff96',
+        '.keynote': '#ff9664',
+        '.wpd': '#6496ff',
+        '.wps': '#6496ff',
+        '.xps': '#6496ff',
+        '.oxps': '#6496ff',
+        '.eps': '#ff6496',
+        '.ps': '#ff6496',
+        '.dvi': '#c8c8ff',
+        '.djvu': '#c8c8ff',
+        '.djv': '#c8c8ff',
+        '.fb2': '#c8c8ff',
+        '.epub': '#c8c8ff',
+        '.mobi': '#c8c8ff',
+        '.azw': '#c8c8ff',
+        '.azw3': '#c8c8ff',
+        '.kf8': '#c8c8ff',
+        '.kfx': '#c8c8ff',
+        '.lit': '#c8c8ff',
+        '.pdb': '#c8c8ff',
+        '.pml': '#c8c8ff',
+        '.rb': '#c8c8ff',
+        '.tcr': '#c8c8ff',
+        '.tr2': '#c8c8ff',
+        '.tr3': '#c8c8ff',
+    },
+    'Archives': {
+        '.zip': '#c864ff',
+        '.rar': '#c864ff',
+        '.7z': '#c864ff',
+        '.tar': '#c864ff',
+        '.gz': '#c864ff',
+        '.bz2': '#c864ff',
+        '.xz': '#c864ff',
+        '.lz': '#c864ff',
+        '.lzma': '#c864ff',
+        '.lzo': '#c864ff',
+        '.z': '#c864ff',
+        '.Z': '#c864ff',
+        '.deb': '#c864ff',
+        '.rpm': '#c864ff',
+        '.pkg': '#c864ff',
+        '.dmg': '#c864ff',
+        '.iso': '#c864ff',
+        '.img': '#c864ff',
+        '.bin': '#c864ff',
+        '.toast': '#c864ff',
+        '.vcd': '#c864ff',
+        '.crx': '#c864ff',
+        '.xpi': '#c864ff',
+        '.cab': '#c864ff',
+        '.msi': '#c864ff',
+        '.udf': '#c864ff',
+        '.wim': '#c864ff',
+        '.swm': '#c864ff',
+        '.esd': '#c864ff',
+        '.apk': '#c864ff',
+        '.ipa': '#c864ff',
+        '.deb': '#c864ff',
+        '.rpm': '#c864ff',
+        '.pkg': '#c864ff',
+        '.snap': '#c864ff',
+        '.appimage': '#c864ff',
+        '.flatpak': '#c864ff',
+        '.ace': '#c864ff',
+        '.alz': '#c864ff',
+        '.arc': '#c864ff',
+        '.arj': '#c864ff',
+        '.bz': '#c864ff',
+        '.cpio': '#c864ff',
+        '.ear': '#c864ff',
+        '.jar': '#c864ff',
+        '.lha': '#c864ff',
+        '.lzh': '#c864ff',
+        '.mar': '#c864ff',
+        '.pea': '#c864ff',
+        '.rar': '#c864ff',
+        '.s7z': '#c864ff',
+        '.shar': '#c864ff',
+        '.tbz': '#c864ff',
+        '.tbz2': '#c864ff',
+        '.tgz': '#c864ff',
+        '.tlz': '#c864ff',
+        '.txz': '#c864ff',
+        '.uu': '#c864ff',
+        '.war': '#c864ff',
+        '.whl': '#c864ff',
+        '.xar': '#c864ff',
+        '.zipx': '#c864ff',
+        '.zoo': '#c864ff',
+        '.zpaq': '#c864ff',
+        '.zst': '#c864ff',
+        '.zstd': '#c864ff',
+    },
+    'System files': {
+        '.exe': '#ff6464',
+        '.com': '#ff6464',
+        '.scr': '#ff6464',
+        '.pif': '#ff6464',
+        '.application': '#ff6464',
+        '.gadget': '#ff6464',
+        '.msi': '#ff6464',
+        '.msp': '#ff6464',
+        '.msu': '#ff6464',
+        '.deb': '#ff6464',
+        '.rpm': '#ff6464',
+        '.pkg': '#ff6464',
+        '.snap': '#ff6464',
+        '.appimage': '#ff6464',
+        '.flatpak': '#ff6464',
+        '.run': '#ff6464',
+        '.bin': '#ff6464',
+        '.bundle': '#ff6464',
+        '.app': '#ff6464',
+        '.dmg': '#ff6464',
+        '.so': '#ff6464',
+        '.dylib': '#ff6464',
+        '.dll': '#ff6464',
+        '.sys': '#ff6464',
+        '.drv': '#ff6464',
+        '.ko': '#ff6464',
+        '.kext': '#ff6464',
+        '.o': '#ff6464',
+        '.obj': '#ff6464',
+        '.lib': '#ff6464',
+        '.a': '#ff6464',
+        '.la': '#ff6464',
+        '.lo': '#ff6464',
+        '.lock': '#969696',
+        '.tmp': '#969696',
+        '.temp': '#969696',
+        '.cache': '#969696',
+        '.bak': '#969696',
+        '.backup': '#969696',
+        '.old': '#969696',
+        '.orig': '#969696',
+        '.swp': '#969696',
+        '.swo': '#969696',
+        '.DS_Store': '#969696',
+        '.Thumbs.db': '#969696',
+        '.desktop.ini': '#969696',
+        '.directory': '#969696',
+        '.url': '#969696',
+        '.lnk': '#969696',
+        '.alias': '#969696',
+        '.webloc': '#969696',
+        '.torrent': '#969696',
+        '.part': '#969696',
+        '.partial': '#969696',
+        '.download': '#969696',
+        '.crdownload': '#969696',
+        '.opdownload': '#969696',
+        '.!ut': '#969696',
+    },
+    'Development files': {
+        '.makefile': '#96c8ff',
+        '.cmake': '#96c8ff',
+        '.gradle': '#96c8ff',
+        '.ant': '#96c8ff',
+        '.maven': '#96c8ff',
+        '.sbt': '#96c8ff',
+        '.bazel': '#96c8ff',
+        '.buck': '#96c8ff',
+        '.ninja': '#96c8ff',
+        '.gyp': '#96c8ff',
+        '.gypi': '#96c8ff',
+        '.gn': '#96c8ff',
+        '.gni': '#96c8ff',
+        '.dockerfile': '#96c8ff',
+        '.dockerignore': '#96c8ff',
+        '.vagrantfile': '#96c8ff',
+        '.gemfile': '#96c8ff',
+        '.gemspec': '#96c8ff',
+        '.podfile': '#96c8ff',
+        '.podspec': '#96c8ff',
+        '.cartfile': '#96c8ff',
+        '.package': '#96c8ff',
+        '.project': '#96c8ff',
+        '.solution': '#96c8ff',
+        '.workspace': '#96c8ff',
+        '.xcodeproj': '#96c8ff',
+        '.xcworkspace': '#96c8ff',
+        '.pbxproj': '#96c8ff',
+        '.vcxproj': '#96c8ff',
+        '.vbproj': '#96c8ff',
+        '.csproj': '#96c8ff',
+        '.fsproj': '#96c8ff',
+        '.shproj': '#96c8ff',
+        '.pyproj': '#96c8ff',
+        '.njsproj': '#96c8ff',
+        '.sln': '#96c8ff',
+        '.suo': '#96c8ff',
+        '.user': '#96c8ff',
+        '.userprefs': '#96c8ff',
+        '.pidb': '#96c8ff',
+        '.booproj': '#96c8ff',
+        '.svd': '#96c8ff',
+        '.mds': '#96c8ff',
+        '.mdpolicy': '#96c8ff',
+        '.mdproj': '#96c8ff',
+        '.mdworkspace': '#96c8ff',
+        '.mfbundle': '#96c8ff',
+        '.plproj': '#96c8ff',
+        '.tmproj': '#96c8ff',
+        '.tmproject': '#96c8ff',
+        '.mod': '#96c8ff',
+        '.sum': '#96c8ff',
+        '.work': '#96c8ff',
+        '.glide': '#96c8ff',
+        '.godeps': '#96c8ff',
+        '.vendor': '#96c8ff',
+        '.toml': '#96c8ff',
+        '.cabal': '#96c8ff',
+        '.stack': '#96c8ff',
+        '.opam': '#96c8ff',
+        '.rebar': '#96c8ff',
+        '.mix': '#96c8ff',
+        '.lein': '#96c8ff',
+        '.boot': '#96c8ff',
+        '.shard': '#96c8ff',
+        '.nimble': '#96c8ff',
+        '.dub': '#96c8ff',
+        '.spago': '#96c8ff',
+        '.pulp': '#96c8ff',
+        '.bower': '#96c8ff',
+        '.component': '#96c8ff',
+        '.jspm': '#96c8ff',
+        '.elm-package': '#96c8ff',
+        '.elm-stuff': '#96c8ff',
+        '.paket': '#96c8ff',
+        '.fake': '#96c8ff',
+        '.ionide': '#96c8ff',
+        '.fsproj': '#96c8ff',
+        '.targets': '#96c8ff',
+        '.props': '#96c8ff',
+        '.nuspec': '#96c8ff',
+        '.packages': '#96c8ff',
+        '.config': '#96c8ff',
+        '.settings': '#96c8ff',
+        '.editorconfig': '#96c8ff',
+        '.eslintrc': '#96c8ff',
+        '.jshintrc': '#96c8ff',
+        '.jscsrc': '#96c8ff',
+        '.babelrc': '#96c8ff',
+        '.flowconfig': '#96c8ff',
+        '.tern-project': '#96c8ff',
+        '.tern-port': '#96c8ff',
+        '.watchmanconfig': '#96c8ff',
+        '.buckconfig': '#96c8ff',
+        '.hgignore': '#96c8ff',
+        '.hgtags': '#96c8ff',
+        '.bzrignore': '#96c8ff',
+        '.cvsignore': '#96c8ff',
+        '.svnignore': '#96c8ff',
+        '.tfignore': '#96c8ff',
+        '.p4ignore': '#96c8ff',
+        '.fossil-settings': '#96c8ff',
+        '.hgrc': '#96c8ff',
+        '.hgignore': '#96c8ff',
+        '.hgtags': '#96c8ff',
+        '.bzrignore': '#96c8ff',
+        '.cvsignore': '#96c8ff',
+        '.svnignore': '#96c8ff',
+        '.tfignore': '#96c8ff',
+        '.p4ignore': '#96c8ff',
+        '.fossil-settings': '#96c8ff',
+    },
+    'No extension': {
+        '': '#969696',
+    },
+}
+
+NO_EXTENSION_COLOR = '#969696'
+OTHER_GROUP = 'Other'
+
+EXTENSION_COLORS: Dict[str, str] = {}
+EXTENSION_GROUPS: Dict[str, str] = {}
+for _group, _colors in TYPE_GROUPS.items():
+    EXTENSION_COLORS.update(_colors)
+    EXTENSION_GROUPS.update((_ext, _group) for _ext in _colors)
+
+# Brightness grows with log10(size): factor = min(1.5, 0.5 + log10(size) / 10).
+# The table is indexed by log10(size) quantized to BRIGHTNESS_STEPS_PER_DECADE.
+BRIGHTNESS_STEPS_PER_DECADE = 100
+BRIGHTNESS_LUT = np.minimum(1.5, 0.5 + np.arange(10 * BRIGHTNESS_STEPS_PER_DECADE + 1)
+                            / (10.0 * BRIGHTNESS_STEPS_PER_DECADE))
+
+
+def hex_to_rgb(color: str) -> Tuple[int, int, int]:
+    hex_color = color.lstrip('#')
+    return int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16)
+
+
+def rgb_to_hex(rgb: Iterable[int]) -> str:
+    r, g, b = rgb
+    return f'#{r:02x}{g:02x}{b:02x}'
+
+
+@lru_cache(maxsize=None)
+def base_color(file_ext: str) -> str:
+    color = EXTENSION_COLORS.get(file_ext)
+    if color is None:
+        if file_ext == '':
+            color = NO_EXTENSION_COLOR
+        else:
+            # Deterministic color from the extension so unknown types stay stable between runs
+            color = '#' + hashlib.md5(file_ext.encode('utf-8')).hexdigest()[:6]
+    return color
+
+
+@lru_cache(maxsize=None)
+def base_rgb(file_ext: str) -> Tuple[int, int, int]:
+    return hex_to_rgb(base_color(file_ext))
+
+
+def type_group(file_ext: str) -> str:
+    return EXTENSION_GROUPS.get(file_ext, OTHER_GROUP)
+
+
+def brightness_index(size_bytes: int) -> int:
+    log_size = math.log10(max(size_bytes, 1))
+    return min(len(BRIGHTNESS_LUT) - 1, int(log_size * BRIGHTNESS_STEPS_PER_DECADE))
+
+
+@lru_cache(maxsize=65536)
+def _shaded_color(file_ext: str, level: int) -> str:
+    factor = BRIGHTNESS_LUT[level]
+    return rgb_to_hex(min(255, int(c * factor)) for c in base_rgb(file_ext))
+
+
+def file_color(file_ext: str, size_bytes: int) -> str:
+    """Hex color for one file: the type color scaled by log-size brightness"""
+    if size_bytes <= 0:
+        return base_color(file_ext)
+    return _shaded_color(file_ext, brightness_index(size_bytes))
+
+
+class ExtensionTable:
+    """Interns extensions to small integer ids for vectorized coloring.
+
+    The shade table holds the final packed RGBA value for every (extension,
+    brightness level) pair, with one extra level for unshaded zero-size
+    entries, so coloring N entries is a single gather. The tile server's
+    threads and the GUI share one table, so ids are assigned and the table
+    grown under a lock; an id is published only once its color is stored.
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self._rgb: List[Tuple[int, int, int]] = []
+        self._shades = np.empty(0, dtype=np.uint32)
+        self._lock = threading.Lock()
+
+    def ext_id(self, file_ext: str) -> int:
+        ext_id = self.ids.get(file_ext)
+        if ext_id is None:
+            with self._lock:
+                ext_id = self.ids.get(file_ext)
+                if ext_id is None:
+                    ext_id = len(self._rgb)
+                    self._rgb.append(base_rgb(file_ext))
+                    self.ids[file_ext] = ext_id
+        return ext_id
+
+    def shade_table(self) -> np.ndarray:
+        """Shades for every id handed out so far"""
+        levels = len(BRIGHTNESS_LUT) + 1
+        with self._lock:
+            if len(self._shades) != len(self._rgb) * levels:
+                factors = np.append(BRIGHTNESS_LUT, 1.0)
+                rgb = np.array(self._rgb, dtype=np.float64).reshape(-1, 1, 3)
+                table = np.empty((len(self._rgb), levels, 4), dtype=np.uint8)
+                table[:, :, :3] = np.minimum(255, np.floor(rgb * factors[None, :, None]))
+                table[:, :, 3] = 255
+                self._shades = table.view(np.uint32).reshape(-1)
+            return self._shades
+
+
+def colors_rgba(ext_ids: np.ndarray, sizes: np.ndarray, table: ExtensionTable) -> np.ndarray:
+    """(N, 4) uint8 RGBA for all entries at once; matches file_color() exactly"""
+    sizes = np.asarray(sizes, dtype=np.float64)
+    unshaded = len(BRIGHTNESS_LUT)
+    levels = (np.log10(np.maximum(sizes, 1)) * BRIGHTNESS_STEPS_PER_DECADE).astype(np.int64)
+    np.minimum(levels, unshaded - 1, out=levels)
+    levels[sizes <= 0] = unshaded
+
+    flat = np.asarray(ext_ids, dtype=np.int64) * (unshaded + 1) + levels
+    return np.take(table.shade_table(), flat).view(np.uint8).reshape(-1, 4)
+
+
+DEFAULT_TABLE = ExtensionTable()
+
+
+def rects_rgba(rects, table: ExtensionTable = DEFAULT_TABLE) -> np.ndarray:
+    """RGBA colors for a list of FileRect"""
+    if not rects:
+        return np.empty((0, 4), dtype=np.uint8)
+    ext_ids = np.fromiter((table.ext_id(r.file_ext) for r in rects), dtype=np.int64, count=len(rects))
+    sizes = np.fromiter((r.file_data.get('size_bytes', 0) for r in rects), dtype=np.float64, count=len(rects))
+    return colors_rgba(ext_ids, sizes, table)
+
+
+def dim_unmarked(colors: np.ndarray, rects, marked_paths, factor: float = 0.25) -> np.ndarray:
+    """Darken every rectangle whose path is not in marked_paths, e.g. to show query results.
+
+    marked_paths may also be a NameMatches, whose marks() tells files and
+    directories apart, which a path alone cannot.
+    """
+    marks = getattr(marked_paths, 'marks', None)
+    if marks is not None:
+        keep = np.fromiter((marks(r.file_data) for r in rects), dtype=bool, count=len(rects))
+    else:
+        keep = np.fromiter((r.file_data.get('path') in marked_paths for r in rects), dtype=bool, count=len(rects))
+    dimmed = colors.copy()
+    dimmed[~keep, :3] = (dimmed[~keep, :3] * factor).astype(np.uint8)
+    return dimmed
+
+
+GROWTH_LOW = (255, 224, 102)  # Files that barely grew
+GROWTH_HIGH = (255, 64, 48)  # Files that grew 16x or more
+GROWTH_NEW = (255, 64, 200)  # Files that did not exist before
+GROWTH_MAX_LOG2 = 4.0
+
+
+def growth_rgba(rects) -> np.ndarray:
+    """Colors for a diff treemap: yellow to red by log2 of the growth factor, magenta for new files"""
+    growth = np.fromiter((r.file_data.get('growth', np.nan) for r in rects), dtype=np.float64, count=len(rects))
+    colors = np.empty((len(rects), 4), dtype=np.uint8)
+    colors[:, 3] = 255
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.clip(np.log2(growth) / GROWTH_MAX_LOG2, 0, 1)[:, None]
+    colors[:, :3] = np.round(np.array(GROWTH_LOW) * (1 - t) + np.array(GROWTH_HIGH) * t).astype(np.uint8)
+    colors[np.isinf(growth), :3] = GROWTH_NEW
+    # Aggregates without a growth factor of their own keep the neutral color
+    colors[np.isnan(growth), :3] = hex_to_rgb(NO_EXTENSION_COLOR)
+    return colors
+
+
+def rect_colors(rects, color_by: str = 'type') -> np.ndarray:
+    """RGBA colors for a list of FileRect, by file type or, for diff maps, by growth"""
+    if not rects:
+        return np.empty((0, 4), dtype=np.uint8)
+    if color_by == 'growth':
+        return growth_rgba(rects)
+    return rects_rgba(rects)
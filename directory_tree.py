@@ -0,0 +1,245 @@
+import os
+from typing import Dict, Iterable, List, Any, Optional, Set, Tuple
+
+
+class DirNode:
+    __slots__ = ('name', 'path', 'parent', 'depth', 'children', 'files', 'size', 'file_count', 'hidden_size',
+                 'hidden_count', '_sorted')
+
+    def __init__(self, name: str, path: str, parent: Optional['DirNode'] = None, depth: int = 0):
+        self.name = name
+        self.path = path
+        self.parent = parent
+        self.depth = depth
+        self.children: Dict[str, 'DirNode'] = {}
+        self.files: List[Dict[str, Any]] = []
+        self.size = 0
+        self.file_count = 0
+        # Direct files dropped from `files` by a tree that keeps only the largest per directory
+        self.hidden_size = 0
+        self.hidden_count = 0
+        self._sorted: Optional[List[Tuple[int, Dict[str, Any], Optional['DirNode']]]] = None
+
+    def sorted_entries(self) -> List[Tuple[int, Dict[str, Any], Optional['DirNode']]]:
+        """Direct children as (size, file_data, node) sorted largest first, cached until the subtree changes"""
+        if self._sorted is None:
+            entries = [(f['size_bytes'], f, None) for f in self.files]
+            if self.hidden_count:
+                entries.append((self.hidden_size, self.hidden_entry(), None))
+            entries.extend((child.size, child.as_file_data(), child) for child in self.children.values() if child.size > 0)
+            entries.sort(key=lambda e: e[0], reverse=True)
+            self._sorted = entries
+        return self._sorted
+
+    def as_file_data(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'size_bytes': self.size,
+            'size_human': format_size(self.size),
+            'file_type': 'directory',
+            'depth': self.depth,
+            'is_directory': True,
+            'file_count': self.file_count,
+        }
+
+    def hidden_entry(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'size_bytes': self.hidden_size,
+            'size_human': format_size(self.hidden_size),
+            'file_type': f'{self.hidden_count:,} smaller files',
+            'depth': self.depth + 1,
+            'is_directory': True,
+            'file_count': self.hidden_count,
+        }
+
+    def ancestors(self) -> List['DirNode']:
+        """Nodes from the tree root down to this node, inclusive"""
+        chain = []
+        node = self
+        while node is not None:
+            chain.append(node)
+            node = node.parent
+        chain.reverse()
+        return chain
+
+
+class DirectoryTree:
+    """Per-directory size aggregates built incrementally from normalized file dicts.
+
+    With several roots, root_path is only the label of a synthetic top node
+    whose children are the roots, each sized by its own total.
+
+    With top_files, each directory keeps only about its top_files largest
+    files and folds the rest into one "smaller files" entry, so memory grows
+    with the number of directories rather than files. The full lists of one
+    subtree can be put back with load_detail, e.g. from a SegmentStore.
+    """
+
+    def __init__(self, root_path: str, roots: Optional[List[str]] = None, top_files: Optional[int] = None):
+        combined = roots is not None and len(roots) > 1
+        self.root_path = str(root_path) if combined else os.path.normpath(str(root_path))
+        self.root = DirNode(os.path.basename(self.root_path) or self.root_path, self.root_path)
+        self.nodes: Dict[str, DirNode] = {self.root_path: self.root}
+        self.tops = [self.root]  # Nodes of the scanned roots
+        if combined:
+            self.root.name = self.root_path
+            self.tops = []
+            for path in roots:
+                path = os.path.normpath(path)
+                top = DirNode(path, path, self.root, 1)
+                self.root.children[path] = top
+                self.nodes[path] = top
+                self.tops.append(top)
+        self.version = 0
+        self.top_files = top_files
+        self.detail_root: Optional[DirNode] = None
+        self._detail_dirs: Set[str] = set()
+        self._detail_paths: Set[str] = set()
+
+    def add_files(self, file_data: List[Dict[str, Any]]) -> None:
+        for f in file_data:
+            self._add_file(f)
+        self.version += 1
+
+    def _add_file(self, file_data: Dict[str, Any]) -> None:
+        size = file_data.get('size_bytes', 0)
+        if size <= 0 or file_data.get('is_directory', False):
+            return
+        node = self._get_node(os.path.dirname(file_data['path']))
+        if self.top_files is None:
+            node.files.append(file_data)
+        elif node.path not in self._detail_dirs:
+            node.files.append(file_data)
+            if len(node.files) > 2 * self.top_files:
+                self._trim(node)
+        elif file_data['path'] not in self._detail_paths:
+            # Already listed if load_detail read it back before it arrived here
+            node.files.append(file_data)
+        while node is not None:
+            node.size += size
+            node.file_count += 1
+            node._sorted = None
+            node = node.parent
+
+    def _trim(self, node: DirNode) -> None:
+        node.files.sort(key=lambda f: f['size_bytes'], reverse=True)
+        dropped = node.files[self.top_files:]
+        del node.files[self.top_files:]
+        node.hidden_size += sum(f['size_bytes'] for f in dropped)
+        node.hidden_count += len(dropped)
+        node._sorted = None
+
+    def load_detail(self, node: DirNode, file_data: Iterable[Dict[str, Any]]) -> None:
+        """Give every directory under node its full file list, replacing the detail loaded before.
+
+        file_data are all files under node, which may include some that
+        add_files has not seen yet; sizes are unchanged, since the
+        aggregates already count everything the tree has seen.
+        """
+        self.unload_detail()
+        subtree = {}
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            subtree[current.path] = current
+            current.files = []
+            current.hidden_size = current.hidden_count = 0
+            current._sorted = None
+            stack.extend(current.children.values())
+        for f in file_data:
+            target = subtree.get(os.path.dirname(f['path']))
+            if target is not None:
+                target.files.append(f)
+                self._detail_paths.add(f['path'])
+        self._detail_dirs = set(subtree)
+        self.detail_root = node
+        self.version += 1
+
+    def unload_detail(self) -> None:
+        """Cut the loaded subtree back to the largest files per directory"""
+        if self.detail_root is None:
+            return
+        for path in self._detail_dirs:
+            node = self.nodes[path]
+            if len(node.files) > self.top_files:
+                self._trim(node)
+        self._detail_dirs = set()
+        self._detail_paths = set()
+        self.detail_root = None
+        self.version += 1
+
+    def _get_node(self, dir_path: str) -> DirNode:
+        node = self.nodes.get(dir_path)
+        if node is not None:
+            return node
+
+        node = self._top_for(dir_path)
+        if node is None:
+            # Outside the scanned roots; keep it visible at the top level
+            return self.root
+
+        current = node.path
+        for part in os.path.relpath(dir_path, current).split(os.sep):
+            current = os.path.join(current, part)
+            child = node.children.get(part)
+            if child is None:
+                child = DirNode(part, current, node, node.depth + 1)
+                node.children[part] = child
+                self.nodes[current] = child
+                if node.path in self._detail_dirs:
+                    # Found after the detail was loaded, so it is listed in full as its files arrive
+                    self._detail_dirs.add(current)
+            node = child
+        return node
+
+    def _top_for(self, path: str) -> Optional[DirNode]:
+        for top in self.tops:
+            if not os.path.relpath(path, top.path).startswith(os.pardir):
+                return top
+        return None
+
+    def find(self, path: str) -> Optional[DirNode]:
+        return self.nodes.get(os.path.normpath(path))
+
+    def child_towards(self, node: DirNode, path: str, create: bool = False) -> Optional[DirNode]:
+        """Direct child directory of node that contains path, if any.
+
+        With create, a child that is not in the tree yet is added empty; used
+        when the sizes live elsewhere, as when browsing an index daemon.
+        """
+        if node is self.root and self.tops[0] is not self.root:
+            return self._top_for(path)
+        rel = os.path.relpath(path, node.path)
+        if rel == os.curdir or rel.startswith(os.pardir):
+            return None
+        first = rel.split(os.sep, 1)[0]
+        child = node.children.get(first)
+        if child is None and create:
+            child = self._get_node(os.path.join(node.path, first))
+        return child
+
+
+def format_size(size_bytes: int) -> str:
+    """Format file size human-readable"""
+    if size_bytes < 1024:
+        return f"{size_bytes} B"
+    elif size_bytes < 1024 ** 2:
+        return f"{size_bytes / 1024:.1f} KB"
+    elif size_bytes < 1024 ** 3:
+        return f"{size_bytes / 1024 ** 2:.1f} MB"
+    elif size_bytes < 1024 ** 4:
+        return f"{size_bytes / 1024 ** 3:.1f} GB"
+    else:
+        return f"{size_bytes / 1024 ** 4:.1f} TB"
+
+
+def with_ancestors(paths: Iterable[str]) -> Set[str]:
+    """The paths plus every directory above them, e.g. for marking aggregated rectangles"""
+    marked = set()
+    for path in paths:
+        while path and path not in marked:
+            marked.add(path)
+            parent = os.path.dirname(path)
+            path = parent if parent != path else ''
+    return marked
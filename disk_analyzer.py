@@ -1,12 +1,17 @@
 # Refactored disk_analyzer.py
 #!/usr/bin/env python3
 
+import os
 import time
 import logging
+import threading
 from pathlib import Path
-from typing import List, Generator
+from typing import Dict, List, Generator, Optional, Set, Tuple
 from dataclasses import dataclass
 
+from scan_stats import ScanStats
+from scan_order import DepthFirstFrontier, SizeGuidedFrontier
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -16,75 +21,245 @@ class FileInfo:
     is_dir: bool
     depth: int
     mtime: float
+    dev: int = 0  # Device and inode identify the stored data; 0 when unknown (e.g. from a snapshot)
+    ino: int = 0
+    nlink: int = 1
+
+class InodeSet:
+    """(device, inode) pairs already counted; can be shared by scans running on several threads.
+
+    Scans record directories and multiply linked files only, so the set
+    grows with those rather than with every file.
+
+    Each device gets its own set and lock, so roots on different mounts
+    never contend, while scans that can reach the same files (overlapping
+    roots, hard links across them) still count each file once.
+    """
+
+    def __init__(self):
+        self._devices: Dict[int, Tuple[Set[int], threading.Lock]] = {}
+        self._lock = threading.Lock()
+
+    def add_new(self, dev: int, ino: int) -> bool:
+        """Record the pair; False if it was already there"""
+        device = self._devices.get(dev)
+        if device is None:
+            with self._lock:
+                device = self._devices.setdefault(dev, (set(), threading.Lock()))
+        seen, lock = device
+        with lock:
+            if ino in seen:
+                return False
+            seen.add(ino)
+            return True
+
+    def __len__(self) -> int:
+        return sum(len(seen) for seen, _ in self._devices.values())
+
 
 class DiskAnalyzer:
-    def __init__(self, max_depth=8, max_files=100000, timeout_seconds=300, follow_symlinks=False, data_streamer=None):
+    def __init__(self, max_depth=8, max_files=100000, timeout_seconds=300, follow_symlinks=False, data_streamer=None,
+                 visited_inodes=None, checkpoint=None, checkpoint_interval=60.0, spill=None, prior_sizes=None,
+                 previous=None):
         self.max_depth = max_depth
         self.max_files = max_files
         self.timeout_seconds = timeout_seconds
         self.follow_symlinks = False
         self.data_streamer = data_streamer
         self.start_time = time.time()
-        self.visited_inodes = set()
-        self.files = []
+        self.visited_inodes = visited_inodes if visited_inodes is not None else InodeSet()
+        self.hardlinks_skipped = 0
+        # A SegmentStore keeps the entries on disk instead, so max_files need not bound memory
+        self.files = spill if spill is not None else []
+        # Aggregates are updated as entries are found, so reports need no second pass
+        self.stats = ScanStats(now=self.start_time)
+        # Directories still to be listed, as (path, depth). Depth-first by default; with the
+        # directory sizes of an earlier scan, largest first (breadth-first where they are unknown)
+        self.prior_sizes = prior_sizes
+        self.frontier = None
+        self.stopped: Optional[str] = None  # 'timeout' or 'file limit' when the scan was cut short
+        self.partial: Optional[str] = None  # Directory whose listing the stop interrupted
+        self._partial_paths: Set[str] = set()  # Restored entries of the partial directory not yet relisted
+        self.checkpoint = checkpoint  # Called with the analyzer every checkpoint_interval seconds and at the end
+        self.checkpoint_interval = checkpoint_interval
+        self._file_limit = max_files
+        self._last_checkpoint = time.time()
+        # (seconds since start, bytes found) after each directory, for time-to-coverage reports
+        self.progress: List[Tuple[float, int]] = []
+        self.progress_interval = 0.01
+        # Spilled scans record each directory's mtime (ns) when listed, so that a later scan
+        # of the same root given this one as `previous` can read unchanged listings back
+        self.dir_mtimes: Optional[Dict[str, int]] = {} if spill is not None else None
+        self.previous = previous
+        self.reused_directories = 0
+
+    def _frontier(self, pending: List[Tuple[str, int]]):
+        if self.prior_sizes is None:
+            return DepthFirstFrontier(pending)
+        return SizeGuidedFrontier(self.prior_sizes, pending)
+
+    def restore(self, files: List[FileInfo], frontier: List[Tuple[str, int]], hardlinks_skipped: int = 0,
+                partial: Optional[str] = None) -> None:
+        """Continue from a checkpoint: earlier results, and the directories that were still pending"""
+        for file_info in files:
+            self.files.append(file_info)
+            self.stats.add_file(file_info)
+            if file_info.ino:
+                self.visited_inodes.add_new(file_info.dev, file_info.ino)
+            if partial is not None and os.path.dirname(file_info.path) == partial:
+                self._partial_paths.add(file_info.path)
+        self.frontier = self._frontier([(path, depth) for path, depth in frontier])
+        self.hardlinks_skipped = hardlinks_skipped
+        self.partial = partial
+        # Limits apply to this run, so a huge tree can be scanned in slices
+        self._file_limit = len(self.files) + self.max_files
 
     def scan_directory(self, root_path: str) -> List[FileInfo]:
         root = Path(root_path).resolve()
         if not root.exists() or not root.is_dir():
             raise ValueError(f"Invalid directory: {root_path}")
 
-        logger.info(f"Starting scan: {root}")
-        for file_info in self._walk(root, 0):
+        if self.frontier is None:
+            self.frontier = self._frontier([(str(root), 0)])
+            logger.info(f"Starting scan: {root}")
+        else:
+            logger.info(f"Resuming scan of {root}: {len(self.files)} entries so far, "
+                        f"{len(self.frontier)} directories pending")
+        for file_info in self._walk():
             self.files.append(file_info)
-        return self.files
+            self.stats.add_file(file_info)
+        self.progress.append((time.time() - self.start_time, self.stats.total_bytes))
 
-    def _walk(self, path: Path, depth: int) -> Generator[FileInfo, None, None]:
-        if depth > self.max_depth:
-            return
+        if self.checkpoint is not None:
+            self.checkpoint(self)
+        if self.stopped:
+            logger.warning(f"Scan stopped by the {self.stopped} with {len(self.frontier)} directories "
+                           f"not listed; the result is partial")
+        return self.files
 
-        try:
-            entries = list(path.iterdir())
-        except (PermissionError, OSError):
-            return
+    def _walk(self) -> Generator[FileInfo, None, None]:
+        """Lists the frontier's directories in its order.
 
-        for entry in entries:
-            if time.time() - self.start_time > self.timeout_seconds:
-                logger.warning("Scan timeout")
-                return
-            if len(self.files) >= self.max_files:
-                logger.warning("File limit reached")
-                return
+        The pending directories are explicit state rather than the call
+        stack, so an interrupted scan can be checkpointed and resumed. A
+        directory leaves the frontier only once it is fully listed; if a limit
+        stops the scan inside one, it is listed again on resume and the
+        entries already found are skipped by their inodes.
+        """
+        frontier = self.frontier
+        last_sample = 0.0
+        while frontier:
+            path, depth = frontier.peek()
+            listing = self._unchanged_listing(path)
             try:
-                stat_info = entry.lstat()
-                if not self.follow_symlinks and entry.is_symlink():
-                    continue
-                inode_key = (stat_info.st_dev, stat_info.st_ino)
-                if inode_key in self.visited_inodes:
-                    continue
-                self.visited_inodes.add(inode_key)
-                size = stat_info.st_size
-                if size == 0 and not entry.is_dir():
-                    continue
-
-                # --- ADD THIS ---
-                logger.info(f"Found file: {entry} (size: {size} bytes, dir: {entry.is_dir()})")
-
-                file_info = FileInfo(
-                    path=str(entry),
-                    size=size,
-                    is_dir=entry.is_dir(),
-                    depth=depth + 1,
-                    mtime=stat_info.st_mtime
-                )
-                if self.data_streamer:
-                    logger.info(f"Streaming file to callback: {file_info.path}")
-                    self.data_streamer.add_file(file_info)
-                yield file_info
-                if entry.is_dir():
-                    yield from self._walk(entry, depth + 1)
+                entries = listing if listing is not None else list(Path(path).iterdir())
             except (PermissionError, OSError):
+                frontier.pop()
                 continue
 
+            subdirs = []
+            for entry in entries:
+                if time.time() - self.start_time > self.timeout_seconds:
+                    self.stopped = 'timeout'
+                elif len(self.files) >= self._file_limit:
+                    self.stopped = 'file limit'
+                if self.stopped:
+                    logger.warning(f"Scan stopped: {self.stopped} reached")
+                    self.partial = path
+                    frontier.push(subdirs)
+                    return
+                try:
+                    # Entries of a reused listing are as the earlier scan found them
+                    file_info = entry if listing is not None else self._entry_info(entry, depth)
+                    if file_info is None:
+                        continue
+                    is_dir = file_info.is_dir
+                    # The directory a resumed scan stopped in is relisted in the same order. Up to the
+                    # last entry restore() recorded, entries were handled before the stop: restored, or
+                    # skipped as links and already counted. Past it, links are counted as usual.
+                    if path == self.partial and self._partial_paths:
+                        if file_info.path in self._partial_paths:
+                            self._partial_paths.discard(file_info.path)
+                            continue
+                        if is_dir or file_info.nlink > 1:
+                            continue
+                    # Only directories and files with several links can be reached twice, so only they
+                    # are remembered, which keeps the set small
+                    if ((is_dir or file_info.nlink > 1)
+                            and not self.visited_inodes.add_new(file_info.dev, file_info.ino)):
+                        self.hardlinks_skipped += 1
+                        continue
+
+                    # --- ADD THIS ---
+                    logger.info(f"Found file: {file_info.path} (size: {file_info.size} bytes, dir: {is_dir})")
+
+                    if self.data_streamer:
+                        logger.info(f"Streaming file to callback: {file_info.path}")
+                        self.data_streamer.add_file(file_info)
+                    yield file_info
+                    if is_dir and depth + 1 <= self.max_depth:
+                        subdirs.append((file_info.path, depth + 1))
+                except (PermissionError, OSError):
+                    continue
+
+            frontier.pop()
+            frontier.push(subdirs)
+            if path == self.partial:
+                self.partial = None
+                self._partial_paths.clear()
+            now = time.time()
+            if now - last_sample >= self.progress_interval:
+                # The consumer counts the entries yielded, i.e. everything up to this directory
+                self.progress.append((now - self.start_time, self.stats.total_bytes))
+                last_sample = now
+            if self.checkpoint is not None and time.time() - self._last_checkpoint >= self.checkpoint_interval:
+                self.checkpoint(self)
+                self._last_checkpoint = time.time()
+
+
+    def _entry_info(self, entry: Path, depth: int) -> Optional[FileInfo]:
+        """FileInfo of an entry of a directory at depth; None for symlinks (unless followed) and empty files"""
+        stat_info = entry.lstat()
+        if not self.follow_symlinks and entry.is_symlink():
+            return None
+        is_dir = entry.is_dir()
+        if stat_info.st_size == 0 and not is_dir:
+            return None
+        return FileInfo(
+            path=str(entry),
+            size=stat_info.st_size,
+            is_dir=is_dir,
+            depth=depth + 1,
+            mtime=stat_info.st_mtime,
+            dev=stat_info.st_dev,
+            ino=stat_info.st_ino,
+            nlink=stat_info.st_nlink
+        )
+
+    def _unchanged_listing(self, path: str) -> Optional[List[FileInfo]]:
+        """The previous scan's entries of directory path if it has not changed since, else None.
+
+        Adding, removing or renaming an entry updates a directory's mtime, so
+        an equal mtime means the same entries. Sizes of files rewritten in
+        place are not seen this way; a scan without `previous` finds them.
+        """
+        if self.dir_mtimes is None:
+            return None
+        try:
+            mtime = os.lstat(path).st_mtime_ns
+        except OSError:
+            return None
+        # Recorded before listing, so a change while listing shows up as a different mtime next time
+        self.dir_mtimes[path] = mtime
+        previous = self.previous
+        if previous is None or previous.dir_mtimes.get(path) != mtime:
+            return None
+        if mtime >= (previous.start_time - 1) * 1e9:
+            # Changed around the time of the earlier listing, possibly within one clock tick of it
+            return None
+        self.reused_directories += 1
+        return list(previous.files.listing(path))
+
 
 class RealTimeDataStreamer:
     def __init__(self, callback_function, update_interval=0.5):
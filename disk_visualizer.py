@@ -1,30 +1,79 @@
+import os
 import threading
-from typing import List, Dict, Any, Optional
+import time
+from functools import lru_cache
+from collections import OrderedDict
+from typing import Callable, List, Dict, Any, Optional, Set, Tuple
 from pathlib import Path
+import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.collections import PolyCollection
+from matplotlib.patches import Rectangle
+from matplotlib.colors import to_rgba
 import logging
-import tkinter as tk  # For screen size detection
 
 from visualization_config import VisualizationConfig, FileRect
 from treemap_layout import TreemapLayout
+from directory_tree import DirectoryTree, DirNode, format_size
+from raster_renderer import RasterRenderer, rect_geometry
+from spatial_index import GridIndex
+from color_palette import rect_colors, dim_unmarked
+from layout_worker import LayoutWorker, LayoutSnapshot
+from instrumentation import RollingTimer
+from name_index import NameIndex
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=4096)
+def _wrap_text_cached(text: str, max_chars: int) -> Tuple[str, ...]:
+    if len(text) <= max_chars:
+        return (text,)
+
+    lines = []
+    remaining_text = text
+    while remaining_text:
+        if len(remaining_text) <= max_chars:
+            lines.append(remaining_text)
+            break
+        else:
+            break_point = max_chars
+            # Find a good break point at space or slash to avoid breaking words/paths
+            for i in range(max_chars - 1, max_chars // 2, -1):
+                if remaining_text[i] in [' ', '/', '\\']:
+                    break_point = i + 1
+                    break
+
+            # If no good break point found, break at max_chars anyway
+            lines.append(remaining_text[:break_point].rstrip())
+            remaining_text = remaining_text[break_point:].lstrip()
+
+    return tuple(lines)
+
+
 class DiskVisualization:
+    resize_debounce_ms = 200
+    update_poll_ms = 50
+    hud_interval_ms = 500
+    remote_poll_ms = 2000
+    search_debounce_ms = 150
+    spill_top_files = 64  # Files kept per directory when the scan spills to disk
+    detail_budget = 200000  # Largest subtree whose full file lists are read back on zoom
+    stats_views = ('types', 'extensions', 'sizes', 'ages')
+    info_name_max_lines = 6
+
     def __init__(self, config: Optional[VisualizationConfig] = None):
         self.config = config or VisualizationConfig()
 
-        # Determine screen size for 80% window dimensions
-        root = tk.Tk()
-        root.withdraw()  # Hide main window
-        screen_width = root.winfo_screenwidth()
-        screen_height = root.winfo_screenheight()
-        root.destroy()
-
         dpi = 100  # Typical matplotlib DPI
-        fig_width = (screen_width * 0.8) / dpi
-        fig_height = (screen_height * 0.8) / dpi
+        fig_width = self.config.figure_width
+        fig_height = self.config.figure_height
+        if self.config.interactive:
+            screen_size = self._screen_size()
+            if screen_size:
+                # 80% of the screen
+                fig_width = (screen_size[0] * 0.8) / dpi
+                fig_height = (screen_size[1] * 0.8) / dpi
 
         plt.style.use('dark_background')
         self.fig = plt.figure(figsize=(fig_width, fig_height), dpi=dpi)
@@ -50,37 +99,169 @@ class DiskVisualization:
         self.ax_info.set_facecolor('#282832')
         self.ax_info.axis('off')
 
+        # Hover feedback uses animated artists blitted over cached backgrounds
+        self.use_blit = bool(getattr(self.fig.canvas, 'supports_blit', False))
+        # Rolling timers behind the performance HUD; recorded always, formatted only while it is shown
+        self.perf = {name: RollingTimer() for name in ('scan', 'layout', 'render', 'hover', 'frames')}
+        self._draw_started: Optional[float] = None
+        self.show_hud = self.config.show_hud
+        self._init_info_panel()
+
+        self._drawn_rects: Optional[List[FileRect]] = None
+        self._base_colors = np.empty((0, 4))
+        self.marked_paths: Optional[Set[str]] = None  # Query results to keep bright
+
+        self.highlight_patch = Rectangle((0, 0), 0, 0,
+                                         facecolor=(1, 1, 1, 0.25),
+                                         edgecolor=self.config.highlight_color,
+                                         linewidth=1.5,
+                                         visible=False,
+                                         animated=self.use_blit)
+        self.ax_main.add_patch(self.highlight_patch)
+        self._main_background = None
+        self._info_background = None
+        self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+
         self.file_rects: List[FileRect] = []
+        self.rect_index: Optional[GridIndex] = None
         self.hovered_rect: Optional[FileRect] = None
         self.update_lock = threading.RLock()
-        self.pending_update = False
         self.current_files: List[Dict[str, Any]] = []
         self.target_directory = ""
 
+        # Directory aggregates for click-to-zoom; layouts are cached per focus node
+        self.tree: Optional[DirectoryTree] = None
+        self.focus_node: Optional[DirNode] = None
+        self._layout_cache: OrderedDict = OrderedDict()
+        self.layout_cache_size = 32
+        # IndexClient when attached to an index daemon, which then holds the sizes and lays out
+        self.remote: Optional[Any] = None
+        self._remote_generation = 0
+        # SegmentStore holding the full file lists when the tree keeps only the largest files
+        self.detail_store: Optional[Any] = None
+        # File names, indexed by the layout worker as batches are folded in.
+        # search_text is None unless '/' is being typed into; the matches stay marked after Enter.
+        # There is no index when the window must not hold every file (--spill) or has no files (--attach).
+        self.name_index: Optional[NameIndex] = NameIndex()
+        self.search_text: Optional[str] = None
+        self.search_matches: Optional[Any] = None
+        # The matches drawn; they stand in for marked_paths (--query, --duplicates) until cleared
+        self.search_marks: Optional[Any] = None
+        self._saved_keymaps: Dict[str, List[str]] = {}
+        self._search_indexed = 0  # Index size when search_matches was computed
+        self._pending_search: Optional[str] = None  # Typed, searched once typing pauses
+
+        # Layouts run on a worker thread, which is the only writer of the tree.
+        # Scanned batches wait in _pending_batches until the worker folds them in;
+        # the GUI thread only swaps in finished snapshots.
+        self._pending_batches: List[List[Dict[str, Any]]] = []
+        self._gui_calls: List[Callable[[], None]] = []  # Posted by other threads, run by the poll timer
+        self.layout: Optional[LayoutSnapshot] = None
+        self.layout_worker = LayoutWorker(self._compute_layout)
+
+        # Layout happens in axes pixels; resizes are debounced into one relayout
+        self.plot_width, self.plot_height = self._axes_pixel_size()
+
+        self.rect_collection: Optional[PolyCollection] = None
+        self.raster: Optional[RasterRenderer] = None
+        if self.config.renderer == 'raster':
+            # One image at canvas resolution; its ID buffer doubles as the hover index
+            background = tuple(int(round(c * 255)) for c in to_rgba(self.config.background_color))
+            self.raster = RasterRenderer(self.plot_width, self.plot_height, background)
+            self.raster_image = self.ax_main.imshow(self.raster.framebuffer, origin='lower',
+                                                    extent=(0, self.plot_width, 0, self.plot_height),
+                                                    interpolation='nearest', aspect='equal')
+        else:
+            # All rectangles are drawn by one collection whose arrays are swapped on relayout
+            self.rect_collection = PolyCollection(np.empty((0, 4, 2)), edgecolors='none', linewidths=0)
+            self.ax_main.add_collection(self.rect_collection)
+        self._resize_timer = self.fig.canvas.new_timer(interval=self.resize_debounce_ms)
+        self._resize_timer.single_shot = True
+        self._resize_timer.add_callback(self._on_resize_settled)
+        # Marking recolors the whole map, so it waits until typing pauses
+        self._search_timer = self.fig.canvas.new_timer(interval=self.search_debounce_ms)
+        self._search_timer.single_shot = True
+        self._search_timer.add_callback(self._apply_search)
+        self.fig.canvas.mpl_connect('resize_event', self.on_resize)
+        self.fig.canvas.mpl_connect('close_event', lambda event: self.layout_worker.stop())
+
+        # The HUD refreshes on its own slow timer so it does not perturb what it measures
+        self._hud_timer = self.fig.canvas.new_timer(interval=self.hud_interval_ms)
+        self._hud_timer.add_callback(self._refresh_hud)
+        if self.show_hud:
+            self._hud_timer.start()
+
         self._start_update_timer()
 
+    @staticmethod
+    def _screen_size() -> Optional[Tuple[int, int]]:
+        # tkinter is only touched here, so non-interactive use works without a display
+        try:
+            import tkinter as tk
+            root = tk.Tk()
+            root.withdraw()  # Hide main window
+            size = (root.winfo_screenwidth(), root.winfo_screenheight())
+            root.destroy()
+            return size
+        except Exception as e:
+            logger.warning(f"Could not determine screen size: {e}")
+            return None
+
+    def _axes_pixel_size(self) -> Tuple[int, int]:
+        # The gridspec slot, not the aspect-adjusted box, is the space available for the map
+        bbox = self.ax_main.get_position(original=True).transformed(self.fig.transFigure)
+        return max(1, int(bbox.width)), max(1, int(bbox.height))
+
+    def on_resize(self, event: Any) -> None:
+        # Restarting the single-shot timer collapses a drag-resize into one relayout
+        self._resize_timer.stop()
+        self._resize_timer.start()
+
+    def _on_resize_settled(self) -> None:
+        size = self._axes_pixel_size()
+        if size == (self.plot_width, self.plot_height):
+            return
+        logger.info(f"Resized plot area to {size[0]}x{size[1]} px")
+        self.plot_width, self.plot_height = size
+        self._request_layout()
+
     def _start_update_timer(self):
         def timer_callback():
+            with self.update_lock:
+                calls, self._gui_calls = self._gui_calls, []
+            for call in calls:
+                call()
             updated = self._check_and_perform_update()
             if updated:
                 self.redraw()
 
-        # Create the timer once
-        self.timer = self.fig.canvas.new_timer(interval=500)
+        # Create the timer once; it only polls for finished layouts, so it can tick often
+        self.timer = self.fig.canvas.new_timer(interval=self.update_poll_ms)
         self.timer.add_callback(timer_callback)
         self.timer.start()
 
-    def load_initial_data(self, root_directory: str) -> bool:
+    def call_soon(self, callback: Callable[[], None]) -> None:
+        """Run callback on the GUI thread at the next poll, e.g. from a scan running on another thread"""
+        with self.update_lock:
+            self._gui_calls.append(callback)
+
+    def load_initial_data(self, root_directory: str, roots: Optional[List[str]] = None,
+                          detail_store: Optional[Any] = None) -> bool:
         try:
             self.target_directory = root_directory
-            plot_width = 1000
-            plot_height = 800
-            self.ax_main.set_xlim(0, plot_width)
-            self.ax_main.set_ylim(0, plot_height)
+            self.ax_main.set_xlim(0, self.plot_width)
+            self.ax_main.set_ylim(0, self.plot_height)
 
             with self.update_lock:
                 self.current_files = []
+                self._pending_batches = []
                 self.file_rects = []
+                self.detail_store = detail_store
+                self.tree = DirectoryTree(root_directory, roots,
+                                          top_files=self.spill_top_files if detail_store is not None else None)
+                self.name_index = NameIndex() if detail_store is None else None
+                self.focus_node = self.tree.root
+                self._layout_cache.clear()
 
             logger.info("Initialized for real-time visualization")
             return True
@@ -88,6 +269,40 @@ class DiskVisualization:
             logger.error(f"Failed to initialize: {e}")
             return False
 
+    def attach(self, client: Any) -> bool:
+        """Browse the tree an index daemon keeps instead of scanning.
+
+        The local tree only holds the nodes zoomed through; layouts come from
+        the daemon, and a slow timer relayouts when a rescan publishes a new tree.
+        """
+        try:
+            info = client.info()
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not attach to the index daemon: {e}")
+            return False
+        self.remote = client
+        self._remote_generation = info['generation']
+        self.load_initial_data(info['root'], info['roots'])
+        self.name_index = None
+        self._remote_timer = self.fig.canvas.new_timer(interval=self.remote_poll_ms)
+        self._remote_timer.add_callback(self._poll_remote)
+        self._remote_timer.start()
+        self._request_layout()
+        logger.info(f"Attached to {client.socket_path}: {info['file_count']:,} files, "
+                    f"{format_size(info['size_bytes'])}")
+        return True
+
+    def _poll_remote(self) -> None:
+        try:
+            generation = self.remote.info()['generation']
+        except (OSError, ValueError) as e:
+            logger.error(f"Lost the index daemon: {e}")
+            self._remote_timer.stop()
+            return
+        if generation != self._remote_generation:
+            self._remote_generation = generation
+            self._request_layout()
+
     def normalize_file_data(self, file_data: List[Any]) -> List[Dict[str, Any]]:
         normalized = []
         for file_info in file_data:
@@ -98,7 +313,7 @@ class DiskVisualization:
                 file_dict = {
                     'path': getattr(file_info, 'path', ''),
                     'size_bytes': size_bytes,
-                    'size_human': self._format_size(size_bytes),
+                    'size_human': format_size(size_bytes),
                     'file_type': Path(getattr(file_info, 'path', '')).suffix.lower(),
                     'depth': depth,
                     'is_directory': is_dir
@@ -106,7 +321,7 @@ class DiskVisualization:
             elif isinstance(file_info, dict):
                 file_dict = file_info.copy()
                 if 'size_human' not in file_dict:
-                    file_dict['size_human'] = self._format_size(file_dict.get('size_bytes', 0))
+                    file_dict['size_human'] = format_size(file_dict.get('size_bytes', 0))
                 if 'file_type' not in file_dict:
                     file_dict['file_type'] = Path(file_dict.get('path', '')).suffix.lower()
                 if 'depth' not in file_dict:
@@ -121,7 +336,8 @@ class DiskVisualization:
 
         return normalized
 
-    def create_visualization(self, file_data: List[Dict[str, Any]], target_dir: str) -> bool:
+    def create_visualization(self, file_data: List[Dict[str, Any]], target_dir: str,
+                             roots: Optional[List[str]] = None) -> bool:
         try:
             self.target_directory = target_dir
             if not file_data:
@@ -129,237 +345,483 @@ class DiskVisualization:
                 return False
             with self.update_lock:
                 self.current_files = file_data
-                self._update_layout()
+                self._pending_batches = [file_data]
+                self.tree = DirectoryTree(target_dir, roots)
+                self.name_index = NameIndex()
+                self.focus_node = self.tree.root
+                self._layout_cache.clear()
+            # The first layout is needed before showing anything, so compute it here
+            self._install_layout(self._compute_layout(self._layout_request(), 0))
             self.show()
             return True
         except Exception as e:
             logger.error(f"Failed to create visualization: {e}")
             return False
 
-    def _update_layout(self):
-        plot_width = 1000
-        plot_height = 800
-        layout = TreemapLayout(plot_width, plot_height, self.config.padding)
-        self.file_rects = layout.layout_files(self.current_files)
-        self.ax_main.set_xlim(0, plot_width)
-        self.ax_main.set_ylim(0, plot_height)
-        logger.info(f"_update_layout: laid out {len(self.file_rects)} rectangles from {len(self.current_files)} files")
+    def _layout_request(self) -> Tuple[Optional[DirNode], int, int]:
+        return self.focus_node, self.plot_width, self.plot_height
+
+    def _request_layout(self) -> None:
+        focus_node, plot_width, plot_height = request = self._layout_request()
+        view_key = (focus_node.path if focus_node is not None else None, plot_width, plot_height)
+        self.layout_worker.submit(request, view_key)
+
+    def _compute_layout(self, request: Tuple[Optional[DirNode], int, int], generation: int) -> LayoutSnapshot:
+        """Runs on the layout worker: fold in pending batches, then lay out the requested view"""
+        focus_node, plot_width, plot_height = request
+        start = time.perf_counter()
+        with self.update_lock:
+            batches = self._pending_batches
+            self._pending_batches = []
+            tree = self.tree
+            flat_files = list(self.current_files) if tree is None else None
+
+        if tree is None:
+            layout = TreemapLayout(plot_width, plot_height, self.config.padding)
+            rects = layout.layout_files(flat_files)
+            index = self._build_index(rects, plot_width, plot_height)
+            focus_path, data_version = "", len(flat_files)
+        elif self.remote is not None:
+            # The synthetic root of several roots is not a directory the daemon can look up
+            path = focus_node.path if focus_node is not tree.root else ''
+            data_version, rects = self.remote.layout(path, plot_width, plot_height,
+                                                     self.config.padding, self.config.min_rect_size)
+            index = self._build_index(rects, plot_width, plot_height)
+            focus_path = focus_node.path
+        else:
+            name_index = self.name_index
+            for batch in batches:
+                tree.add_files(batch)
+                if name_index is not None:
+                    name_index.add_files(batch)
+            if self.detail_store is not None:
+                self._load_detail(tree, focus_node)
+            rects, index = self._layout_focus(focus_node, plot_width, plot_height)
+            focus_path, data_version = focus_node.path, tree.version
+
+        return LayoutSnapshot(generation=generation, focus_path=focus_path,
+                              width=plot_width, height=plot_height, data_version=data_version,
+                              rects=rects, index=index,
+                              layout_ms=(time.perf_counter() - start) * 1000)
+
+    def _load_detail(self, tree: DirectoryTree, focus_node: DirNode) -> None:
+        """Read the zoomed subtree's full file lists back from the spill store, if it fits the budget"""
+        detail = tree.detail_root
+        if detail is not None and detail.file_count > self.detail_budget:
+            # The scan kept adding to it
+            tree.unload_detail()
+            detail = None
+        if detail is not None and detail in focus_node.ancestors():
+            return
+        if focus_node.file_count > self.detail_budget:
+            return
+        start = time.perf_counter()
+        tree.load_detail(focus_node, self.normalize_file_data(self.detail_store.subtree(focus_node.path)))
+        logger.info(f"Loaded detail of {focus_node.path}: {focus_node.file_count:,} files "
+                    f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def _install_layout(self, snapshot: LayoutSnapshot) -> None:
+        """Swap in a finished layout; GUI thread only"""
+        self.layout = snapshot
+        self.file_rects = snapshot.rects
+        self.rect_index = snapshot.index
+        if self.hovered_rect is not None and self.hovered_rect not in self.file_rects:
+            self.hovered_rect = None
+        self.ax_main.set_xlim(0, snapshot.width)
+        self.ax_main.set_ylim(0, snapshot.height)
+        self.perf['layout'].add(snapshot.layout_ms / 1000)
+        matches = self.search_matches
+        if matches is not None and len(matches.index) > self._search_indexed:
+            # The scan added names since the search ran; the new layout is drawn with the new matches
+            self.search_matches = self._run_search(matches.fragment)
+            if self.search_marks is matches:
+                self.search_marks = self.search_matches
+                self._drawn_rects = None
+        logger.info(f"Installed layout {snapshot.generation}: {len(snapshot.rects)} rectangles "
+                    f"in {snapshot.layout_ms:.1f} ms")
+
+    def _layout_focus(self, focus_node: DirNode, plot_width: int,
+                      plot_height: int) -> Tuple[List[FileRect], Optional[GridIndex]]:
+        key = (focus_node.path, self.tree.version, plot_width, plot_height)
+        cached = self._layout_cache.get(key)
+        if cached is not None:
+            self._layout_cache.move_to_end(key)
+            return cached
+
+        layout = TreemapLayout(plot_width, plot_height, self.config.padding, self.config.min_rect_size)
+        rects = layout.layout_tree(focus_node)
+        cached = (rects, self._build_index(rects, plot_width, plot_height))
+        self._layout_cache[key] = cached
+        while len(self._layout_cache) > self.layout_cache_size:
+            self._layout_cache.popitem(last=False)
+        return cached
+
+    def _build_index(self, rects: List[FileRect], plot_width: int, plot_height: int) -> Optional[GridIndex]:
+        # The raster renderer's ID buffer already answers hit-tests
+        if self.raster is not None:
+            return None
+        return GridIndex(rects, plot_width, plot_height)
+
+    def zoom_to(self, node: Optional[DirNode]) -> None:
+        if node is None or node is self.focus_node:
+            return
+        if self.hovered_rect is not None:
+            self.hovered_rect.hovered = False
+            self.hovered_rect = None
+        self.focus_node = node
+        self._request_layout()
+        logger.info(f"zoom_to: {node.path}")
+
+    def zoom_out(self) -> None:
+        if self.focus_node is not None:
+            self.zoom_to(self.focus_node.parent)
+
+    def on_click(self, event: Any) -> None:
+        if self.tree is None or getattr(event, 'inaxes', None) != self.ax_main:
+            return
+
+        if event.button == 3:
+            self.zoom_out()
+        elif event.button == 1 and event.xdata is not None and event.ydata is not None:
+            rect = self._rect_at(event.xdata, event.ydata)
+            if rect is None:
+                return
+            path = rect.file_data['path']
+            if self.remote is None:
+                self.zoom_to(self.tree.child_towards(self.focus_node, path))
+                return
+            # Only the daemon knows the tree, so nodes are added as they are zoomed into
+            if not rect.file_data.get('is_directory', False):
+                path = os.path.dirname(path)
+            self.zoom_to(self.tree.child_towards(self.focus_node, path, create=True))
 
     def update_data_realtime(self, new_file_data: List[Dict[str, Any]]) -> None:
+        """Add a batch of newly scanned files; batches accumulate into the current map"""
         try:
             with self.update_lock:
-                self.current_files = new_file_data
-                self.pending_update = True
-
-            if hasattr(self.fig, 'canvas') and self.fig.canvas:
-                self.fig.canvas.draw_idle()
+                if self.detail_store is None:
+                    self.current_files.extend(new_file_data)
+                if self.tree is not None:
+                    self._pending_batches.append(new_file_data)
+            self.perf['scan'].add(count=len(new_file_data))
+            self._request_layout()
         except Exception as e:
             logger.error(f"Error in real-time update: {e}")
 
     def _check_and_perform_update(self) -> bool:
         try:
-            with self.update_lock:
-                if self.pending_update:
-                    self._update_layout()
-                    self.pending_update = False
-                    return True
-            return False
+            snapshot = self.layout_worker.take_result()
+            if snapshot is None:
+                return False
+            self._install_layout(snapshot)
+            return True
         except Exception as e:
             logger.error(f"Error in update check: {e}")
             return False
 
-    def update_info_panel(self) -> None:
-        self.ax_info.clear()
-        self.ax_info.set_facecolor('#282832')
-        self.ax_info.axis('off')
-
+    def _init_info_panel(self) -> None:
+        # Panel artists are created once and updated with set_text; wrap=True is
+        # avoided because it re-measures the text on every draw. Captions sit at
+        # fixed positions so only the values have to be redrawn on hover.
         self.ax_info.set_xlim(0, 1)
         self.ax_info.set_ylim(0, 1)
 
+        def label(y, caption):
+            return self.ax_info.text(0.05, y, caption,
+                                     fontsize=10, fontweight='bold',
+                                     color=self.config.text_color,
+                                     transform=self.ax_info.transAxes,
+                                     verticalalignment='top',
+                                     horizontalalignment='right')
+
+        def value(y):
+            return self.ax_info.text(0.12, y, "",
+                                     fontsize=9, fontweight='normal',
+                                     color=self.config.text_color,
+                                     transform=self.ax_info.transAxes,
+                                     verticalalignment='top',
+                                     horizontalalignment='left')
+
         self.ax_info.text(0.05, 0.95, "File Information",
                           fontsize=14, fontweight='bold',
                           color=self.config.text_color,
-                          transform=self.ax_info.transAxes,
-                          wrap=True)
-
-        with self.update_lock:
-            file_count = len(self.current_files)
-
-        self.ax_info.text(0.05, 0.88, f"Files: {file_count:,}",
-                          fontsize=10, color='#c8c8c8',
-                          transform=self.ax_info.transAxes,
-                          wrap=True)
-
-        if self.hovered_rect:
-            file_data = self.hovered_rect.file_data
-            y_pos = 0.82
-
-            # Name label (bold, right aligned)
-            name_label = "Name:"
-            name_text = file_data['path']
-            wrapped_name_lines = self._wrap_text(name_text, 50)
-
-            # Label x and data x positions
-            label_x = 0.05
-            data_x = 0.12
-
-            # Draw label on first line only
-            if wrapped_name_lines:
-                self.ax_info.text(label_x, y_pos, name_label,
-                                  fontsize=10, fontweight='bold',
-                                  color=self.config.text_color,
-                                  transform=self.ax_info.transAxes,
-                                  wrap=True,
-                                  verticalalignment='top',
-                                  horizontalalignment='right')
-
-                # Print first line of wrapped text next to label, with x offset
-                self.ax_info.text(data_x, y_pos, wrapped_name_lines[0],
-                                  fontsize=9, fontweight='normal',
-                                  color=self.config.text_color,
-                                  transform=self.ax_info.transAxes,
-                                  wrap=True,
-                                  verticalalignment='top',
-                                  horizontalalignment='left')
-
-                y_pos -= 0.06
-
-                # Remaining wrapped lines (if any) below with indent (aligned with data_x)
-                for line in wrapped_name_lines[1:]:
-                    self.ax_info.text(data_x, y_pos, line,
-                                      fontsize=9, fontweight='normal',
-                                      color=self.config.text_color,
-                                      transform=self.ax_info.transAxes,
-                                      wrap=True,
-                                      verticalalignment='top',
-                                      horizontalalignment='left')
-                    y_pos -= 0.06
-            else:
-                # No wrapping needed, print full line with label and data on same line
-                self.ax_info.text(label_x, y_pos, name_label,
-                                  fontsize=10, fontweight='bold',
-                                  color=self.config.text_color,
-                                  transform=self.ax_info.transAxes,
-                                  wrap=True,
-                                  verticalalignment='top',
-                                  horizontalalignment='right')
-                self.ax_info.text(data_x, y_pos, name_text,
-                                  fontsize=9, fontweight='normal',
-                                  color=self.config.text_color,
-                                  transform=self.ax_info.transAxes,
-                                  wrap=True,
-                                  verticalalignment='top',
-                                  horizontalalignment='left')
-                y_pos -= 0.06
-
-            # Size label and value
-            size_human = file_data.get('size_human', self._format_size(file_data.get('size_bytes', 0)))
-            self.ax_info.text(label_x, y_pos, "Size:",
-                              fontsize=10, fontweight='bold',
-                              color=self.config.text_color,
-                              transform=self.ax_info.transAxes,
-                              wrap=True,
-                              verticalalignment='top',
-                              horizontalalignment='right')
-            self.ax_info.text(data_x, y_pos, size_human,
-                              fontsize=9, fontweight='normal',
-                              color=self.config.text_color,
-                              transform=self.ax_info.transAxes,
-                              wrap=True,
-                              verticalalignment='top',
-                              horizontalalignment='left')
+                          transform=self.ax_info.transAxes)
+        self.info_files_text = self.ax_info.text(0.05, 0.88, "",
+                                                 fontsize=10, color='#c8c8c8',
+                                                 transform=self.ax_info.transAxes)
+        self.info_view_text = self.ax_info.text(0.05, 0.85, "",
+                                                fontsize=8, color='#c8c8c8',
+                                                transform=self.ax_info.transAxes)
+
+        y_pos = 0.82
+        self.info_values = []
+        for caption in ("Size:", "Type:", "Depth:"):
+            label(y_pos, caption)
+            self.info_values.append(value(y_pos))
             y_pos -= 0.06
 
-            # Type label and value
-            file_type = file_data.get('file_type', 'unknown')
-            self.ax_info.text(label_x, y_pos, "Type:",
-                              fontsize=10, fontweight='bold',
-                              color=self.config.text_color,
-                              transform=self.ax_info.transAxes,
-                              wrap=True,
-                              verticalalignment='top',
-                              horizontalalignment='right')
-            self.ax_info.text(data_x, y_pos, file_type,
-                              fontsize=9, fontweight='normal',
-                              color=self.config.text_color,
-                              transform=self.ax_info.transAxes,
-                              wrap=True,
-                              verticalalignment='top',
-                              horizontalalignment='left')
-            y_pos -= 0.06
-
-            # Depth label and value
-            depth = file_data.get('depth', 'unknown')
-            self.ax_info.text(label_x, y_pos, "Depth:",
-                              fontsize=10, fontweight='bold',
-                              color=self.config.text_color,
-                              transform=self.ax_info.transAxes,
-                              wrap=True,
-                              verticalalignment='top',
-                              horizontalalignment='right')
-            self.ax_info.text(data_x, y_pos, str(depth),
-                              fontsize=9, fontweight='normal',
-                              color=self.config.text_color,
-                              transform=self.ax_info.transAxes,
-                              wrap=True,
-                              verticalalignment='top',
-                              horizontalalignment='left')
-            y_pos -= 0.08
+        label(y_pos, "Name:")
+        self.info_name_lines = [value(y_pos - i * 0.06) for i in range(self.info_name_max_lines)]
+        y_pos -= 0.06
+
+        instructions = [
+            "Hover over rectangles",
+            "to see file details",
+            "",
+            "Left-click to zoom in",
+            "Right-click to zoom out",
+            "T: scan statistics, D: HUD",
+            "/: search file names",
+            "Real-time scanning...",
+            "Close window to exit"
+        ]
+        self.info_instructions = []
+        for instruction in instructions:
+            self.info_instructions.append(self.ax_info.text(0.05, y_pos, instruction,
+                                                            fontsize=10, color='#b4b4b4',
+                                                            transform=self.ax_info.transAxes))
+            y_pos -= 0.045
+
+        # Scan statistics: one monospaced block, redrawn only when the totals or the view change
+        self.scan_stats = None
+        self.stats_view = 0
+        self._stats_key: Any = None
+        self.info_stats_title = self.ax_info.text(0.05, 0.165, "", fontsize=9, fontweight='bold',
+                                                  color=self.config.text_color,
+                                                  transform=self.ax_info.transAxes)
+        self.info_stats_text = self.ax_info.text(0.05, 0.15, "", fontsize=7, family='monospace',
+                                                 color='#c8c8c8', verticalalignment='top',
+                                                 transform=self.ax_info.transAxes)
+        # The HUD takes the place of the statistics block while it is shown
+        self.hud_text = self.ax_info.text(0.05, 0.15, "", fontsize=7, family='monospace',
+                                          color='#c8c8c8', verticalalignment='top',
+                                          transform=self.ax_info.transAxes, visible=False)
+
+        # Only hover-dependent text is animated and blitted over the cached panel background;
+        # the file count and breadcrumb change with the data and are drawn by full redraws.
+        self._info_dynamic = self.info_values + self.info_name_lines + self.info_instructions + [self.hud_text]
+        for artist in self._info_dynamic:
+            artist.set_animated(self.use_blit)
+
+        self._info_hover_key: Any = object()  # Forces the first update to apply
 
+    def update_info_panel(self) -> None:
+        file_count = len(self.current_files)
+        if self.detail_store is not None and self.tree is not None:
+            # Spilled scans keep no file list; the tree counts every file folded in
+            file_count = self.tree.root.file_count
+
+        matches = self.search_matches
+        if self.search_text is not None:
+            if self.name_index is None:
+                found = "  (no name index with --spill or --attach)"
+            else:
+                found = ""
+                if matches is not None and self._pending_search is None:
+                    found = f"  {len(matches):,} matches ({matches.elapsed_ms:.0f} ms)"
+            self._set_text(self.info_files_text, f"Search: {self.search_text}_{found}")
+        elif matches is not None:
+            self._set_text(self.info_files_text, f"Files: {file_count:,}  '{matches.fragment}': {len(matches):,}")
         else:
-            instructions = [
-                "Hover over rectangles",
-                "to see file details",
-                "",
-                "Real-time scanning...",
-                "Close window to exit"
-            ]
-
-            y_pos = 0.7
-            for instruction in instructions:
-                self.ax_info.text(0.05, y_pos, instruction,
-                                  fontsize=10, color='#b4b4b4',
-                                  transform=self.ax_info.transAxes,
-                                  wrap=True)
-                y_pos -= 0.06
+            self._set_text(self.info_files_text, f"Files: {file_count:,}")
+        self._update_stats_text()
+        if self.focus_node is not None:
+            breadcrumb = " / ".join(node.name for node in self.focus_node.ancestors())
+            self._set_text(self.info_view_text, f"View: {breadcrumb}")
+
+        hovered = self.hovered_rect
+        key = id(hovered.file_data) if hovered is not None else None
+        if key == self._info_hover_key:
+            return
+        self._info_hover_key = key
 
-    def _wrap_text(self, text: str, max_chars: int) -> List[str]:
-        if len(text) <= max_chars:
-            return [text]
-
-        lines = []
-        remaining_text = text
-        while remaining_text:
-            if len(remaining_text) <= max_chars:
-                lines.append(remaining_text)
-                break
+        for text in self.info_instructions:
+            text.set_visible(hovered is None)
+        if hovered is None:
+            for text in self.info_values + self.info_name_lines:
+                text.set_visible(False)
+            return
+
+        file_data = hovered.file_data
+        values = [
+            file_data.get('size_human', format_size(file_data.get('size_bytes', 0))),
+            file_data.get('file_type', 'unknown'),
+            str(file_data.get('depth', 'unknown')),
+        ]
+        for text, value in zip(self.info_values, values):
+            self._set_text(text, value)
+            text.set_visible(True)
+
+        wrapped_name_lines = self._wrap_text(file_data['path'], 50)
+        if len(wrapped_name_lines) > self.info_name_max_lines:
+            wrapped_name_lines = wrapped_name_lines[:self.info_name_max_lines]
+            wrapped_name_lines[-1] = wrapped_name_lines[-1][:-3] + "..."
+        for i, text in enumerate(self.info_name_lines):
+            if i < len(wrapped_name_lines):
+                self._set_text(text, wrapped_name_lines[i])
+                text.set_visible(True)
             else:
-                break_point = max_chars
-                # Find a good break point at space or slash to avoid breaking words/paths
-                for i in range(max_chars - 1, max_chars // 2, -1):
-                    if remaining_text[i] in [' ', '/', '\\']:
-                        break_point = i + 1
-                        break
-
-                # If no good break point found, break at max_chars anyway
-                lines.append(remaining_text[:break_point].rstrip())
-                remaining_text = remaining_text[break_point:].lstrip()
-
-        return lines
-
-    def _format_size(self, size_bytes: int) -> str:
-        if size_bytes < 1024:
-            return f"{size_bytes} B"
-        elif size_bytes < 1024 ** 2:
-            return f"{size_bytes / 1024:.1f} KB"
-        elif size_bytes < 1024 ** 3:
-            return f"{size_bytes / 1024 ** 2:.1f} MB"
-        elif size_bytes < 1024 ** 4:
-            return f"{size_bytes / 1024 ** 3:.1f} GB"
+                text.set_visible(False)
+
+    def set_scan_stats(self, stats: Any) -> None:
+        """Show the scanner's running ScanStats in the info panel"""
+        self.scan_stats = stats
+        self._stats_key = None
+
+    def _update_stats_text(self) -> None:
+        self.hud_text.set_visible(self.show_hud)
+        self.info_stats_text.set_visible(not self.show_hud)
+        if self.show_hud:
+            self._set_text(self.info_stats_title, "Performance")
+            return
+        stats = self.scan_stats
+        if stats is None:
+            return
+        view = self.stats_views[self.stats_view]
+        key = (stats.version, view)
+        if key == self._stats_key:
+            return
+        self._stats_key = key
+        self._set_text(self.info_stats_title, f"Bytes by {view[:-1] if view != 'ages' else 'age'}")
+        self._set_text(self.info_stats_text, "\n".join(stats.report_lines(view)))
+
+    def on_key_press(self, event: Any) -> None:
+        # 's' is taken by matplotlib's save shortcut
+        key = getattr(event, 'key', None)
+        if self.search_text is not None:
+            self._search_key(key)
+        elif key == '/':
+            self.start_search()
+        elif key == 't' and self.scan_stats is not None:
+            self.show_hud = False
+            self._hud_timer.stop()
+            self.stats_view = (self.stats_view + 1) % len(self.stats_views)
+            self._stats_key = None
+            self.redraw()
+        elif key == 'd':
+            self.set_hud(not self.show_hud)
+
+    def start_search(self) -> None:
+        """Type a name fragment: Enter keeps its matches marked, Escape clears them"""
+        # matplotlib's own shortcuts (f, g, k, l, o, p, q, s, ...) would fire while typing
+        self._saved_keymaps = {name: value for name, value in plt.rcParams.items() if name.startswith('keymap.')}
+        for name in self._saved_keymaps:
+            plt.rcParams[name] = []
+        self.search_text = self.search_matches.fragment if self.search_matches is not None else ''
+        self.redraw()
+
+    def end_search(self, keep_matches: bool = True) -> None:
+        for name, value in self._saved_keymaps.items():
+            plt.rcParams[name] = value
+        self._saved_keymaps = {}
+        self.search_text = None
+        if not keep_matches:
+            self.search('')
+        elif self._pending_search is not None:
+            self.search(self._pending_search)
+        self.redraw()
+
+    def _search_key(self, key: Optional[str]) -> None:
+        if key == 'escape':
+            self.end_search(keep_matches=False)
+            return
+        if key == 'enter':
+            self.end_search()
+            return
+        if key == 'backspace':
+            text = self.search_text[:-1]
+        elif key is not None and len(key) == 1:
+            text = self.search_text + key
         else:
-            return f"{size_bytes / 1024 ** 4:.1f} TB"
+            return
+        # Only the text is drawn per key; the search runs once typing pauses for search_debounce_ms
+        self.search_text = text
+        self._pending_search = text
+        self._search_timer.stop()
+        self._search_timer.start()
+        self.redraw()
+
+    def search(self, fragment: str) -> Optional[Any]:
+        """Mark the files whose name contains fragment (ignoring case) instead of marked_paths.
+
+        An empty fragment clears the search, which brings back the marks of
+        set_marked_paths (--query, --duplicates) if there are any. While a
+        scan runs, the search is repeated as newly scanned names are laid out.
+        """
+        self._search_timer.stop()
+        self._pending_search = None
+        self.search_matches = self._run_search(fragment) if fragment and self.name_index is not None else None
+        if self.search_marks is not self.search_matches:
+            self.search_marks = self.search_matches
+            self._drawn_rects = None  # Force the colors to be rebuilt
+            self.redraw()
+        return self.search_matches
+
+    def _run_search(self, fragment: str) -> Any:
+        self._search_indexed = len(self.name_index)
+        matches = self.name_index.search(fragment)
+        logger.info(f"Search '{fragment}': {len(matches):,} of {self._search_indexed:,} files "
+                    f"in {matches.elapsed_ms:.1f} ms")
+        return matches
+
+    def _apply_search(self) -> None:
+        if self._pending_search is not None:
+            self.search(self._pending_search)
+
+    def set_hud(self, visible: bool) -> None:
+        """Show or hide the performance HUD in place of the scan statistics"""
+        self.show_hud = visible
+        self._stats_key = None
+        if visible:
+            self._refresh_hud()
+            self._hud_timer.start()
+        else:
+            self._hud_timer.stop()
+        self.redraw()
+
+    def hud_lines(self) -> List[str]:
+        perf = self.perf
+        with self.update_lock:
+            batches = len(self._pending_batches)
+            queued = sum(len(batch) for batch in self._pending_batches)
+        # The scan's statistics arrive when it has finished
+        scan = f"{'done':>9}" if self.scan_stats is not None else f"{perf['scan'].rate():>9,.0f} entries/s"
+        return [
+            f"scan   {scan}",
+            f"queue  {batches:>9,} batches ({queued:,})",
+            f"layout {perf['layout'].last * 1000:>9.1f} ms",
+            f"render {perf['render'].last * 1000:>9.1f} ms",
+            f"hover  {perf['hover'].mean() * 1000:>9.2f} ms",
+            f"fps    {perf['frames'].rate():>9.1f}",
+        ]
+
+    def _refresh_hud(self) -> None:
+        if not self.show_hud:
+            return
+        self._set_text(self.hud_text, "\n".join(self.hud_lines()))
+        canvas = self.fig.canvas
+        if not self.use_blit or self._info_background is None:
+            canvas.draw_idle()
+            return
+        # Only the panel is repainted, and it is not counted as a frame
+        canvas.restore_region(self._info_background)
+        self._draw_info_dynamic()
+        canvas.blit(self.ax_info.bbox)
+
+    @staticmethod
+    def _set_text(artist: Any, text: str) -> None:
+        if artist.get_text() != text:
+            artist.set_text(text)
+
+    def _wrap_text(self, text: str, max_chars: int) -> List[str]:
+        return list(_wrap_text_cached(text, max_chars))
 
     def on_mouse_move(self, event: Any) -> None:
+        start = time.perf_counter()
+        self._hover_event(event)
+        self.perf['hover'].add(time.perf_counter() - start)
+
+    def _hover_event(self, event: Any) -> None:
         if not hasattr(event, 'inaxes') or not hasattr(event, 'xdata') or not hasattr(event, 'ydata'):
             return
 
@@ -367,15 +829,10 @@ class DiskVisualization:
             if self.hovered_rect:
                 self.hovered_rect.hovered = False
                 self.hovered_rect = None
-                self.redraw()
+                self.update_hover()
             return
 
-        new_hovered = None
-        with self.update_lock:
-            for rect in self.file_rects:
-                if rect.contains_point(event.xdata, event.ydata):
-                    new_hovered = rect
-                    break
+        new_hovered = self._rect_at(event.xdata, event.ydata)
 
         if new_hovered != self.hovered_rect:
             if self.hovered_rect:
@@ -383,31 +840,139 @@ class DiskVisualization:
             self.hovered_rect = new_hovered
             if self.hovered_rect:
                 self.hovered_rect.hovered = True
-            self.redraw()
+            self.update_hover()
+
+    def _on_draw(self, event: Any) -> None:
+        # draw_event fires once the figure has been drawn, ending the frame redraw() asked for
+        if self._draw_started is not None:
+            self.perf['render'].add(time.perf_counter() - self._draw_started)
+            self._draw_started = None
+        self.perf['frames'].add()
+        if not self.use_blit:
+            return
+        self._main_background = self.fig.canvas.copy_from_bbox(self.ax_main.bbox)
+        self._info_background = self.fig.canvas.copy_from_bbox(self.ax_info.bbox)
+        if self.highlight_patch.get_visible():
+            self.ax_main.draw_artist(self.highlight_patch)
+        self._draw_info_dynamic()
+
+    def _draw_info_dynamic(self) -> None:
+        for artist in self._info_dynamic:
+            if artist.get_visible():
+                self.ax_info.draw_artist(artist)
+
+    def _update_highlight(self) -> None:
+        rect = self.hovered_rect
+        if rect is None:
+            self.highlight_patch.set_visible(False)
+        else:
+            self.highlight_patch.set_bounds(rect.x, rect.y, rect.width, rect.height)
+            self.highlight_patch.set_visible(True)
+
+    def update_hover(self) -> None:
+        """Show the hovered rectangle without re-rendering the treemap"""
+        try:
+            self._update_highlight()
+            self.update_info_panel()
+            canvas = self.fig.canvas
+            if not self.use_blit or self._main_background is None or self._info_background is None:
+                canvas.draw_idle()
+                return
+
+            canvas.restore_region(self._main_background)
+            if self.highlight_patch.get_visible():
+                self.ax_main.draw_artist(self.highlight_patch)
+            canvas.blit(self.ax_main.bbox)
+
+            # Only the panel region is redrawn: cached background plus the changing text
+            canvas.restore_region(self._info_background)
+            self._draw_info_dynamic()
+            canvas.blit(self.ax_info.bbox)
+            self.perf['frames'].add()
+        except Exception as e:
+            logger.error(f"Error during hover update: {e}")
 
     def redraw(self) -> None:
         try:
+            if self._draw_started is None:
+                self._draw_started = time.perf_counter()
             self._check_and_perform_update()
-            self.ax_main.clear()
-            self.ax_main.set_facecolor(self.config.background_color)
-            self.ax_main.axis('off')
-
-            # Reset axis limits after clearing:
-            self.ax_main.set_xlim(0, 1000)
-            self.ax_main.set_ylim(0, 800)
-
-            for rect in self.file_rects:
-                patch = rect.create_patch()
-                self.ax_main.add_patch(patch)
-
+            self._update_rect_artists()
+            self._update_highlight()
             self.update_info_panel()
+            # The cached background is stale until the next full draw
+            self._main_background = None
+            self._info_background = None
             self.fig.canvas.draw_idle()
         except Exception as e:
             logger.error(f"Error during redraw: {e}")
 
+    def _update_rect_artists(self) -> None:
+        rects = self.file_rects
+        if self.raster is not None:
+            self._update_raster(rects)
+        elif rects is not self._drawn_rects:
+            verts = np.empty((len(rects), 4, 2))
+            if rects:
+                x, y, w, h = rect_geometry(rects).T
+                verts[:, 0, 0] = x
+                verts[:, 0, 1] = y
+                verts[:, 1, 0] = x + w
+                verts[:, 1, 1] = y
+                verts[:, 2, 0] = x + w
+                verts[:, 2, 1] = y + h
+                verts[:, 3, 0] = x
+                verts[:, 3, 1] = y + h
+            for i, rect in enumerate(rects):
+                rect.index = i
+            self._base_colors = self._rect_colors(rects) / 255.0
+            self.rect_collection.set_verts(verts)
+            self.rect_collection.set_facecolor(self._base_colors)
+            self._drawn_rects = rects
+
+    def _rect_colors(self, rects: List[FileRect]) -> np.ndarray:
+        colors = rect_colors(rects, self.config.color_by)
+        marked = self.search_marks if self.search_marks is not None else self.marked_paths
+        if marked is not None:
+            colors = dim_unmarked(colors, rects, marked)
+        return colors
+
+    def set_marked_paths(self, paths: Optional[Set[str]]) -> None:
+        """Highlight these paths (and directories containing them) by dimming everything else"""
+        self.marked_paths = paths
+        self._drawn_rects = None  # Force the colors to be rebuilt
+        self.redraw()
+
+    def _update_raster(self, rects: List[FileRect]) -> None:
+        # The image matches the layout it shows, not the (possibly newer) window size
+        width, height = (self.layout.width, self.layout.height) if self.layout else (self.plot_width, self.plot_height)
+        size_changed = (self.raster.width, self.raster.height) != (width, height)
+        if rects is self._drawn_rects and not size_changed:
+            return
+        self.raster.resize(width, height)
+        self.raster.render_rects(rects, self._rect_colors(rects))
+        self.raster_image.set_data(self.raster.framebuffer)
+        self.raster_image.set_extent((0, width, 0, height))
+        self._drawn_rects = rects
+
+    def _rect_at(self, x: float, y: float) -> Optional[FileRect]:
+        # Hit-tests read the installed snapshot, so hovering never waits on the layout worker
+        if self.raster is not None:
+            return self.raster.pick(self._drawn_rects or [], x, y)
+        if self.rect_index is not None:
+            return self.rect_index.query(x, y)
+        return None
+
     def show(self) -> None:
+        if self.config.save_path:
+            self.redraw()
+            self.fig.savefig(self.config.save_path, format=self.config.save_format,
+                             facecolor=self.config.background_color)
+            logger.info(f"Saved visualization to {self.config.save_path}")
         if self.config.interactive:
             self.fig.canvas.mpl_connect('motion_notify_event', self.on_mouse_move)
+            self.fig.canvas.mpl_connect('button_press_event', self.on_click)
+            self.fig.canvas.mpl_connect('key_press_event', self.on_key_press)
             plt.show()
 
     def run(self) -> None:
@@ -0,0 +1,207 @@
+import os
+import mmap
+import time
+import hashlib
+import logging
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, List, Dict, Optional, Set, Tuple
+
+from disk_analyzer import FileInfo
+from directory_tree import format_size
+
+logger = logging.getLogger(__name__)
+
+EDGE_BYTES = 4096  # Read from each end of a file in the partial-hash stage
+CHUNK_BYTES = 1024 * 1024  # Slice of the mapping hashed per step in the full-hash stage
+
+
+@dataclass
+class DuplicateGroup:
+    size: int
+    digest: str
+    paths: List[str]
+
+    @property
+    def wasted(self) -> int:
+        return self.size * (len(self.paths) - 1)
+
+
+@dataclass
+class StageStats:
+    name: str
+    candidates: int = 0
+    bytes_read: int = 0
+    seconds: float = 0.0
+    errors: int = 0
+
+    @property
+    def bytes_per_candidate(self) -> float:
+        return self.bytes_read / self.candidates if self.candidates else 0.0
+
+
+@dataclass
+class DuplicateReport:
+    groups: List[DuplicateGroup]
+    stages: List[StageStats]
+    hardlinks: int = 0  # Entries sharing an inode with another entry; never read
+    files: int = 0
+
+    @property
+    def wasted(self) -> int:
+        return sum(g.wasted for g in self.groups)
+
+    def paths(self) -> Set[str]:
+        return {p for g in self.groups for p in g.paths}
+
+    def report_lines(self, limit: int = 20) -> List[str]:
+        lines = [f"{len(self.groups):,} duplicate groups, {format_size(self.wasted)} reclaimable "
+                 f"({self.files:,} files checked, {self.hardlinks:,} hard links skipped)"]
+        for stage in self.stages:
+            lines.append(f"  {stage.name:<8} {stage.candidates:>9,} candidates  {format_size(stage.bytes_read):>10} read "
+                         f"({format_size(int(stage.bytes_per_candidate))}/candidate)  {stage.seconds:6.2f} s"
+                         + (f"  {stage.errors} unreadable" if stage.errors else ""))
+        for group in self.groups[:limit]:
+            lines.append(f"\n{len(group.paths)} x {format_size(group.size)} (wastes {format_size(group.wasted)})")
+            lines.extend(f"  {path}" for path in group.paths)
+        if len(self.groups) > limit:
+            lines.append(f"\n... {len(self.groups) - limit:,} more groups")
+        return lines
+
+
+def _inode_key(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_dev, st.st_ino
+
+
+def _edge_hash(path: str, size: int, edge: int) -> Tuple[Optional[str], int]:
+    """Hash of the first and last `edge` bytes (the whole file when that covers it)"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        if size <= 2 * edge:
+            data = f.read()
+            h.update(data)
+            return (h.hexdigest() if len(data) == size else None), len(data)
+        head = f.read(edge)
+        f.seek(size - edge)
+        tail = f.read(edge)
+    h.update(head)
+    h.update(tail)
+    return h.hexdigest(), len(head) + len(tail)
+
+
+def _full_hash(path: str, size: int, chunk: int) -> Tuple[Optional[str], int]:
+    """Hash the whole file through a read-only mapping, chunk by chunk"""
+    h = hashlib.blake2b(digest_size=32)
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size != size:
+            return None, 0  # Changed since the scan
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            view = memoryview(m)
+            try:
+                for offset in range(0, size, chunk):
+                    h.update(view[offset:offset + chunk])
+            finally:
+                view.release()
+    return h.hexdigest(), size
+
+
+def _run_stage(stage: StageStats, groups: List[List[FileInfo]], hasher,
+               workers: int) -> List[Tuple[str, List[FileInfo]]]:
+    """Hash every candidate in groups and split them into (digest, files) groups that still collide"""
+    start = time.perf_counter()
+    candidates = [f for group in groups for f in group]
+    stage.candidates = len(candidates)
+    if not candidates:
+        return []
+
+    def work(f: FileInfo):
+        try:
+            return hasher(f.path, f.size)
+        except (OSError, ValueError):
+            return None, 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(work, candidates))
+
+    buckets: Dict[Tuple[int, str], List[FileInfo]] = defaultdict(list)
+    for f, (digest, read) in zip(candidates, results):
+        stage.bytes_read += read
+        if digest is None:
+            stage.errors += 1
+            continue
+        buckets[(f.size, digest)].append(f)
+    stage.seconds = time.perf_counter() - start
+    logger.info(f"Duplicate stage {stage.name}: {stage.candidates} candidates, "
+                f"{format_size(stage.bytes_read)} read in {stage.seconds:.2f} s")
+    return [(digest, group) for (_, digest), group in buckets.items() if len(group) > 1]
+
+
+def find_duplicates(files: Iterable[FileInfo], min_size: int = 1, workers: Optional[int] = None,
+                    edge_bytes: int = EDGE_BYTES, chunk_bytes: int = CHUNK_BYTES) -> DuplicateReport:
+    """Find files with identical content, reading as little as possible.
+
+    1. Group by size; a file with a unique size cannot have a duplicate.
+    2. Hash the first and last edge_bytes of every size collision. Files that
+       fit in those two windows are fully hashed here and finish early.
+    3. Fully hash what still collides, via mmap in chunk_bytes slices.
+    Entries sharing a device and inode are one copy of the data and are read
+    once; links always share a size, so only size collisions are checked,
+    and those without a recorded inode (older snapshots) are stat'ed. Hashing runs on a thread pool; hashlib releases the GIL on large
+    buffers and the work is mostly waiting on I/O. A SegmentStore (--spill)
+    is read twice instead of held: once to count the sizes, then keeping
+    only the entries whose size is shared.
+    """
+    workers = workers or min(32, (os.cpu_count() or 1) * 4)
+    shared: Optional[Set[int]] = None
+    if hasattr(files, 'sorted_records'):
+        counts = Counter(f.size for f in files if not f.is_dir and f.size >= min_size)
+        shared = {size for size, n in counts.items() if n > 1}
+        del counts
+    by_size: Dict[int, List[FileInfo]] = defaultdict(list)
+    count = 0
+    for f in files:
+        if f.is_dir or f.size < min_size:
+            continue
+        count += 1
+        if shared is None or f.size in shared:
+            by_size[f.size].append(f)
+
+    size_stage = StageStats('size', candidates=count)
+    start = time.perf_counter()
+    seen_inodes: Set[Tuple[int, int]] = set()
+    hardlinks = 0
+    groups = []
+    for group in by_size.values():
+        if len(group) < 2:
+            continue
+        distinct = []
+        for f in group:
+            key = (f.dev, f.ino) if f.ino else _inode_key(f.path)
+            if key is not None:
+                if key in seen_inodes:
+                    hardlinks += 1
+                    continue
+                seen_inodes.add(key)
+            distinct.append(f)
+        if len(distinct) > 1:
+            groups.append(distinct)
+    size_stage.seconds = time.perf_counter() - start
+
+    edge_stage = StageStats('edges')
+    partial = _run_stage(edge_stage, groups, lambda p, s: _edge_hash(p, s, edge_bytes), workers)
+
+    # Files small enough to be covered by the edge windows are already exact
+    exact = [(digest, group) for digest, group in partial if group[0].size <= 2 * edge_bytes]
+    pending = [group for _, group in partial if group[0].size > 2 * edge_bytes]
+
+    full_stage = StageStats('full')
+    exact += _run_stage(full_stage, pending, lambda p, s: _full_hash(p, s, chunk_bytes), workers)
+
+    result = [DuplicateGroup(group[0].size, digest, sorted(f.path for f in group)) for digest, group in exact]
+    result.sort(key=lambda g: -g.wasted)
+    return DuplicateReport(result, [size_stage, edge_stage, full_stage], hardlinks, count)
@@ -0,0 +1,97 @@
+import os
+import json
+import logging
+from typing import List, Dict, Any, Optional, Set
+
+from visualization_config import VisualizationConfig
+from directory_tree import DirectoryTree, format_size
+from treemap_layout import TreemapLayout
+from color_palette import rect_colors, dim_unmarked
+from scan_stats import ScanStats
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FORMATS = ('png', 'svg', 'pdf')
+CAPTION_HEIGHT = 28  # Pixels reserved above the map for the root path and totals
+
+
+def export_filename(root_path: str, save_format: str) -> str:
+    """File name for a root in batch mode, e.g. /var/log -> var_log.png"""
+    name = os.path.normpath(root_path).strip(os.sep).replace(os.sep, '_') or 'root'
+    return f"{name}.{save_format}"
+
+
+def export_treemap(file_data: List[Dict[str, Any]], root_path: str, output_path: str,
+                   width: int = 1600, height: int = 1000,
+                   config: Optional[VisualizationConfig] = None,
+                   marked_paths: Optional[Set[str]] = None,
+                   stats: Optional[ScanStats] = None,
+                   caption: Optional[str] = None,
+                   roots: Optional[List[str]] = None) -> str:
+    """Render the treemap of one scan to PNG/SVG/PDF without a GUI.
+
+    Uses the Agg canvas directly rather than pyplot, so no interactive
+    backend (and no tkinter) is ever loaded. With marked_paths, everything
+    else is dimmed. With stats, the largest type groups are added to the
+    caption and the full aggregates are written next to the image as
+    <name>.stats.json. caption replaces the default root/size line. With
+    several roots, root_path labels the combined map (see DirectoryTree).
+    """
+    config = config or VisualizationConfig(interactive=False)
+    save_format = (config.save_format or os.path.splitext(output_path)[1].lstrip('.') or 'png').lower()
+    if save_format not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported export format: {save_format}")
+
+    # Imported here so the scanner and layout can be used without matplotlib
+    import numpy as np
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import PolyCollection
+    from matplotlib.colors import to_rgba
+
+    tree = DirectoryTree(root_path, roots)
+    tree.add_files(file_data)
+
+    map_height = max(1, height - CAPTION_HEIGHT)
+    layout = TreemapLayout(width, map_height, config.padding, config.min_rect_size)
+    rects = layout.layout_tree(tree.root)
+
+    dpi = 100
+    fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi, facecolor=config.background_color)
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes((0, 0, 1, map_height / height))
+    ax.set_xlim(0, width)
+    ax.set_ylim(0, map_height)
+    ax.axis('off')
+
+    colors = rect_colors(rects, config.color_by)
+    if marked_paths is not None:
+        colors = dim_unmarked(colors, rects, marked_paths)
+    if config.renderer == 'raster':
+        from raster_renderer import RasterRenderer
+        background = tuple(int(round(c * 255)) for c in to_rgba(config.background_color))
+        renderer = RasterRenderer(width, map_height, background)
+        ax.imshow(renderer.render_rects(rects, colors), origin='lower',
+                  extent=(0, width, 0, map_height), interpolation='nearest', aspect='auto')
+    else:
+        verts = np.array([[(r.x, r.y), (r.x + r.width, r.y), (r.x + r.width, r.y + r.height), (r.x, r.y + r.height)]
+                          for r in rects], dtype=float).reshape(-1, 4, 2)
+        ax.add_collection(PolyCollection(verts, facecolors=colors / 255.0, edgecolors='none', linewidths=0))
+
+    if caption is None:
+        caption = f"{root_path}    {format_size(tree.root.size)} in {tree.root.file_count:,} files"
+    if stats is not None and stats.total_bytes:
+        caption += "    " + ", ".join(f"{group} {size / stats.total_bytes:.0%}"
+                                      for group, size, _ in stats.type_groups()[:3])
+    fig.text(8 / width, 1 - 6 / height, caption,
+             fontsize=11, color=config.text_color, verticalalignment='top')
+
+    fig.savefig(output_path, format=save_format, dpi=dpi, facecolor=config.background_color)
+    logger.info(f"Exported {len(rects)} rectangles for {root_path} to {output_path}")
+
+    if stats is not None:
+        stats_path = os.path.splitext(output_path)[0] + '.stats.json'
+        with open(stats_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(stats.to_dict(), root=str(root_path)), f, indent=2)
+        logger.info(f"Wrote scan statistics to {stats_path}")
+    return output_path
@@ -0,0 +1,421 @@
+import os
+import time
+import heapq
+import itertools
+import signal
+import socket
+import struct
+import logging
+import threading
+import socketserver
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from disk_analyzer import DiskAnalyzer, FileInfo
+from directory_tree import DirectoryTree, DirNode, format_size
+from segment_store import SegmentStore
+from treemap_layout import TreemapLayout
+from visualization_config import FileRect
+
+logger = logging.getLogger(__name__)
+
+# Frames are a header of (op or status, payload length) followed by the payload.
+# Integers are big-endian; strings are a 16-bit byte length plus UTF-8.
+_HEADER = struct.Struct('!BI')
+_STRING = struct.Struct('!H')
+_ENTRY = struct.Struct('!QIBH')  # size, file count, kind, depth; followed by the path
+_RECT = struct.Struct('!ffff')  # x, y, width, height; followed by an entry
+_INFO = struct.Struct('!QQQQdd')  # generation, bytes, files, directories, scanned at, scan seconds
+_COUNT = struct.Struct('!I')
+_GENERATION = struct.Struct('!Q')
+
+OP_INFO, OP_SUBTREE, OP_TOP, OP_LAYOUT = 1, 2, 3, 4
+STATUS_OK, STATUS_ERROR = 0, 1
+KIND_FILE, KIND_DIRECTORY, KIND_AGGREGATE = 0, 1, 2
+
+
+def _pack_string(text: str) -> bytes:
+    data = text.encode('utf-8', 'surrogateescape')
+    return _STRING.pack(len(data)) + data
+
+
+def _unpack_string(payload: bytes, offset: int) -> Tuple[str, int]:
+    (length,) = _STRING.unpack_from(payload, offset)
+    offset += _STRING.size
+    return payload[offset:offset + length].decode('utf-8', 'surrogateescape'), offset + length
+
+
+def _pack_entry(file_data: Dict[str, Any], kind: int) -> bytes:
+    return _ENTRY.pack(file_data['size_bytes'], file_data.get('file_count', 1), kind,
+                       file_data.get('depth', 0)) + _pack_string(file_data['path'])
+
+
+def _unpack_entry(payload: bytes, offset: int) -> Tuple[Dict[str, Any], int]:
+    size, count, kind, depth = _ENTRY.unpack_from(payload, offset)
+    path, offset = _unpack_string(payload, offset + _ENTRY.size)
+    if kind == KIND_FILE:
+        file_type = os.path.splitext(path)[1].lower()
+    elif kind == KIND_DIRECTORY:
+        file_type = 'directory'
+    else:
+        file_type = f'{count:,} smaller items'
+    return {
+        'path': path,
+        'size_bytes': size,
+        'size_human': format_size(size),
+        'file_type': file_type,
+        'depth': depth,
+        'is_directory': kind != KIND_FILE,
+        'file_count': count,
+    }, offset
+
+
+def _entry_kind(file_data: Dict[str, Any], child: Optional[DirNode]) -> int:
+    if child is not None:
+        return KIND_DIRECTORY
+    return KIND_AGGREGATE if file_data.get('is_directory') else KIND_FILE
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Index daemon closed the connection")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+class IndexDaemon:
+    """Keeps the aggregate tree of a scan in memory and answers queries about it.
+
+    scan(add_files) scans and passes the normalized file dicts to add_files
+    in batches; it runs once at start and then every rescan_interval seconds
+    on a background thread. Each rescan builds a new tree that replaces the
+    served one in a single assignment, so queries never see a half-built tree
+    and keep being answered while a rescan runs. Trees are not modified once
+    published, so handlers read them without locking.
+
+    The trees keep only the top_files largest files of each directory (the
+    rest are summed into one entry), so memory follows the number of
+    directories; top() is exact for up to top_files files.
+    """
+
+    def __init__(self, root: str, scan: Callable[[Callable[[List[Dict[str, Any]]], None]], None],
+                 roots: Optional[List[str]] = None, rescan_interval: float = 300.0, layout_cache_size: int = 64,
+                 top_files: Optional[int] = 64):
+        self.root = root
+        self.roots = roots
+        self.scan = scan
+        self.rescan_interval = rescan_interval
+        self.top_files = top_files
+        self.tree: Optional[DirectoryTree] = None
+        self.generation = 0
+        self.scanned_at = 0.0
+        self.scan_seconds = 0.0
+        self.layout_cache_size = layout_cache_size
+        self._layout_cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def refresh(self) -> None:
+        start = time.perf_counter()
+        tree = DirectoryTree(self.root, self.roots, top_files=self.top_files)
+        self.scan(tree.add_files)
+        with self._lock:
+            self.tree = tree
+            self.generation += 1
+            self.scanned_at = time.time()
+            self.scan_seconds = time.perf_counter() - start
+            self._layout_cache.clear()
+        logger.info(f"Index generation {self.generation}: {tree.root.file_count:,} files, "
+                    f"{format_size(tree.root.size)} in {self.scan_seconds:.1f} s")
+
+    def _rescan_loop(self) -> None:
+        while not self._stopped.wait(self.rescan_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Rescan of {self.root} failed: {e}")
+
+    def _node(self, path: str) -> Tuple[DirectoryTree, int, DirNode]:
+        with self._lock:
+            tree, generation = self.tree, self.generation
+        node = tree.find(path) if path else tree.root
+        if node is None:
+            raise ValueError(f"Not an indexed directory: {path}")
+        return tree, generation, node
+
+    def info(self) -> bytes:
+        with self._lock:
+            tree, generation = self.tree, self.generation
+        root = tree.root
+        roots = self.roots or []
+        return (_INFO.pack(generation, root.size, root.file_count, len(tree.nodes), self.scanned_at,
+                           self.scan_seconds) +
+                _pack_string(self.root) + _STRING.pack(len(roots)) + b''.join(_pack_string(r) for r in roots))
+
+    def subtree(self, path: str, depth: int) -> bytes:
+        """Entries under path down to depth levels, each directory's children largest first"""
+        _, generation, node = self._node(path)
+        entries = []
+        stack = [(node, 0)]
+        while stack:
+            current, level = stack.pop()
+            for size, file_data, child in current.sorted_entries():
+                entries.append(_pack_entry(file_data, _entry_kind(file_data, child)))
+                if child is not None and level + 1 < depth:
+                    stack.append((child, level + 1))
+        return _GENERATION.pack(generation) + _COUNT.pack(len(entries)) + b''.join(entries)
+
+    def top(self, path: str, n: int, directories: bool) -> bytes:
+        """The n largest files (or directories) anywhere under path"""
+        _, generation, node = self._node(path)
+        nodes = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            nodes.append(current)
+            stack.extend(current.children.values())
+        if directories:
+            largest = [(d.as_file_data(), KIND_DIRECTORY)
+                       for d in heapq.nlargest(n, nodes[1:], key=lambda d: d.size)]
+        else:
+            files = heapq.nlargest(n, (f for d in nodes for f in d.files), key=lambda f: f['size_bytes'])
+            largest = [(f, KIND_FILE) for f in files]
+        return (_GENERATION.pack(generation) + _COUNT.pack(len(largest)) +
+                b''.join(_pack_entry(f, kind) for f, kind in largest))
+
+    def layout(self, path: str, width: int, height: int, padding: int, min_rect_size: int) -> bytes:
+        """Nested treemap of path; encoded results are cached per view and generation"""
+        _, generation, node = self._node(path)
+        key = (node.path, width, height, padding, min_rect_size, generation)
+        with self._lock:
+            cached = self._layout_cache.get(key)
+            if cached is not None:
+                self._layout_cache.move_to_end(key)
+                return cached
+
+        rects = TreemapLayout(width, height, padding, min_rect_size).layout_tree(node)
+        parts = [_GENERATION.pack(generation), _COUNT.pack(len(rects))]
+        for rect in rects:
+            file_data = rect.file_data
+            kind = KIND_FILE
+            if file_data.get('is_directory'):
+                kind = KIND_DIRECTORY if file_data.get('file_type') == 'directory' else KIND_AGGREGATE
+            parts.append(_RECT.pack(rect.x, rect.y, rect.width, rect.height))
+            parts.append(_pack_entry(file_data, kind))
+        payload = b''.join(parts)
+        with self._lock:
+            self._layout_cache[key] = payload
+            while len(self._layout_cache) > self.layout_cache_size:
+                self._layout_cache.popitem(last=False)
+        return payload
+
+    def handle(self, op: int, payload: bytes) -> bytes:
+        if op == OP_INFO:
+            return self.info()
+        path, offset = _unpack_string(payload, 0)
+        if op == OP_SUBTREE:
+            (depth,) = struct.unpack_from('!H', payload, offset)
+            return self.subtree(path, depth)
+        if op == OP_TOP:
+            n, directories = struct.unpack_from('!I?', payload, offset)
+            return self.top(path, n, directories)
+        if op == OP_LAYOUT:
+            return self.layout(path, *struct.unpack_from('!HHHH', payload, offset))
+        raise ValueError(f"Unknown operation: {op}")
+
+    def serve(self, socket_path: str) -> None:
+        """Scan, then answer queries on socket_path until interrupted, rescanning in the background"""
+        if os.path.exists(socket_path):
+            # A socket left by a daemon that did not shut down cleanly is replaced
+            try:
+                IndexClient(socket_path).close()
+            except OSError:
+                os.unlink(socket_path)
+            else:
+                raise ValueError(f"An index daemon is already listening on {socket_path}")
+
+        self.refresh()
+        server = socketserver.ThreadingUnixStreamServer(socket_path, _make_handler(self))
+        server.daemon_threads = True
+        os.chmod(socket_path, 0o600)  # Paths and sizes are only for the user who started the daemon
+        rescanner = threading.Thread(target=self._rescan_loop, name='index-rescan', daemon=True)
+        rescanner.start()
+        if threading.current_thread() is threading.main_thread():
+            # Stopped by a service manager: shut down cleanly so the socket file is removed
+            signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+        logger.info(f"Serving the index of {self.root} on {socket_path} "
+                    f"(rescanning every {self.rescan_interval:.0f} s, Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stopped.set()
+            server.server_close()
+            os.unlink(socket_path)
+
+
+class IncrementalScan:
+    """An IndexDaemon's scan of one root that lists only the directories changed since the last scan.
+
+    make_analyzer(store, previous) returns a DiskAnalyzer spilling to store
+    and reusing the listings of previous, the analyzer of the last scan,
+    whose store is kept until the next scan has read from it. Directories
+    whose mtime is unchanged are read back from there instead of listed and
+    stat'ed again. A file rewritten in place does not change its directory,
+    so every full_every-th scan, and any scan after one stopped by a limit,
+    lists everything.
+    """
+
+    def __init__(self, root: str, make_analyzer: Callable[[SegmentStore, Optional[DiskAnalyzer]], DiskAnalyzer],
+                 normalize: Callable[[List[FileInfo]], List[Dict[str, Any]]], spill_dir: Optional[str] = None,
+                 full_every: int = 12, chunk: int = 100000):
+        self.root = root
+        self.make_analyzer = make_analyzer
+        self.normalize = normalize
+        self.spill_dir = spill_dir
+        self.full_every = full_every
+        self.chunk = chunk
+        self.previous: Optional[DiskAnalyzer] = None
+        self.scans = 0
+        self.partial_scans = 0
+
+    def __call__(self, add_files: Callable[[List[Dict[str, Any]]], None]) -> None:
+        previous = self.previous if self.full_every > 1 and self.scans % self.full_every else None
+        store = SegmentStore(self.spill_dir)
+        try:
+            analyzer = self.make_analyzer(store, previous)
+            analyzer.scan_directory(self.root)
+            # Folded into the tree a chunk at a time, so the entries are never all in memory
+            entries = iter(store)
+            while True:
+                chunk = list(itertools.islice(entries, self.chunk))
+                if not chunk:
+                    break
+                add_files(self.normalize(chunk))
+        except Exception:
+            store.close()
+            raise
+        self.scans += 1
+        logger.info(f"{'Incremental' if previous is not None else 'Full'} scan of {self.root}: "
+                    f"{analyzer.reused_directories:,} of {len(analyzer.dir_mtimes):,} directories unchanged")
+        self.close()
+        if analyzer.stopped:
+            # Its listings are incomplete, so the next scan lists everything
+            if not self.partial_scans:
+                logger.warning(f"Rescan of {self.root} stopped by the {analyzer.stopped}: the daemon serves a partial "
+                               f"tree and lists every directory again on each rescan until the limit is raised")
+            self.partial_scans += 1
+            store.close()
+        else:
+            self.previous = analyzer
+
+    def close(self) -> None:
+        """Delete the last scan's segment files"""
+        if self.previous is not None:
+            self.previous.files.close()
+            self.previous = None
+
+
+def _make_handler(daemon: IndexDaemon):
+    class IndexRequestHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            # A connection carries any number of requests, answered in order
+            while True:
+                header = self.rfile.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    return
+                op, length = _HEADER.unpack(header)
+                payload = self.rfile.read(length)
+                try:
+                    status, body = STATUS_OK, daemon.handle(op, payload)
+                except (KeyError, ValueError, struct.error) as e:
+                    status, body = STATUS_ERROR, str(e).encode('utf-8')
+                except Exception as e:
+                    logger.error(f"Index query {op} failed: {e}")
+                    status, body = STATUS_ERROR, b'Internal error'
+                self.wfile.write(_HEADER.pack(status, len(body)) + body)
+
+    return IndexRequestHandler
+
+
+class IndexClient:
+    """Connection to an IndexDaemon; safe to share between threads"""
+
+    def __init__(self, socket_path: str, timeout: float = 30.0):
+        self.socket_path = socket_path
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(socket_path)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._sock.close()
+
+    def _request(self, op: int, payload: bytes = b'') -> bytes:
+        with self._lock:
+            self._sock.sendall(_HEADER.pack(op, len(payload)) + payload)
+            status, length = _HEADER.unpack(_recv_exact(self._sock, _HEADER.size))
+            body = _recv_exact(self._sock, length)
+        if status != STATUS_OK:
+            raise ValueError(body.decode('utf-8', 'replace'))
+        return body
+
+    def info(self) -> Dict[str, Any]:
+        body = self._request(OP_INFO)
+        generation, size, files, directories, scanned_at, scan_seconds = _INFO.unpack_from(body, 0)
+        root, offset = _unpack_string(body, _INFO.size)
+        (count,) = _STRING.unpack_from(body, offset)
+        offset += _STRING.size
+        roots = []
+        for _ in range(count):
+            path, offset = _unpack_string(body, offset)
+            roots.append(path)
+        return {
+            'generation': generation,
+            'root': root,
+            'roots': roots or None,
+            'size_bytes': size,
+            'file_count': files,
+            'directories': directories,
+            'scanned_at': scanned_at,
+            'scan_seconds': scan_seconds,
+        }
+
+    @staticmethod
+    def _entries(body: bytes) -> Tuple[int, List[Dict[str, Any]]]:
+        (generation,) = _GENERATION.unpack_from(body, 0)
+        (count,) = _COUNT.unpack_from(body, _GENERATION.size)
+        offset = _GENERATION.size + _COUNT.size
+        entries = []
+        for _ in range(count):
+            entry, offset = _unpack_entry(body, offset)
+            entries.append(entry)
+        return generation, entries
+
+    def subtree(self, path: str = '', depth: int = 1) -> List[Dict[str, Any]]:
+        """Entries under path (the root when empty) down to depth levels"""
+        return self._entries(self._request(OP_SUBTREE, _pack_string(path) + struct.pack('!H', depth)))[1]
+
+    def top(self, path: str = '', n: int = 20, directories: bool = False) -> List[Dict[str, Any]]:
+        """The n largest files, or directories, under path, largest first"""
+        return self._entries(self._request(OP_TOP, _pack_string(path) + struct.pack('!I?', n, directories)))[1]
+
+    def layout(self, path: str, width: int, height: int, padding: int = 0,
+               min_rect_size: int = 2) -> Tuple[int, List[FileRect]]:
+        """(generation, rectangles) of the daemon's treemap of path at the given size"""
+        body = self._request(OP_LAYOUT, _pack_string(path) +
+                             struct.pack('!HHHH', width, height, padding, min_rect_size))
+        (generation,) = _GENERATION.unpack_from(body, 0)
+        (count,) = _COUNT.unpack_from(body, _GENERATION.size)
+        offset = _GENERATION.size + _COUNT.size
+        rects = []
+        for _ in range(count):
+            x, y, width, height = _RECT.unpack_from(body, offset)
+            file_data, offset = _unpack_entry(body, offset + _RECT.size)
+            rects.append(FileRect(file_data, x, y, width, height))
+        return generation, rects
@@ -0,0 +1,154 @@
+import os
+import sys
+import time
+import linecache
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from directory_tree import format_size
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process, or None where the platform does not report it"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class RollingTimer:
+    """Durations and event counts over the last few events.
+
+    Recording is one perf_counter() call and a deque append, so it can sit
+    on hot paths such as mouse motion; averages and rates are only computed
+    when somebody reads them.
+    """
+    __slots__ = ('_events', 'last')
+
+    def __init__(self, window: int = 64):
+        self._events = deque(maxlen=window)  # (timestamp, seconds, count)
+        self.last = 0.0
+
+    def add(self, seconds: float = 0.0, count: int = 1) -> None:
+        self.last = seconds
+        self._events.append((time.perf_counter(), seconds, count))
+
+    def mean(self) -> float:
+        events = list(self._events)
+        return sum(e[1] for e in events) / len(events) if events else 0.0
+
+    def rate(self) -> float:
+        """Counted items per second from the oldest event in the window until now"""
+        events = list(self._events)
+        if len(events) < 2:
+            return 0.0
+        span = time.perf_counter() - events[0][0]
+        return sum(e[2] for e in events[1:]) / span if span > 0 else 0.0
+
+
+class PhaseRecord:
+    __slots__ = ('name', 'seconds', 'retained', 'peak', 'entries', 'sites')
+
+    def __init__(self, name: str, seconds: float, retained: int, peak: int, entries: Optional[int]):
+        self.name = name
+        self.seconds = seconds
+        self.retained = retained  # Traced bytes still allocated when the phase ended
+        self.peak = peak  # Highest traced usage above the phase's starting point
+        self.entries = entries
+        self.sites: Dict[str, int] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            'phase': self.name,
+            'seconds': self.seconds,
+            'retained_bytes': self.retained,
+            'peak_bytes': self.peak,
+            'entries': self.entries,
+            'sites': self.sites,
+        }
+        if self.entries:
+            result['bytes_per_entry'] = self.retained / self.entries
+        return result
+
+
+class PhaseRecorder:
+    """Opt-in per-phase time and memory accounting based on tracemalloc.
+
+    Tracing slows allocation-heavy code down noticeably, so it is only
+    started when a report was asked for. Each phase records the traced
+    bytes it left allocated, its own allocation peak, and the source lines
+    that allocated the most of what it kept, which is where the structures
+    it produced (FileInfo list, inode set, dicts, rects...) were built.
+    """
+
+    def __init__(self, sites: int = 4):
+        self.sites = sites  # Allocation sites reported per phase
+        self.records: List[PhaseRecord] = []
+        self._started_here = False
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_here = True
+
+    def stop(self) -> None:
+        if self._started_here:
+            tracemalloc.stop()
+            self._started_here = False
+
+    @contextmanager
+    def phase(self, name: str, entries: Optional[int] = None) -> Iterator[PhaseRecord]:
+        self.start()
+        baseline = tracemalloc.take_snapshot() if self.sites else None
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        record = PhaseRecord(name, 0.0, 0, 0, entries)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds = time.perf_counter() - start
+            current, peak = tracemalloc.get_traced_memory()
+            record.retained = current - before
+            record.peak = max(0, peak - before)
+            if baseline is not None:
+                record.sites = self._top_sites(baseline)
+            self.records.append(record)
+
+    def _top_sites(self, baseline: tracemalloc.Snapshot) -> Dict[str, int]:
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        diff = tracemalloc.take_snapshot().filter_traces(ignore).compare_to(baseline.filter_traces(ignore), 'lineno')
+        sites = {}
+        for stat in sorted(diff, key=lambda s: -s.size_diff)[:self.sites]:
+            if stat.size_diff <= 0:
+                break
+            frame = stat.traceback[0]
+            source = linecache.getline(frame.filename, frame.lineno).strip()
+            sites[f"{os.path.basename(frame.filename)}:{frame.lineno} {source}"] = stat.size_diff
+        return sites
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'phases': [r.to_dict() for r in self.records],
+            'traced_bytes': tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None,
+            'peak_rss_bytes': peak_rss_bytes(),
+        }
+
+    def report_lines(self) -> List[str]:
+        lines = [f"{'phase':<10} {'time':>9} {'retained':>10} {'peak':>10} {'per entry':>10}"]
+        for r in self.records:
+            per_entry = f"{r.retained / r.entries:,.0f} B" if r.entries else ''
+            lines.append(f"{r.name:<10} {r.seconds * 1000:7.0f}ms {format_size(max(0, r.retained)):>10} "
+                         f"{format_size(r.peak):>10} {per_entry:>10}")
+            for site, size in r.sites.items():
+                per_entry = f"{size / r.entries:,.0f} B" if r.entries else ''
+                lines.append(f"  {format_size(size):>10} {per_entry:>10}  {site[:60]}")
+        rss = peak_rss_bytes()
+        if rss is not None:
+            lines.append(f"Peak RSS: {format_size(rss)}")
+        return lines
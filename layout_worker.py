@@ -0,0 +1,88 @@
+import threading
+import time
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, List, Optional
+
+from visualization_config import FileRect
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class LayoutSnapshot:
+    """One finished layout; never mutated after publication, so the GUI can swap it in by reference"""
+    generation: int
+    focus_path: str
+    width: int
+    height: int
+    data_version: int
+    rects: List[FileRect]
+    index: Any
+    layout_ms: float
+
+
+class LayoutWorker:
+    """Runs layouts on a background thread and hands back the newest result.
+
+    Only the most recent request is kept: requests submitted while a layout is
+    running replace each other, so a burst of updates costs one extra layout.
+    A finished result is dropped if a request for a different view (focus or
+    size) is already waiting, since it would only flash on screen; a result for
+    the same view with older data is still published so continuous scanning
+    cannot starve the display.
+    """
+
+    def __init__(self, compute: Callable[[Any, int], LayoutSnapshot], name: str = 'layout-worker'):
+        self._compute = compute
+        self._cond = threading.Condition()
+        self._pending = None  # (generation, view_key, request)
+        self._generation = 0
+        self._result: Optional[LayoutSnapshot] = None
+        self._stopped = False
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, request: Any, view_key: Hashable) -> int:
+        with self._cond:
+            self._generation += 1
+            self._pending = (self._generation, view_key, request)
+            self._cond.notify()
+            return self._generation
+
+    def take_result(self) -> Optional[LayoutSnapshot]:
+        with self._cond:
+            result = self._result
+            self._result = None
+            return result
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                generation, view_key, request = self._pending
+                self._pending = None
+
+            start = time.perf_counter()
+            try:
+                snapshot = self._compute(request, generation)
+            except Exception as e:
+                logger.error(f"Layout failed: {e}")
+                continue
+            logger.debug(f"Layout {generation} finished in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+            with self._cond:
+                if self._pending is not None and self._pending[1] != view_key:
+                    self.dropped += 1
+                    continue
+                if self._result is None or self._result.generation < snapshot.generation:
+                    self._result = snapshot
@@ -1,35 +1,58 @@
 #!/usr/bin/env python3
 
+import os
 import sys
+import atexit
+import threading
+import time
 import argparse
+import itertools
 import logging
 from pathlib import Path
 from disk_analyzer import DiskAnalyzer, RealTimeDataStreamer
-
-# Handle visualization imports with explicit error messages
-try:
-    from disk_visualizer import DiskVisualization, VisualizationConfig
-
-    HAS_VISUALIZER = True
-except ImportError as e:
-    HAS_VISUALIZER = False
-    missing_module = str(e).split("'")[1] if "'" in str(e) else "unknown"
-
-    print(f"ERROR: Missing required dependency: {missing_module}", file=sys.stderr)
-    print("\nThis program requires the following packages to be installed:", file=sys.stderr)
-    print("  • matplotlib (for plotting and visualization)", file=sys.stderr)
-    print("  • tkinter (usually included with Python, but may need separate install on some systems)", file=sys.stderr)
-    print("\nTo install the required dependencies, run:", file=sys.stderr)
-    print("  pip install matplotlib", file=sys.stderr)
-    print("\nFor tkinter on Ubuntu/Debian systems:", file=sys.stderr)
-    print("  sudo apt-get install python3-tk", file=sys.stderr)
-    print("\nFor tkinter on other systems, it's usually included with Python.", file=sys.stderr)
-    print("\nPlease install the missing dependencies and try again.", file=sys.stderr)
-    sys.exit(1)
+from exporter import export_treemap, export_filename, SUPPORTED_FORMATS
+from visualization_config import VisualizationConfig
+from directory_tree import DirectoryTree, format_size, with_ancestors
+from snapshot import write_snapshot, load_snapshot, read_header, iter_snapshot
+from snapshot_diff import diff_scans
+from duplicate_finder import find_duplicates
+from query_engine import ScanIndex, parse_query, parse_size
+from scan_stats import ScanStats
+from multi_root import distinct_roots, scan_roots
+from scan_checkpoint import Checkpointer, resume
+from instrumentation import PhaseRecorder
+from segment_store import SegmentStore
+from scan_order import directory_sizes, coverage_time, merge_progress
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+memory = None  # PhaseRecorder when --memory is given
+DAEMON_CHUNK = 100000  # Entries normalized at a time when a daemon folds a scan into its tree
+SPILL_TOP_FILES = 64  # Files kept per directory by trees built from a --spill store, as in the window
+
+
+def load_visualizer():
+    """Import the GUI on demand so scanning and export never load pyplot or tkinter"""
+    # Handle visualization imports with explicit error messages
+    try:
+        from disk_visualizer import DiskVisualization
+    except ImportError as e:
+        missing_module = str(e).split("'")[1] if "'" in str(e) else "unknown"
+
+        print(f"ERROR: Missing required dependency: {missing_module}", file=sys.stderr)
+        print("\nThis program requires the following packages to be installed:", file=sys.stderr)
+        print("  • matplotlib (for plotting and visualization)", file=sys.stderr)
+        print("  • tkinter (usually included with Python, but may need separate install on some systems)", file=sys.stderr)
+        print("\nTo install the required dependencies, run:", file=sys.stderr)
+        print("  pip install matplotlib", file=sys.stderr)
+        print("\nFor tkinter on Ubuntu/Debian systems:", file=sys.stderr)
+        print("  sudo apt-get install python3-tk", file=sys.stderr)
+        print("\nFor tkinter on other systems, it's usually included with Python.", file=sys.stderr)
+        print("\nPlease install the missing dependencies and try again.", file=sys.stderr)
+        sys.exit(1)
+    return DiskVisualization
+
 
 def select_directory(cli_path=None):
     if cli_path:
@@ -72,23 +95,471 @@ def normalize_fileinfo_list(files):
     return normalized
 
 
-def format_size(size_bytes: int) -> str:
-    """Format file size human-readable"""
-    if size_bytes < 1024:
-        return f"{size_bytes} B"
-    elif size_bytes < 1024 ** 2:
-        return f"{size_bytes / 1024:.1f} KB"
-    elif size_bytes < 1024 ** 3:
-        return f"{size_bytes / 1024 ** 2:.1f} MB"
-    elif size_bytes < 1024 ** 4:
-        return f"{size_bytes / 1024 ** 3:.1f} GB"
+def make_analyzer(args, data_streamer=None, visited_inodes=None, spill=None, prior_sizes=None, previous=None):
+    if args.max_files is not None:
+        max_files = args.max_files
+    else:
+        # Spilled entries cost disk, not memory, and a daemon keeps only aggregates,
+        # so only an explicit --max-files limits them
+        max_files = sys.maxsize if spill is not None or args.daemon else 100000
+    # A daemon rescans in the background; cutting a rescan short would serve a partial tree every time
+    timeout = args.timeout if args.timeout is not None else float('inf') if args.daemon else 300
+    return DiskAnalyzer(
+        max_depth=args.max_depth,
+        max_files=max_files,
+        timeout_seconds=timeout,
+        follow_symlinks=args.follow_symlinks,
+        data_streamer=data_streamer,
+        visited_inodes=visited_inodes,
+        spill=spill,
+        prior_sizes=prior_sizes,
+        previous=previous
+    )
+
+
+def prior_sizes_for(args, root, roots=None):
+    """Directory sizes from the --prioritize-from snapshot for a size-guided scan, or None.
+
+    Without a usable snapshot (e.g. on the first run) the sizes are empty,
+    which makes the scan breadth-first.
+    """
+    path = args.prioritize_from
+    if not path:
+        return None
+    if not os.path.exists(path):
+        logger.warning(f"No snapshot at {path} yet; scanning breadth-first")
+        return {}
+    header = read_header(path)
+    if roots is not None:
+        # Several roots: the snapshot's paths are used as they are
+        sizes = directory_sizes(iter_snapshot(path), os.sep, os.sep)
+    else:
+        if os.path.normpath(header['root']) != os.path.normpath(root):
+            logger.warning(f"Ordering the scan of {root} by the sizes under {header['root']}")
+        sizes = directory_sizes(iter_snapshot(path), header['root'], root)
+    if not sizes:
+        logger.warning(f"{path} has no sizes for {root}; scanning breadth-first")
+    logger.info(f"Scanning largest directories first, by their sizes in {path} ({len(sizes):,} directories)")
+    return sizes
+
+
+def report_coverage(args, analyzers, seconds, streamed=False):
+    """Report how long the scan took to find 95% of its bytes, i.e. until the map was about 95% right by area.
+
+    Printed with --prioritize-from or --stats, logged otherwise. streamed: the
+    batches went to a window while scanning, which then lagged by the flush interval.
+    """
+    sizes = analyzers[0].prior_sizes
+    order = 'depth-first' if sizes is None else 'size-guided' if sizes else 'breadth-first'
+    progress = merge_progress([a.progress for a in analyzers]) if len(analyzers) > 1 else analyzers[0].progress
+    covered = coverage_time(progress)
+    if covered is None:
+        return
+    lag = f"; the window gets batches every --update-interval {args.update_interval:g} s" if streamed else ""
+    line = (f"Map 95% complete by area after {covered:.2f} s of {seconds:.2f} s ({order} scan"
+            f"{', partial' if any(a.stopped for a in analyzers) else ''}{lag})")
+    if args.prioritize_from or args.stats:
+        print(line)
+    else:
+        logger.info(line)
+
+
+def open_spill(args):
+    """SegmentStore for --spill, deleted when the process exits; None without --spill"""
+    if not args.spill:
+        return None
+    store = SegmentStore(args.spill)
+    atexit.register(store.close)
+    logger.info(f"Spilling scanned entries to {store.directory}")
+    return store
+
+
+def scan_target(args):
+    """(root, roots) to scan: the --resume checkpoint's root, else the positional directories"""
+    if args.resume or args.checkpoint:
+        if len(args.directory) > 1:
+            raise ValueError("--checkpoint and --resume take a single directory")
+    if args.spill and len(args.directory) > 1:
+        raise ValueError("--spill takes a single directory")
+    if args.resume:
+        return read_header(args.resume)['root'], None
+    return resolve_roots(args.directory)
+
+
+def resolve_roots(paths):
+    """(root, roots) for the directories given; several make one map whose root is their joined label"""
+    if len(paths) > 1:
+        roots = distinct_roots(paths)
+        if len(roots) > 1:
+            return " + ".join(roots), roots
+        return roots[0], None
+    return str(select_directory(paths[0] if paths else None)), None
+
+
+def scan_directories(args, root, roots=None, on_update=None, spill=None):
+    """Scan root, or each of roots concurrently; returns (files, stats, hardlinks_skipped).
+
+    With --spill, files is the SegmentStore the entries were written to (spill, or a new one).
+    """
+    prior_sizes = prior_sizes_for(args, root, roots)
+
+    def analyzer_for(visited_inodes=None, spill=None):
+        streamer = None
+        if on_update is not None:
+            streamer = RealTimeDataStreamer(callback_function=on_update, update_interval=args.update_interval)
+        return make_analyzer(args, data_streamer=streamer, visited_inodes=visited_inodes, spill=spill,
+                             prior_sizes=prior_sizes)
+
+    start = time.perf_counter()
+
+    if roots is None:
+        logger.info(f"Analyzing directory: {root}")
+        analyzer = analyzer_for(spill=spill if spill is not None else open_spill(args))
+        analyzer.checkpoint_interval = args.checkpoint_interval
+        if args.resume:
+            checkpointer = resume(analyzer, args.resume)
+            if args.checkpoint:
+                checkpointer.path = args.checkpoint
+            if on_update is not None and analyzer.files:
+                on_update(list(analyzer.files))
+        elif args.checkpoint:
+            analyzer.checkpoint = Checkpointer(args.checkpoint, root)
+        files = scan(analyzer, root)
+        if analyzer.stopped and analyzer.checkpoint is not None:
+            logger.warning(f"Continue with --resume {analyzer.checkpoint.path}")
+        analyzers = [analyzer]
+        stats = analyzer.stats
+    else:
+        logger.info(f"Analyzing {len(roots)} directories concurrently: {root}")
+        if memory is None:
+            multi = scan_roots(roots, analyzer_for)
+        else:
+            with memory.phase('scan') as phase:
+                multi = scan_roots(roots, analyzer_for)
+            phase.entries = sum(s.entries for s in multi.scans)
+        # Per-root throughput, slowest first, to spot a slow mount
+        print("\n".join(multi.report_lines()))
+        files = multi.files
+        analyzers = [s.analyzer for s in multi.scans]
+        stats = multi.stats
+    for analyzer in analyzers:
+        if analyzer.data_streamer is not None:
+            analyzer.data_streamer.flush()
+    report_coverage(args, analyzers, time.perf_counter() - start, streamed=on_update is not None)
+    return files, stats, sum(a.hardlinks_skipped for a in analyzers)
+
+
+def save_snapshot(args, root, files, stats, roots=None):
+    if not args.save_snapshot:
+        return
+    extra = {'stats': stats.to_dict()}
+    if roots is not None:
+        extra['roots'] = roots
+    write_snapshot(args.save_snapshot, root, files, extra=extra)
+
+
+def scan(analyzer, root):
+    """Scan root, accounting the scan phase when --memory is on"""
+    if memory is None:
+        return analyzer.scan_directory(root)
+    with memory.phase('scan') as phase:
+        files = analyzer.scan_directory(root)
+    phase.entries = len(files)
+    return files
+
+
+def load(path, stats):
+    """load_snapshot, accounted as the load phase when --memory is on"""
+    if memory is None:
+        return load_snapshot(path, stats=stats)
+    with memory.phase('load') as phase:
+        header, files = load_snapshot(path, stats=stats)
+    phase.entries = len(files)
+    return header, files
+
+
+def measure_pipeline(recorder, files, root, width, height, roots=None):
+    """Run normalize, aggregate, layout and render once under the recorder.
+
+    The GUI interleaves these phases with scanning, so they are repeated
+    here in sequence on the finished scan to attribute memory to each. A
+    --spill store is folded in chunks into a tree keeping the largest files
+    of each directory, as the window does, so normalizing is accounted
+    within the aggregate phase and the entries are never all in memory.
+    """
+    from treemap_layout import TreemapLayout
+    from raster_renderer import RasterRenderer, rect_geometry
+    from color_palette import rects_rgba
+
+    if isinstance(files, SegmentStore):
+        normalized = None
+        with recorder.phase('aggregate', len(files)):
+            tree = DirectoryTree(root, roots, top_files=SPILL_TOP_FILES)
+            entries = iter(files)
+            while True:
+                chunk = list(itertools.islice(entries, DAEMON_CHUNK))
+                if not chunk:
+                    break
+                tree.add_files(normalize_fileinfo_list(chunk))
+            del chunk
+    else:
+        with recorder.phase('normalize', len(files)):
+            normalized = normalize_fileinfo_list(files)
+        with recorder.phase('aggregate', len(normalized)):
+            tree = DirectoryTree(root, roots)
+            tree.add_files(normalized)
+    with recorder.phase('layout', tree.root.file_count):
+        rects = TreemapLayout(width, height, 0, 2).layout_tree(tree.root)
+    with recorder.phase('render', len(rects)):
+        renderer = RasterRenderer(width, height)
+        renderer.render(rect_geometry(rects), rects_rgba(rects))
+    # Kept alive until here so each phase's retained bytes are what it built
+    del renderer, rects, tree, normalized
+    return recorder
+
+
+def load_or_scan(args):
+    """Return (root, files, stats, roots) from --load-snapshot or a fresh scan, saving --save-snapshot if asked"""
+    if args.load_snapshot:
+        stats = ScanStats()
+        header, files = load(args.load_snapshot, stats)
+        return header['root'], files, stats, header.get('roots')
+
+    root, roots = scan_target(args)
+    files, stats, _ = scan_directories(args, root, roots)
+    save_snapshot(args, root, files, stats, roots)
+    return root, files, stats, roots
+
+
+def print_stats(stats, files, root, args, roots=None):
+    """Print the scan aggregates for --stats, and the memory report for --memory"""
+    print(f"{stats.file_count:,} files, {stats.dir_count:,} directories, {format_size(stats.total_bytes)}")
+    for view in ('types', 'extensions', 'sizes', 'ages'):
+        print(f"\nBy {view[:-1] if view != 'ages' else 'age'}:")
+        for line in stats.report_lines(view, rows=12, width=30):
+            print(f"  {line}")
+    if memory is not None:
+        measure_pipeline(memory, files, str(root), args.width, args.height, roots)
+        print("\nMemory:")
+        for line in memory.report_lines():
+            print(f"  {line}")
+
+
+def run_query(args, files, now=None):
+    """Run --query over a scan, print the largest matches and return the result"""
+    query = parse_query(args.query)
+    index = ScanIndex(files, now=now)
+    result = index.query(query)
+    print(f"{result.total_count:,} matches, {format_size(result.total_size)} "
+          f"({result.elapsed_ms:.1f} ms over {len(index):,} entries)")
+    for i, path in zip(result.indices[:args.query_limit], result.paths):
+        row = index.row(i, path)
+        print(f"{format_size(row['size_bytes']):>10}  {row['age_days']:6.0f}d  {row['path']}")
+    if result.total_count > args.query_limit:
+        print(f"... {result.total_count - args.query_limit:,} more")
+    return result
+
+
+def run_diff(args):
+    """Compare the --diff snapshot with --load-snapshot or a fresh scan and show what grew"""
+    old_header = read_header(args.diff)
+    if args.load_snapshot:
+        root = read_header(args.load_snapshot)['root']
+        new_entries = iter_snapshot(args.load_snapshot)
     else:
-        return f"{size_bytes / 1024 ** 4:.1f} TB"
+        if len(args.directory) > 1:
+            raise ValueError("--diff compares a single directory")
+        root = str(select_directory(args.directory[0] if args.directory else None))
+        logger.info(f"Analyzing directory: {root}")
+        analyzer = make_analyzer(args)
+        analyzer.scan_directory(root)
+        save_snapshot(args, root, analyzer.files, analyzer.stats)
+        new_entries = sorted(analyzer.files, key=lambda f: f.path)
+    if old_header['root'] != root:
+        logger.warning(f"Comparing different roots: {old_header['root']} and {root}")
+
+    # Both sides are streamed in path order; neither snapshot is loaded whole
+    report = diff_scans(iter_snapshot(args.diff), new_entries, top_n=args.query_limit, root=root)
+    print("\n".join(report.report_lines()))
+
+    file_data = report.treemap_entries()
+    if not file_data:
+        print("Nothing grew.")
+        return
+    caption = (f"{root}    growth since {time.strftime('%Y-%m-%d %H:%M', time.localtime(old_header['created']))}: "
+               f"+{format_size(report.bytes['added'] + report.bytes['grown'])}")
+    if args.save_path:
+        config = VisualizationConfig(interactive=False, save_path=args.save_path, renderer=args.renderer,
+                                     color_by='growth',
+                                     save_format=args.save_format or os.path.splitext(args.save_path)[1].lstrip('.').lower() or 'png')
+        export_treemap(file_data, root, args.save_path, width=args.width, height=args.height,
+                       config=config, caption=caption)
+    elif not args.no_visualization:
+        config = VisualizationConfig(figure_width=args.width / 100, figure_height=args.height / 100,
+                                     interactive=not args.non_interactive, renderer=args.renderer,
+                                     color_by='growth')
+        DiskVisualization = load_visualizer()
+        DiskVisualization(config).create_visualization(file_data, root)
+
+
+def run_duplicates(args, files, hardlinks_skipped=0):
+    """Run --duplicates over a scan, print the groups and return the report"""
+    report = find_duplicates(files, min_size=parse_size(args.min_duplicate_size))
+    # Hard links the scanner already collapsed are shared storage, not duplicates
+    report.hardlinks += hardlinks_skipped
+    print("\n".join(report.report_lines(args.query_limit)))
+    return report
+
+
+def marked_paths_for(args, files, now=None, hardlinks_skipped=0):
+    """Paths to highlight from --query and/or --duplicates, or None when neither is given"""
+    if not args.query and not args.duplicates:
+        return None
+    marked = set()
+    if args.query:
+        marked |= run_query(args, files, now=now).highlight_paths()
+    if args.duplicates:
+        marked |= with_ancestors(run_duplicates(args, files, hardlinks_skipped).paths())
+    return marked
+
+
+def run_server(args):
+    from tile_server import serve
+
+    root, files, stats, roots = load_or_scan(args)
+    if args.stats:
+        print_stats(stats, files, root, args, roots)
+    tree = DirectoryTree(root, roots)
+    tree.add_files(normalize_fileinfo_list(files))
+    serve(tree, host=args.host, port=args.port, max_zoom=args.max_zoom,
+          config=VisualizationConfig(interactive=False))
+
+
+def run_daemon(args):
+    """Scan once and answer queries about the result on the --daemon socket, rescanning periodically"""
+    from index_daemon import IndexDaemon, IncrementalScan
+
+    if args.resume or args.checkpoint:
+        raise ValueError("--daemon rescans by itself and does not take --checkpoint or --resume")
+    root, roots = scan_target(args)
+
+    if roots is None:
+        # Entries go to segment files (under --spill, else the temp directory), from which
+        # the next rescan reads back the directories that have not changed
+        scan = IncrementalScan(root, lambda store, previous: make_analyzer(args, spill=store, previous=previous),
+                               normalize_fileinfo_list, spill_dir=args.spill, full_every=args.full_rescan_every,
+                               chunk=DAEMON_CHUNK)
+        atexit.register(scan.close)
+    else:
+        def scan(add_files):
+            files, _, _ = scan_directories(args, root, roots)
+            for start in range(0, len(files), DAEMON_CHUNK):
+                add_files(normalize_fileinfo_list(files[start:start + DAEMON_CHUNK]))
+
+    IndexDaemon(root, scan, roots, rescan_interval=args.rescan_interval).serve(args.daemon)
+
+
+def run_attach(args):
+    """Show the tree a running daemon keeps, in the window or (with --no-visualization) as text"""
+    from index_daemon import IndexClient
+
+    client = IndexClient(args.attach)
+    if args.no_visualization:
+        info = client.info()
+        print(f"{info['root']}: {info['file_count']:,} files, {format_size(info['size_bytes'])} "
+              f"(generation {info['generation']}, scanned "
+              f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(info['scanned_at']))} "
+              f"in {info['scan_seconds']:.1f} s)")
+        for title, directories in (("Largest directories", True), ("Largest files", False)):
+            print(f"\n{title}:")
+            for entry in client.top(n=args.query_limit, directories=directories):
+                print(f"{entry['size_human']:>10}  {entry['path']}")
+        return
+
+    config = VisualizationConfig(
+        figure_width=args.width / 100,
+        figure_height=args.height / 100,
+        interactive=not args.non_interactive,
+        renderer=args.renderer,
+        show_hud=args.hud
+    )
+    DiskVisualization = load_visualizer()
+    viz = DiskVisualization(config)
+    if not viz.attach(client):
+        raise ValueError(f"Could not attach to {args.attach}")
+    viz.show()
+
+
+def run_export(args):
+    """Scan each root and write its treemap image without opening a window"""
+    save_format = args.save_format or os.path.splitext(args.save_path)[1].lstrip('.').lower() or 'png'
+    if save_format not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported export format: {save_format}")
+    config = VisualizationConfig(interactive=False, save_path=args.save_path, save_format=save_format,
+                                 renderer=args.renderer)
+
+    if args.load_snapshot:
+        stats = ScanStats()
+        header, files = load(args.load_snapshot, stats)
+        roots = header.get('roots')
+        if args.stats:
+            print_stats(stats, files, header['root'], args, roots)
+        marked = marked_paths_for(args, files, now=header.get('created'))
+        export_treemap(normalize_fileinfo_list(files), header['root'], args.save_path,
+                       width=args.width, height=args.height, config=config, marked_paths=marked, stats=stats,
+                       roots=roots)
+        logger.info(f"Wrote {args.save_path}")
+        return
+
+    # The positional directories make one (possibly combined) map; each --export-root gets its own
+    targets = [scan_target(args)] if args.directory or args.resume else []
+    targets.extend((str(select_directory(root)), None) for root in args.export_root or [])
+    if not targets:
+        raise ValueError("No directory given for export")
+
+    # One map written to a file path; several maps (or a directory path) get one file each
+    batch = len(targets) > 1 or os.path.isdir(args.save_path)
+    if batch:
+        os.makedirs(args.save_path, exist_ok=True)
+
+    for root, roots in targets:
+        files, stats, hardlinks_skipped = scan_directories(args, root, roots)
+        if args.stats:
+            print_stats(stats, files, root, args, roots)
+        output_path = os.path.join(args.save_path, export_filename(root, save_format)) if batch else args.save_path
+        marked = marked_paths_for(args, files, hardlinks_skipped=hardlinks_skipped)
+        export_treemap(normalize_fileinfo_list(files), root, output_path,
+                       width=args.width, height=args.height, config=config, marked_paths=marked,
+                       stats=stats, roots=roots)
+        logger.info(f"Wrote {output_path}")
 
 
 def run_analysis(args):
-    directory = select_directory(args.directory)
-    logger.info(f"Analyzing directory: {directory}")
+    if args.diff:
+        run_diff(args)
+        return
+    if args.save_path:
+        run_export(args)
+        return
+    if args.serve:
+        run_server(args)
+        return
+    if args.daemon:
+        run_daemon(args)
+        return
+    if args.attach:
+        run_attach(args)
+        return
+
+    now = None
+    if args.load_snapshot:
+        stats = ScanStats()
+        header, files = load(args.load_snapshot, stats)
+        directory, roots = header['root'], header.get('roots')
+        # Ages in a query are relative to when the snapshot was taken
+        now = header.get('created')
+    else:
+        directory, roots = scan_target(args)
 
     def on_update(fileinfo_list):
         logger.info(f"on_update called with {len(fileinfo_list)} files")
@@ -97,28 +568,54 @@ def run_analysis(args):
             logger.info(f"Updating visualizer with {len(normalized_data)} entries")
             viz.update_data_realtime(normalized_data)
 
-    streamer = RealTimeDataStreamer(callback_function=on_update, update_interval=args.update_interval)
-
-    analyzer = DiskAnalyzer(
-        max_depth=args.max_depth,
-        max_files=args.max_files,
-        timeout_seconds=args.timeout,
-        follow_symlinks=args.follow_symlinks,
-        data_streamer=streamer
-    )
-
     if not args.no_visualization:
         config = VisualizationConfig(
             figure_width=args.width / 100,
             figure_height=args.height / 100,
-            interactive=not args.non_interactive
+            interactive=not args.non_interactive,
+            renderer=args.renderer,
+            show_hud=args.hud
         )
+        DiskVisualization = load_visualizer()
         global viz
         viz = DiskVisualization(config)
-        viz.load_initial_data(str(directory))
+    spill = open_spill(args) if not args.load_snapshot else None
+    if not args.no_visualization:
+        viz.load_initial_data(directory, roots, detail_store=spill)
 
-    analyzer.scan_directory(str(directory))
-    streamer.flush()
+    # An interactive window opens first and the scan fills it in from a background thread;
+    # window updates from that thread go through viz.call_soon so they run on the GUI thread
+    live = not args.no_visualization and not args.non_interactive and not args.load_snapshot
+    gui = viz.call_soon if live else lambda callback: callback()
+
+    def finish(files, stats, hardlinks_skipped=0):
+        if not args.no_visualization:
+            gui(lambda: viz.set_scan_stats(stats))
+        if args.stats:
+            print_stats(stats, files, directory, args, roots)
+        marked = marked_paths_for(args, files, now=now, hardlinks_skipped=hardlinks_skipped)
+        if marked is not None and not args.no_visualization:
+            gui(lambda: viz.set_marked_paths(marked))
+
+    def scan_and_finish():
+        try:
+            files, stats, hardlinks_skipped = scan_directories(
+                args, directory, roots, on_update=on_update if not args.no_visualization else None, spill=spill)
+            save_snapshot(args, directory, files, stats, roots)
+            finish(files, stats, hardlinks_skipped)
+        except Exception as e:
+            if not live:
+                raise
+            logger.error(f"Scan failed: {e}")
+
+    if args.load_snapshot:
+        on_update(files)
+        finish(files, stats)
+    elif live:
+        # A daemon thread, so closing the window ends the program even mid-scan
+        threading.Thread(target=scan_and_finish, name='scan', daemon=True).start()
+    else:
+        scan_and_finish()
 
     if not args.no_visualization:
         logger.info("Calling viz.show() to launch visualizer")
@@ -127,21 +624,82 @@ def run_analysis(args):
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Disk Usage Visualizer")
-    parser.add_argument('directory', nargs='?', help='Directory to scan')
+    parser.add_argument('directory', nargs='*',
+                        help='Directory to scan; several are scanned concurrently into one combined map')
     parser.add_argument('--max-depth', type=int, default=8)
-    parser.add_argument('--max-files', type=int, default=100000)
-    parser.add_argument('--timeout', type=int, default=300)
+    parser.add_argument('--max-files', type=int,
+                        help='Stop the scan after this many entries (default: 100000, unlimited with --spill or --daemon)')
+    parser.add_argument('--timeout', type=int,
+                        help='Seconds before the scan is stopped (default: 300, unlimited with --daemon)')
     parser.add_argument('--follow-symlinks', action='store_true')
     parser.add_argument('--width', type=int, default=1200)
     parser.add_argument('--height', type=int, default=800)
     parser.add_argument('--no-visualization', action='store_true')
     parser.add_argument('--non-interactive', action='store_true')
     parser.add_argument('--update-interval', type=float, default=0.5)
-    return parser.parse_args()
+    parser.add_argument('--renderer', choices=['collection', 'raster'], default='collection')
+    parser.add_argument('--save-path', help='Export the treemap headlessly to this file (or directory for several roots)')
+    parser.add_argument('--save-format', choices=SUPPORTED_FORMATS, help='Export format (default: from --save-path, else png)')
+    parser.add_argument('--export-root', action='append', metavar='DIR',
+                        help='Additional root to export in the same run (repeatable)')
+    parser.add_argument('--save-snapshot', metavar='PATH', help='Save the scan result to a snapshot file (.gz to compress)')
+    parser.add_argument('--load-snapshot', metavar='PATH', help='Use a saved snapshot instead of scanning')
+    parser.add_argument('--serve', action='store_true', help='Serve the treemap as zoomable tiles over HTTP')
+    parser.add_argument('--host', default='127.0.0.1', help='Address for --serve (default: localhost only)')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-zoom', type=int, default=8, help='Deepest tile zoom level for --serve')
+    parser.add_argument('--query', metavar='EXPR',
+                        help='Filter the scan, e.g. "size>1GB age>90d ext=.log depth<=4"; matches are highlighted')
+    parser.add_argument('--stats', action='store_true',
+                        help='Print bytes per type group and extension plus size and age histograms')
+    parser.add_argument('--query-limit', type=int, default=50,
+                        help='Number of --query matches (and --diff top entries) to print')
+    parser.add_argument('--duplicates', action='store_true',
+                        help='Find files with identical content and highlight them')
+    parser.add_argument('--min-duplicate-size', default='1B', metavar='SIZE',
+                        help='Ignore smaller files in --duplicates, e.g. 64KB (default: 1B)')
+    parser.add_argument('--diff', metavar='OLD_SNAPSHOT',
+                        help='Show what changed since this snapshot, against --load-snapshot or a fresh scan')
+    parser.add_argument('--hud', action='store_true',
+                        help='Start the window with the performance HUD shown (D toggles it)')
+    parser.add_argument('--checkpoint', metavar='PATH',
+                        help='Write the scan progress here periodically and when a limit stops it')
+    parser.add_argument('--checkpoint-interval', type=float, default=60.0, metavar='SECONDS',
+                        help='Seconds between checkpoints (default: 60)')
+    parser.add_argument('--resume', metavar='CHECKPOINT',
+                        help='Continue the scan saved in this checkpoint (and keep checkpointing to it)')
+    parser.add_argument('--prioritize-from', metavar='SNAPSHOT',
+                        help='Scan the directories that were largest in this earlier snapshot first '
+                             '(breadth-first while it does not exist yet)')
+    parser.add_argument('--spill', metavar='DIR',
+                        help='Keep scanned entries in segment files under DIR instead of RAM (bounded-memory mode)')
+    parser.add_argument('--daemon', metavar='SOCKET',
+                        help='Keep the scan in memory and answer queries on this Unix socket, rescanning periodically')
+    parser.add_argument('--rescan-interval', type=float, default=300.0, metavar='SECONDS',
+                        help='Seconds between rescans in --daemon mode (default: 300)')
+    parser.add_argument('--full-rescan-every', type=int, default=12, metavar='N',
+                        help='In --daemon mode, list every directory again on every Nth rescan; the others only '
+                             'relist directories whose mtime changed (default: 12, 1 for full rescans only)')
+    parser.add_argument('--attach', metavar='SOCKET',
+                        help='Browse the scan a --daemon keeps instead of scanning (with --no-visualization: print a summary)')
+    parser.add_argument('--memory', action='store_true',
+                        help='Add per-phase memory accounting and peak RSS to the --stats output (implies --stats)')
+    args = parser.parse_args()
+    if args.memory:
+        args.stats = True
+    if args.spill and (args.checkpoint or args.resume):
+        # A checkpoint is a snapshot of every entry, rewritten each interval
+        parser.error("--checkpoint and --resume cannot be combined with --spill")
+    return args
 
 
 def main():
+    global memory
     args = parse_args()
+    if args.memory:
+        # Tracing from the start so the scan phase sees every allocation
+        memory = PhaseRecorder()
+        memory.start()
     try:
         run_analysis(args)
     except Exception as e:
@@ -0,0 +1,120 @@
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from disk_analyzer import DiskAnalyzer, FileInfo, InodeSet
+from directory_tree import format_size
+from scan_stats import ScanStats
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RootScan:
+    root: str
+    analyzer: DiskAnalyzer
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def entries(self) -> int:
+        return len(self.analyzer.files)
+
+    @property
+    def entries_per_s(self) -> float:
+        return self.entries / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def limit(self) -> Optional[str]:
+        """Which of the root's own limits cut its scan short, if any"""
+        return self.analyzer.stopped
+
+
+@dataclass
+class MultiRootScan:
+    scans: List[RootScan]
+    seconds: float = 0.0
+    stats: ScanStats = field(default_factory=ScanStats)
+
+    @property
+    def roots(self) -> List[str]:
+        return [s.root for s in self.scans]
+
+    @property
+    def label(self) -> str:
+        """Name of the synthetic top node"""
+        return " + ".join(self.roots)
+
+    @property
+    def files(self) -> List[FileInfo]:
+        return [f for s in self.scans for f in s.analyzer.files]
+
+    @property
+    def hardlinks_skipped(self) -> int:
+        return sum(s.analyzer.hardlinks_skipped for s in self.scans)
+
+    def report_lines(self) -> List[str]:
+        lines = [f"{'root':<30} {'entries':>10} {'size':>10} {'time':>8} {'entries/s':>11}"]
+        for s in sorted(self.scans, key=lambda s: s.entries_per_s):
+            note = s.error or s.limit or ''
+            lines.append(f"{s.root:<30} {s.entries:>10,} {format_size(s.analyzer.stats.total_bytes):>10} "
+                         f"{s.seconds:7.2f}s {s.entries_per_s:>11,.0f}  {note}".rstrip())
+        total = sum(s.entries for s in self.scans)
+        lines.append(f"{'total':<30} {total:>10,} {format_size(self.stats.total_bytes):>10} "
+                     f"{self.seconds:7.2f}s {total / self.seconds if self.seconds > 0 else 0:>11,.0f}")
+        return lines
+
+
+def distinct_roots(paths: List[str]) -> List[str]:
+    """Resolved roots without duplicates or roots nested in another root, in the given order"""
+    resolved = []
+    for path in paths:
+        root = os.path.realpath(path)
+        if not os.path.isdir(root):
+            raise ValueError(f"Invalid directory: {path}")
+        if root not in resolved:
+            resolved.append(root)
+    roots = []
+    for root in resolved:
+        outer = next((other for other in resolved
+                      if other != root and os.path.commonpath([root, other]) == other), None)
+        if outer is not None:
+            logger.warning(f"{root} is inside {outer}; scanning it once as part of {outer}")
+        else:
+            roots.append(root)
+    return roots
+
+
+def scan_roots(roots: List[str], make_analyzer: Callable[[InodeSet], DiskAnalyzer],
+               workers: Optional[int] = None) -> MultiRootScan:
+    """Scan each root on its own thread with its own analyzer and limits.
+
+    make_analyzer is called once per root with the InodeSet all analyzers
+    share, so a file reachable from two roots (through a bind mount or a
+    hard link) is counted once. Scanning is mostly waiting on stat calls,
+    which release the GIL, so roots on different devices overlap well.
+    """
+    inodes = InodeSet()
+    scans = [RootScan(root, make_analyzer(inodes)) for root in roots]
+
+    def run(scan: RootScan) -> RootScan:
+        start = time.perf_counter()
+        try:
+            scan.analyzer.scan_directory(scan.root)
+        except (OSError, ValueError) as e:
+            scan.error = str(e)
+            logger.error(f"Scan of {scan.root} failed: {e}")
+        scan.seconds = time.perf_counter() - start
+        logger.info(f"Scanned {scan.root}: {scan.entries} entries in {scan.seconds:.2f} s")
+        return scan
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers or len(scans) or 1) as pool:
+        list(pool.map(run, scans))
+    result = MultiRootScan(scans, time.perf_counter() - start)
+    for scan in scans:
+        result.stats.merge(scan.analyzer.stats)
+    return result
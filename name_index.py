@@ -0,0 +1,233 @@
+import time
+import threading
+from array import array
+from itertools import islice
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from directory_tree import with_ancestors
+
+# Names are indexed between these, so names shorter than a trigram are indexed too
+# and fragments at either end of a name are found through the same postings
+_START, _END = '\x02', '\x03'
+
+
+@dataclass
+class NameMatches:
+    fragment: str
+    entries: np.ndarray  # Matching entry ids, ascending
+    name_ids: np.ndarray  # Distinct matching (lowercase) names
+    elapsed_ms: float
+    index: Any = field(repr=False, default=None)
+    _name_flags: Optional[np.ndarray] = field(repr=False, default=None)
+    _dir_flags: Optional[np.ndarray] = field(repr=False, default=None)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def paths(self) -> List[str]:
+        paths = self.index.paths
+        return [paths[e] for e in self.entries.tolist()]
+
+    def directories(self) -> List[str]:
+        """Distinct parent directories of the matches"""
+        return self.index.directories_of(self.entries)
+
+    def highlight_paths(self) -> Set[str]:
+        """Matching paths plus every directory above them, for marking aggregated rectangles"""
+        marked = with_ancestors(self.directories())
+        marked.update(self.paths())
+        return marked
+
+    def __contains__(self, path: str) -> bool:
+        """Whether path is a match or a directory above one, without building highlight_paths.
+
+        Can be passed to set_marked_paths directly: only the rectangles drawn
+        are tested, against flags per interned name and directory, so the
+        cost does not depend on the number of matches. A path the index knows
+        as a directory is only tested as one, so a directory named like a
+        matching file is not marked.
+        """
+        dir_id = self.index.directory_id(path)
+        if dir_id is not None:
+            return self._directory_marked(dir_id)
+        return self._name_marked(path)
+
+    def marks(self, file_data: Dict[str, Any]) -> bool:
+        """Whether a drawn rectangle is marked: files by name, directories by the matches below them"""
+        path = file_data.get('path', '')
+        if file_data.get('is_directory', False):
+            dir_id = self.index.directory_id(path)
+            return dir_id is not None and self._directory_marked(dir_id)
+        return self._name_marked(path)
+
+    def _flags(self) -> None:
+        if self._name_flags is None:
+            self._name_flags = self.index.name_flags(self.name_ids)
+            self._dir_flags = self.index.directory_flags(self.entries)
+
+    def _directory_marked(self, dir_id: int) -> bool:
+        self._flags()
+        return dir_id < len(self._dir_flags) and bool(self._dir_flags[dir_id])
+
+    def _name_marked(self, path: str) -> bool:
+        self._flags()
+        name_id = self.index.name_id(path.rpartition('/')[2])
+        return name_id is not None and name_id < len(self._name_flags) and bool(self._name_flags[name_id])
+
+
+class NameIndex:
+    """Case-insensitive substring search over file names, built incrementally.
+
+    Names and parent directories are interned, so a name shared by many files
+    (index.js, README.md) is indexed once: each distinct lowercase name is
+    posted under its trigrams. A fragment of three or more characters
+    intersects the postings of its trigrams and checks only the names left;
+    a shorter one takes the union of the postings of trigrams containing it.
+    Entries are then selected with one vectorized lookup over the per-entry
+    name ids. add() and search() may run on different threads.
+    """
+
+    def __init__(self):
+        self._name_ids: Dict[str, int] = {}
+        self._names: List[str] = []  # Lowercase, by name id
+        self._trigrams: Dict[str, array] = {}  # Name ids per trigram, ascending
+        self._dir_ids: Dict[str, int] = {}
+        self._dirs: List[str] = []
+        self._dir_parents = array('i')  # Parent directory id, -1 at the top
+        self._entry_names = array('I')
+        self._entry_dirs = array('I')
+        self.paths: List[str] = []  # By entry id
+        # Views of the arrays above (np.frombuffer) are only taken with the lock held,
+        # since an array cannot grow while a view of it exists
+        self._lock = threading.Lock()
+        self.verify_below = 4096
+        self.add_chunk = 1000
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def add(self, paths: Iterable[str]) -> None:
+        # The lock is taken per chunk, so a search waits for one chunk rather than a whole batch
+        paths = iter(paths)
+        while True:
+            chunk = list(islice(paths, self.add_chunk))
+            if not chunk:
+                return
+            self._add_chunk(chunk)
+
+    def _add_chunk(self, paths: List[str]) -> None:
+        name_ids, dir_ids, trigrams = self._name_ids, self._dir_ids, self._trigrams
+        with self._lock:
+            for path in paths:
+                directory, _, name = path.rpartition('/')
+                self.paths.append(path)
+
+                dir_id = dir_ids.get(directory)
+                if dir_id is None:
+                    dir_id = self._add_directory(directory)
+                self._entry_dirs.append(dir_id)
+
+                lower = name.lower()
+                name_id = name_ids.get(lower)
+                if name_id is None:
+                    name_id = name_ids[lower] = len(self._names)
+                    self._names.append(lower)
+                    padded = _START + lower + _END
+                    for trigram in {padded[i:i + 3] for i in range(len(padded) - 2)}:
+                        posting = trigrams.get(trigram)
+                        if posting is None:
+                            posting = trigrams[trigram] = array('I')
+                        posting.append(name_id)
+                self._entry_names.append(name_id)
+
+    def _add_directory(self, directory: str) -> int:
+        # Parents are interned too, so marking the directories above matches is array work
+        parent = directory.rpartition('/')[0]
+        parent_id = -1
+        if parent and parent != directory:
+            parent_id = self._dir_ids.get(parent)
+            if parent_id is None:
+                parent_id = self._add_directory(parent)
+        dir_id = self._dir_ids[directory] = len(self._dirs)
+        self._dirs.append(directory)
+        self._dir_parents.append(parent_id)
+        return dir_id
+
+    def add_files(self, file_data: Iterable[Dict[str, Any]]) -> None:
+        self.add(f['path'] for f in file_data)
+
+    def _match_names(self, fragment: str) -> np.ndarray:
+        if len(fragment) < 3:
+            hit = np.zeros(len(self._names), dtype=bool)
+            for trigram, posting in self._trigrams.items():
+                if fragment in trigram:
+                    hit[np.frombuffer(posting, dtype=np.uint32)] = True
+            return np.flatnonzero(hit)
+
+        postings = []
+        for i in range(len(fragment) - 2):
+            posting = self._trigrams.get(fragment[i:i + 3])
+            if posting is None:
+                return np.empty(0, dtype=np.int64)
+            postings.append(posting)
+        postings.sort(key=len)
+        ids = np.frombuffer(postings[0], dtype=np.uint32).astype(np.int64)
+        for posting in postings[1:]:
+            if len(ids) < self.verify_below:
+                # Few enough to check by substring than to intersect further
+                break
+            ids = np.intersect1d(ids, np.frombuffer(posting, dtype=np.uint32), assume_unique=True)
+        if len(postings) == 1 and len(fragment) == 3:
+            return ids
+        # Having all the trigrams does not mean having them in sequence
+        names = self._names
+        return np.array([i for i in ids.tolist() if fragment in names[i]], dtype=np.int64)
+
+    def search(self, fragment: str) -> NameMatches:
+        """Entries whose name contains fragment, ignoring case"""
+        start = time.perf_counter()
+        fragment = fragment.lower()
+        with self._lock:
+            name_ids = self._match_names(fragment) if fragment else np.empty(0, dtype=np.int64)
+            wanted = np.zeros(len(self._names), dtype=bool)
+            wanted[name_ids] = True
+            entries = np.flatnonzero(wanted[np.frombuffer(self._entry_names, dtype=np.uint32)])
+        return NameMatches(fragment, entries, name_ids, (time.perf_counter() - start) * 1000, self)
+
+    def name_id(self, name: str) -> Optional[int]:
+        return self._name_ids.get(name.lower())
+
+    def directory_id(self, path: str) -> Optional[int]:
+        return self._dir_ids.get(path)
+
+    def name_flags(self, name_ids: np.ndarray) -> np.ndarray:
+        flags = np.zeros(len(self._names), dtype=bool)
+        flags[name_ids] = True
+        return flags
+
+    def directory_flags(self, entries: np.ndarray) -> np.ndarray:
+        """Flags by directory id: parents of the entries and every directory above them"""
+        with self._lock:
+            parents = np.frombuffer(self._dir_parents, dtype=np.int32).copy()
+            level = np.zeros(len(parents), dtype=bool)
+            level[np.frombuffer(self._entry_dirs, dtype=np.uint32)[entries]] = True
+        # One step up per pass, only from directories not marked in an earlier pass
+        flags = np.zeros(len(parents), dtype=bool)
+        while True:
+            ids = np.flatnonzero(level & ~flags)
+            if not len(ids):
+                return flags
+            flags[ids] = True
+            above = parents[ids]
+            level = np.zeros(len(parents), dtype=bool)
+            level[above[above >= 0]] = True
+
+    def directories_of(self, entries: np.ndarray) -> List[str]:
+        with self._lock:
+            used = np.zeros(len(self._dirs), dtype=bool)
+            used[np.frombuffer(self._entry_dirs, dtype=np.uint32)[entries]] = True
+        dirs = self._dirs
+        return [dirs[d] for d in np.flatnonzero(used).tolist()]
@@ -0,0 +1,278 @@
+import re
+import time
+import fnmatch
+import logging
+from dataclasses import dataclass, field
+from typing import Iterable, List, Dict, Any, Optional, Set
+import numpy as np
+
+from disk_analyzer import FileInfo
+from color_palette import type_group
+from scan_stats import file_extension
+from directory_tree import with_ancestors
+
+logger = logging.getLogger(__name__)
+
+SIZE_UNITS = {'b': 1, 'k': 1024, 'kb': 1024, 'm': 1024 ** 2, 'mb': 1024 ** 2,
+              'g': 1024 ** 3, 'gb': 1024 ** 3, 't': 1024 ** 4, 'tb': 1024 ** 4}
+AGE_UNITS = {'s': 1, 'min': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400, 'y': 365 * 86400}
+
+_TERM_RE = re.compile(r'^(\w+)\s*(>=|<=|>|<|=)\s*(.+)$')
+
+# One record per entry, filled in a single pass over the scan
+_COLUMNS = np.dtype([('size', np.int64), ('mtime', np.float64), ('depth', np.int32), ('is_dir', bool),
+                     ('ext', np.int32)])
+
+
+@dataclass
+class Query:
+    """Conjunction of filters; None means unrestricted. Bounds are inclusive."""
+    min_size: Optional[int] = None
+    max_size: Optional[int] = None
+    min_age: Optional[float] = None  # Seconds before ScanIndex.now
+    max_age: Optional[float] = None
+    min_depth: Optional[int] = None
+    max_depth: Optional[int] = None
+    extensions: Optional[Set[str]] = None  # Lowercase, with the dot; '' for no extension
+    type_groups: Optional[Set[str]] = None
+    under: Optional[str] = None  # Path prefix
+    name: Optional[str] = None  # Glob on the file name
+    include_dirs: bool = False
+    limit: Optional[int] = None
+
+
+@dataclass
+class QueryResult:
+    indices: np.ndarray  # Matching entries, largest first
+    total_count: int
+    total_size: int
+    elapsed_ms: float
+    paths: List[str] = field(default_factory=list)
+
+    def highlight_paths(self) -> Set[str]:
+        """Matching paths plus every directory above them, for marking aggregated rectangles"""
+        return with_ancestors(self.paths)
+
+
+def parse_size(text: str) -> int:
+    match = re.fullmatch(r'\s*([\d.]+)\s*([a-zA-Z]*)\s*', text)
+    unit = match.group(2).lower() if match else None
+    if not match or (unit and unit not in SIZE_UNITS):
+        raise ValueError(f"Bad size: {text}")
+    return int(float(match.group(1)) * SIZE_UNITS.get(unit or 'b'))
+
+
+def parse_age(text: str) -> float:
+    match = re.fullmatch(r'\s*([\d.]+)\s*([a-zA-Z]*)\s*', text)
+    unit = match.group(2).lower() if match else None
+    if not match or (unit and unit not in AGE_UNITS):
+        raise ValueError(f"Bad age: {text}")
+    return float(match.group(1)) * AGE_UNITS.get(unit or 'd')
+
+
+def parse_query(text: str) -> Query:
+    """Parse space-separated terms such as `size>1GB age>90d ext=.log,.gz depth<=4`.
+
+    Fields: size, age (s/min/h/d/w/y, default days), depth, ext, type (color
+    group; `_` for spaces, prefixes allowed), under (path prefix), name (glob), dirs=yes, limit.
+    """
+    query = Query()
+    for term in text.split():
+        match = _TERM_RE.match(term)
+        if not match:
+            raise ValueError(f"Bad query term: {term}")
+        key, op, value = match.group(1).lower(), match.group(2), match.group(3)
+
+        if key in ('size', 'age', 'depth'):
+            number = {'size': parse_size, 'age': parse_age, 'depth': int}[key](value)
+            low, high = f'min_{key}', f'max_{key}'
+            if op in ('>', '>='):
+                setattr(query, low, number + 1 if op == '>' and key != 'age' else number)
+            elif op in ('<', '<='):
+                setattr(query, high, number - 1 if op == '<' and key != 'age' else number)
+            elif op == '=':
+                setattr(query, low, number)
+                setattr(query, high, number)
+            else:
+                raise ValueError(f"Unsupported operator in {term}")
+            continue
+
+        if op != '=':
+            raise ValueError(f"Unsupported operator in {term}")
+        if key == 'ext':
+            query.extensions = {('' if e in ('', 'none') else e if e.startswith('.') else '.' + e)
+                                for e in value.lower().split(',')}
+        elif key == 'type':
+            # Group names contain spaces, so `_` stands in for them and a prefix is enough
+            query.type_groups = {g.strip().replace('_', ' ').lower() for g in value.split(',')}
+        elif key == 'under':
+            query.under = value.rstrip('/') or '/'
+        elif key == 'name':
+            query.name = value
+        elif key == 'dirs':
+            query.include_dirs = value.lower() in ('1', 'yes', 'true')
+        elif key == 'limit':
+            query.limit = int(value)
+        else:
+            raise ValueError(f"Unknown query field: {key}")
+    return query
+
+
+class ScanIndex:
+    """Column arrays and indexes over one scan for fast ad-hoc filtering.
+
+    Sizes and mtimes each get a sorted order, so a range filter is two binary
+    searches; extensions get posting lists. A query starts from the most
+    selective of these candidate sets and checks the remaining predicates only
+    on that subset with vectorized comparisons.
+
+    A SegmentStore (--spill) is read once into the columns without keeping
+    its entries; the paths of the entries a query needs are read back from
+    it in another pass, so only the numeric columns grow with the scan.
+    """
+
+    def __init__(self, files: Iterable[FileInfo], now: Optional[float] = None):
+        self._store = files if hasattr(files, 'sorted_records') else None
+        if self._store is None:
+            files = list(files)
+        self.now = now if now is not None else time.time()
+
+        ext_ids: Dict[str, int] = {}
+        self.extension_names: List[str] = []
+
+        def ext_code(f: FileInfo) -> int:
+            ext = '' if f.is_dir else file_extension(f.path)
+            code = ext_ids.get(ext)
+            if code is None:
+                code = ext_ids[ext] = len(self.extension_names)
+                self.extension_names.append(ext)
+            return code
+
+        columns = np.fromiter(((f.size, f.mtime, f.depth, f.is_dir, ext_code(f)) for f in files),
+                              dtype=_COLUMNS, count=len(files))
+        self.paths: Optional[List[str]] = [f.path for f in files] if self._store is None else None
+        self.sizes = np.ascontiguousarray(columns['size'])
+        self.mtimes = np.ascontiguousarray(columns['mtime'])
+        self.depths = np.ascontiguousarray(columns['depth'])
+        self.is_dir = np.ascontiguousarray(columns['is_dir'])
+        codes = self.ext_codes = np.ascontiguousarray(columns['ext'])
+        del columns
+        self._ext_ids = ext_ids
+
+        # Posting lists: entry indices per extension, each in ascending order
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(self.extension_names) + 1))
+        self.postings = {ext: order[bounds[code]:bounds[code + 1]] for ext, code in ext_ids.items()}
+
+        self.size_order = np.argsort(self.sizes, kind='stable')
+        self.sorted_sizes = self.sizes[self.size_order]
+        self.mtime_order = np.argsort(self.mtimes, kind='stable')
+        self.sorted_mtimes = self.mtimes[self.mtime_order]
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def paths_of(self, indices: Iterable[int]) -> List[str]:
+        """Paths of the given entries, in the same order"""
+        indices = [int(i) for i in indices]
+        if self._store is None:
+            return [self.paths[i] for i in indices]
+        wanted = set(indices)
+        found = {i: f.path for i, f in enumerate(self._store) if i in wanted}
+        return [found[i] for i in indices]
+
+    def _range(self, order: np.ndarray, sorted_values: np.ndarray, low, high) -> np.ndarray:
+        start = 0 if low is None else np.searchsorted(sorted_values, low, side='left')
+        stop = len(sorted_values) if high is None else np.searchsorted(sorted_values, high, side='right')
+        return order[start:stop]
+
+    def _candidates(self, query: Query) -> Optional[np.ndarray]:
+        sets = []
+        if query.min_size is not None or query.max_size is not None:
+            sets.append(self._range(self.size_order, self.sorted_sizes, query.min_size, query.max_size))
+        if query.min_age is not None or query.max_age is not None:
+            # Older means a smaller mtime
+            low = None if query.max_age is None else self.now - query.max_age
+            high = None if query.min_age is None else self.now - query.min_age
+            sets.append(self._range(self.mtime_order, self.sorted_mtimes, low, high))
+        extensions = set(query.extensions or ())
+        if query.type_groups is not None:
+            extensions |= {ext for ext in self._ext_ids if self._in_groups(ext, query.type_groups)}
+        if query.extensions is not None or query.type_groups is not None:
+            lists = [self.postings[ext] for ext in extensions if ext in self.postings]
+            sets.append(np.concatenate(lists) if lists else np.empty(0, dtype=np.int64))
+        if not sets:
+            return None
+        return min(sets, key=len)
+
+    @staticmethod
+    def _in_groups(ext: str, groups: Set[str]) -> bool:
+        return type_group(ext).lower().startswith(tuple(groups))
+
+    def query(self, query: Query) -> QueryResult:
+        start = time.perf_counter()
+        candidates = self._candidates(query)
+        if candidates is None:
+            candidates = np.arange(len(self))
+
+        mask = np.ones(len(candidates), dtype=bool)
+        if not query.include_dirs:
+            mask &= ~self.is_dir[candidates]
+        sizes = self.sizes[candidates]
+        if query.min_size is not None:
+            mask &= sizes >= query.min_size
+        if query.max_size is not None:
+            mask &= sizes <= query.max_size
+        if query.min_age is not None or query.max_age is not None:
+            ages = self.now - self.mtimes[candidates]
+            if query.min_age is not None:
+                mask &= ages >= query.min_age
+            if query.max_age is not None:
+                mask &= ages <= query.max_age
+        if query.min_depth is not None or query.max_depth is not None:
+            depths = self.depths[candidates]
+            if query.min_depth is not None:
+                mask &= depths >= query.min_depth
+            if query.max_depth is not None:
+                mask &= depths <= query.max_depth
+        if query.extensions is not None or query.type_groups is not None:
+            allowed = np.zeros(len(self.extension_names), dtype=bool)
+            for ext in query.extensions or ():
+                if ext in self._ext_ids:
+                    allowed[self._ext_ids[ext]] = True
+            if query.type_groups is not None:
+                for ext, code in self._ext_ids.items():
+                    if self._in_groups(ext, query.type_groups):
+                        allowed[code] = True
+            mask &= allowed[self.ext_codes[candidates]]
+
+        matches = candidates[mask]
+        # String predicates only run on what survived the indexed ones
+        if query.under is not None or query.name is not None:
+            under = query.under
+            prefix = None if under is None else under if under.endswith('/') else under + '/'
+            pattern = query.name
+            matches = np.array([i for i, path in zip(matches.tolist(), self.paths_of(matches))
+                                if (prefix is None or path.startswith(prefix))
+                                and (pattern is None or fnmatch.fnmatch(path.rpartition('/')[2], pattern))],
+                               dtype=np.int64)
+
+        matches = matches[np.argsort(-self.sizes[matches], kind='stable')]
+        total_count = len(matches)
+        total_size = int(self.sizes[matches].sum())
+        if query.limit is not None:
+            matches = matches[:query.limit]
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        return QueryResult(matches, total_count, total_size, elapsed_ms, self.paths_of(matches))
+
+    def row(self, i: int, path: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            'path': path if path is not None else self.paths_of([i])[0],
+            'size_bytes': int(self.sizes[i]),
+            'mtime': float(self.mtimes[i]),
+            'age_days': (self.now - float(self.mtimes[i])) / 86400,
+            'depth': int(self.depths[i]),
+            'is_directory': bool(self.is_dir[i]),
+            'file_type': self.extension_names[self.ext_codes[i]],
+        }
+
@@ -0,0 +1,137 @@
+import struct
+import zlib
+from typing import List, Optional, Tuple
+import numpy as np
+
+from visualization_config import FileRect
+
+
+class RasterRenderer:
+    """Rasterizes treemap rectangles straight into an RGBA framebuffer.
+
+    A parallel ID buffer stores, for every pixel, the index of the rectangle
+    covering it (-1 for background), which makes hit-testing a single array
+    lookup. Treemap rectangles do not overlap, so both buffers are painted with
+    a 2D difference array and one cumulative sum instead of a per-rectangle loop.
+    Where snapping to pixels makes rectangles share pixels, the later one wins
+    those pixels, as if they were painted in order.
+    """
+
+    def __init__(self, width: int, height: int, background_rgba: Tuple[int, int, int, int] = (0, 0, 0, 0)):
+        self.background_rgba = np.asarray(background_rgba, dtype=np.uint8)
+        self.width = 0
+        self.height = 0
+        self.framebuffer = np.empty((0, 0, 4), dtype=np.uint8)
+        self.id_buffer = np.empty((0, 0), dtype=np.int32)
+        self.resize(width, height)
+
+    def resize(self, width: int, height: int) -> None:
+        width, height = max(1, int(width)), max(1, int(height))
+        if (width, height) == (self.width, self.height):
+            return
+        self.width = width
+        self.height = height
+        self.framebuffer = np.empty((height, width, 4), dtype=np.uint8)
+        self.id_buffer = np.full((height, width), -1, dtype=np.int32)
+        self.framebuffer[:] = self.background_rgba
+
+    def render(self, geometry: np.ndarray, colors: np.ndarray) -> np.ndarray:
+        """Paint rectangles given as an (N, 4) x, y, width, height array with (N, 4) uint8 colors"""
+        n = len(geometry)
+        if n == 0:
+            self.id_buffer.fill(-1)
+            self.framebuffer[:] = self.background_rgba
+            return self.framebuffer
+
+        x0 = np.clip(np.floor(geometry[:, 0]).astype(np.int64), 0, self.width)
+        y0 = np.clip(np.floor(geometry[:, 1]).astype(np.int64), 0, self.height)
+        x1 = np.clip(np.floor(geometry[:, 0] + geometry[:, 2]).astype(np.int64), 0, self.width)
+        y1 = np.clip(np.floor(geometry[:, 1] + geometry[:, 3]).astype(np.int64), 0, self.height)
+        # Rectangles thinner than a pixel still get one so nothing vanishes
+        x1 = np.maximum(x1, np.minimum(x0 + 1, self.width))
+        y1 = np.maximum(y1, np.minimum(y0 + 1, self.height))
+
+        ids = np.arange(1, n + 1, dtype=np.int64)
+        covered = self._corner_sums(x0, y0, x1, y1, ids)
+        # The sums of ids are only right where at most one rectangle covers a pixel
+        count = self._corner_sums(x0, y0, x1, y1, np.ones(n, dtype=np.int64))
+        overlapped = count > 1
+        if overlapped.any():
+            self._paint_overlaps(covered, overlapped, x0, y0, x1, y1)
+
+        self.id_buffer[:] = covered - 1
+
+        palette = np.empty((n + 1, 4), dtype=np.uint8)
+        palette[0] = self.background_rgba
+        palette[1:] = colors
+        np.take(palette, covered, axis=0, out=self.framebuffer)
+        return self.framebuffer
+
+    def _corner_sums(self, x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray,
+                     values: np.ndarray) -> np.ndarray:
+        """Per pixel, the sum of values of the rectangles covering it"""
+        diff = np.zeros((self.height + 1, self.width + 1), dtype=np.int64)
+        np.add.at(diff, (y0, x0), values)
+        np.add.at(diff, (y0, x1), -values)
+        np.add.at(diff, (y1, x0), -values)
+        np.add.at(diff, (y1, x1), values)
+        return diff.cumsum(axis=0).cumsum(axis=1)[:self.height, :self.width]
+
+    @staticmethod
+    def _paint_overlaps(covered: np.ndarray, overlapped: np.ndarray, x0: np.ndarray, y0: np.ndarray,
+                        x1: np.ndarray, y1: np.ndarray) -> None:
+        """Give each pixel covered more than once the largest (latest) id covering it"""
+        # Rectangles touching an overlapped pixel, found with a summed-area table
+        table = np.zeros((overlapped.shape[0] + 1, overlapped.shape[1] + 1), dtype=np.int64)
+        table[1:, 1:] = overlapped.cumsum(axis=0).cumsum(axis=1)
+        touching = np.flatnonzero(table[y1, x1] - table[y0, x1] - table[y1, x0] + table[y0, x0] > 0)
+
+        # Only those are expanded to pixels; in a treemap they are mostly sub-pixel ones
+        widths = x1[touching] - x0[touching]
+        areas = widths * (y1[touching] - y0[touching])
+        which = np.repeat(np.arange(len(touching)), areas)
+        offsets = np.arange(len(which)) - np.repeat(np.cumsum(areas) - areas, areas)
+        rows = y0[touching][which] + offsets // widths[which]
+        cols = x0[touching][which] + offsets % widths[which]
+        covered[overlapped] = 0
+        np.maximum.at(covered, (rows, cols), touching[which] + 1)
+
+    def render_rects(self, rects: List[FileRect], colors: np.ndarray) -> np.ndarray:
+        return self.render(rect_geometry(rects), colors)
+
+    def rect_index_at(self, x: float, y: float) -> int:
+        col = int(x)
+        row = int(y)
+        if 0 <= col < self.width and 0 <= row < self.height:
+            return int(self.id_buffer[row, col])
+        return -1
+
+    def pick(self, rects: List[FileRect], x: float, y: float) -> Optional[FileRect]:
+        index = self.rect_index_at(x, y)
+        if 0 <= index < len(rects):
+            return rects[index]
+        return None
+
+
+def rect_geometry(rects: List[FileRect]) -> np.ndarray:
+    """(N, 4) float array of x, y, width, height"""
+    if not rects:
+        return np.empty((0, 4), dtype=float)
+    return np.array([(r.x, r.y, r.width, r.height) for r in rects], dtype=float)
+
+
+def encode_png(rgba: np.ndarray, compression: int = 6) -> bytes:
+    """Encode an (H, W, 4) uint8 array as PNG, top row first, without an imaging library"""
+    height, width = rgba.shape[:2]
+    raw = np.empty((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 0] = 0  # Filter type "None" for every scanline
+    raw[:, 1:] = rgba.reshape(height, width * 4)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return (struct.pack('>I', len(data)) + tag + data +
+                struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+    return (b'\x89PNG\r\n\x1a\n' +
+            chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)) +
+            chunk(b'IDAT', zlib.compress(raw.tobytes(), compression)) +
+            chunk(b'IEND', b''))
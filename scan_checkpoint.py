@@ -0,0 +1,74 @@
+import os
+import time
+import logging
+from typing import Any, Dict, List, Tuple
+
+from disk_analyzer import DiskAnalyzer, FileInfo
+from snapshot import write_snapshot, load_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class Checkpointer:
+    """Writes an analyzer's progress to a snapshot file it can be resumed from.
+
+    A checkpoint is an ordinary snapshot (so --load-snapshot, --diff and
+    --query work on it) whose entries also carry device and inode, and
+    whose header holds the directories still to be listed. Each write goes
+    to a temporary file that replaces the previous checkpoint, so an
+    interrupted write never destroys the last good one.
+    """
+
+    def __init__(self, path: str, root: str):
+        self.path = path
+        self.root = root
+        self.scanned_seconds = 0.0  # Time spent in earlier runs of this scan
+        self.writes = 0
+        self._started = time.time()
+
+    def __call__(self, analyzer: DiskAnalyzer) -> None:
+        directory, name = os.path.split(self.path)
+        temp_path = os.path.join(directory, f".{name}.partial{'.gz' if name.endswith('.gz') else ''}")
+        frontier = analyzer.frontier or []
+        extra = {
+            'stats': analyzer.stats.to_dict(),
+            'checkpoint': {
+                'frontier': [[path, depth] for path, depth in frontier],
+                'complete': not frontier,
+                'stopped': analyzer.stopped,
+                'partial': analyzer.partial,
+                'hardlinks_skipped': analyzer.hardlinks_skipped,
+                'scanned_seconds': self.scanned_seconds + time.time() - self._started,
+            },
+        }
+        start = time.perf_counter()
+        write_snapshot(temp_path, self.root, analyzer.files, extra=extra, inodes=True)
+        os.replace(temp_path, self.path)
+        self.writes += 1
+        logger.info(f"Checkpoint {self.path}: {len(analyzer.files)} entries, {len(frontier)} directories pending "
+                    f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+
+def load_checkpoint(path: str) -> Tuple[Dict[str, Any], List[FileInfo]]:
+    """Header and entries of a checkpoint written by Checkpointer"""
+    header, files = load_snapshot(path)
+    if 'checkpoint' not in header:
+        raise ValueError(f"Not a scan checkpoint: {path}")
+    return header, files
+
+
+def resume(analyzer: DiskAnalyzer, path: str) -> Checkpointer:
+    """Restore analyzer from the checkpoint at path; it keeps checkpointing there as it continues"""
+    header, files = load_checkpoint(path)
+    state = header['checkpoint']
+    analyzer.restore(files, [(p, depth) for p, depth in state['frontier']], state.get('hardlinks_skipped', 0),
+                     state.get('partial'))
+    checkpointer = Checkpointer(path, header['root'])
+    checkpointer.scanned_seconds = state.get('scanned_seconds', 0.0)
+    analyzer.checkpoint = checkpointer
+    if state['complete']:
+        logger.info(f"Checkpoint {path} is already complete ({len(files)} entries)")
+    else:
+        logger.info(f"Resuming {header['root']} from {path}: {len(files)} entries, "
+                    f"{len(state['frontier'])} directories pending")
+    return checkpointer
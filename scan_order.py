@@ -0,0 +1,113 @@
+import os
+import heapq
+import itertools
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Pending = Tuple[str, int]  # (directory path, depth)
+
+
+class DepthFirstFrontier:
+    """Directories still to be listed, each directory's subdirectories before its siblings"""
+
+    def __init__(self, pending: Iterable[Pending] = ()):
+        self._stack = list(pending)  # The top of the stack is listed next
+
+    def __len__(self) -> int:
+        return len(self._stack)
+
+    def __iter__(self) -> Iterator[Pending]:
+        return iter(self._stack)
+
+    def peek(self) -> Pending:
+        return self._stack[-1]
+
+    def pop(self) -> None:
+        self._stack.pop()
+
+    def push(self, subdirs: List[Pending]) -> None:
+        self._stack.extend(reversed(subdirs))
+
+
+class SizeGuidedFrontier:
+    """Directories listed largest first, by their size in an earlier scan.
+
+    A directory's children are queued with their own earlier sizes, so the
+    walk goes after the biggest regions wherever they are and leaves small
+    trees for last. Directories the earlier scan did not have count as
+    empty, and equal sizes go in the order found, so with no history at all
+    this is a breadth-first walk.
+    """
+
+    def __init__(self, sizes: Dict[str, int], pending: Iterable[Pending] = ()):
+        self.sizes = sizes
+        self._heap: List[Tuple[int, int, str, int]] = []
+        self._order = itertools.count()
+        self.push(list(pending))
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __iter__(self) -> Iterator[Pending]:
+        return ((path, depth) for _, _, path, depth in self._heap)
+
+    def peek(self) -> Pending:
+        _, _, path, depth = self._heap[0]
+        return path, depth
+
+    def pop(self) -> None:
+        heapq.heappop(self._heap)
+
+    def push(self, subdirs: List[Pending]) -> None:
+        for path, depth in subdirs:
+            heapq.heappush(self._heap, (-self.sizes.get(path, 0), next(self._order), path, depth))
+
+
+def directory_sizes(entries: Iterable, old_root: str, root: str) -> Dict[str, int]:
+    """Total file bytes under every directory of an earlier scan, keyed by path under root.
+
+    entries are FileInfo-like rows of a scan of old_root, e.g. iter_snapshot();
+    their paths are moved under root, so a snapshot of the same tree taken
+    through another mount point still applies. Only directories of root are kept.
+    """
+    old_root = os.path.normpath(old_root)
+    root = os.path.normpath(root)
+    sizes: Dict[str, int] = {}
+    for entry in entries:
+        if entry.is_dir or entry.size <= 0:
+            continue
+        rel = os.path.relpath(entry.path, old_root)
+        if rel.startswith(os.pardir):
+            continue
+        path = os.path.dirname(os.path.join(root, rel))
+        while True:
+            sizes[path] = sizes.get(path, 0) + entry.size
+            if path == root or len(path) <= len(root):
+                break
+            path = os.path.dirname(path)
+    return sizes
+
+
+def coverage_time(progress: List[Tuple[float, int]], fraction: float = 0.95) -> Optional[float]:
+    """Seconds until the scan had found `fraction` of its final bytes.
+
+    progress holds (seconds since start, bytes found) samples. Each
+    rectangle's area is its share of the bytes found, so once 95% of the
+    bytes are in, only about 5% of the map's area can still be misallocated.
+    """
+    if not progress or progress[-1][1] <= 0:
+        return None
+    target = fraction * progress[-1][1]
+    return next(seconds for seconds, found in progress if found >= target)
+
+
+def merge_progress(progresses: List[List[Tuple[float, int]]]) -> List[Tuple[float, int]]:
+    """One timeline of total bytes found from the timelines of scans run side by side"""
+    found = [0] * len(progresses)
+    merged = []
+    for seconds, i, value in sorted((s, i, v) for i, progress in enumerate(progresses) for s, v in progress):
+        found[i] = value
+        merged.append((seconds, sum(found)))
+    return merged
@@ -0,0 +1,161 @@
+import time
+from bisect import bisect_right
+from typing import List, Dict, Any, Optional, Tuple
+
+# Upper edges of the mtime-age buckets, in days
+AGE_EDGES_DAYS = (1, 7, 30, 90, 365, 2 * 365, 5 * 365)
+AGE_LABELS = ('<1d', '1-7d', '7-30d', '30-90d', '90d-1y', '1-2y', '2-5y', '>5y')
+_AGE_EDGES = tuple(d * 86400 for d in AGE_EDGES_DAYS)
+SIZE_BUCKETS = 64  # Bucket b holds sizes with bit_length b, i.e. [2**(b-1), 2**b)
+
+
+def file_extension(path: str) -> str:
+    """Lowercase suffix with the dot, '' when there is none; like Path.suffix but without building a Path"""
+    name = path[path.rfind('/') + 1:]
+    dot = name.rfind('.')
+    return name[dot:].lower() if dot > 0 else ''
+
+
+def _size_label(size: int) -> str:
+    for unit in ('B', 'K', 'M', 'G', 'T'):
+        if size < 1024:
+            return f"{size}{unit}"
+        size //= 1024
+    return f"{size}P"
+
+
+class ScanStats:
+    """Running totals collected while scanning, one O(1) update per entry.
+
+    Keeps bytes and counts per extension, a log2 size histogram and an
+    mtime-age histogram. Type-group totals are derived from the (small)
+    per-extension table when read, so the scanner never has to classify files.
+    """
+
+    def __init__(self, now: Optional[float] = None):
+        self.now = now if now is not None else time.time()
+        self.file_count = 0
+        self.dir_count = 0
+        self.total_bytes = 0
+        self.extensions: Dict[str, List[int]] = {}  # ext -> [bytes, count]
+        self.size_counts = [0] * SIZE_BUCKETS
+        self.size_bytes = [0] * SIZE_BUCKETS
+        self.age_counts = [0] * len(AGE_LABELS)
+        self.age_bytes = [0] * len(AGE_LABELS)
+        self.version = 0
+
+    def add(self, path: str, size: int, is_dir: bool, mtime: float) -> None:
+        self.version += 1
+        if is_dir:
+            self.dir_count += 1
+            return
+        self.file_count += 1
+        self.total_bytes += size
+
+        ext = file_extension(path)
+        totals = self.extensions.get(ext)
+        if totals is None:
+            totals = self.extensions[ext] = [0, 0]
+        totals[0] += size
+        totals[1] += 1
+
+        bucket = min(size.bit_length(), SIZE_BUCKETS - 1)
+        self.size_counts[bucket] += 1
+        self.size_bytes[bucket] += size
+
+        age = bisect_right(_AGE_EDGES, self.now - mtime)
+        self.age_counts[age] += 1
+        self.age_bytes[age] += size
+
+    def add_file(self, file_info: Any) -> None:
+        self.add(file_info.path, file_info.size, file_info.is_dir, file_info.mtime)
+
+    def merge(self, other: 'ScanStats') -> None:
+        """Add another scan's totals, e.g. of a root scanned on another thread"""
+        self.version += 1
+        self.file_count += other.file_count
+        self.dir_count += other.dir_count
+        self.total_bytes += other.total_bytes
+        for ext, (size, count) in other.extensions.items():
+            totals = self.extensions.setdefault(ext, [0, 0])
+            totals[0] += size
+            totals[1] += count
+        for mine, theirs in ((self.size_counts, other.size_counts), (self.size_bytes, other.size_bytes),
+                             (self.age_counts, other.age_counts), (self.age_bytes, other.age_bytes)):
+            for i, value in enumerate(theirs):
+                mine[i] += value
+
+    def top_extensions(self, n: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """(extension, bytes, count), largest first"""
+        rows = sorted(((ext, b, c) for ext, (b, c) in self.extensions.items()), key=lambda r: -r[1])
+        return rows[:n] if n is not None else rows
+
+    def type_groups(self) -> List[Tuple[str, int, int]]:
+        """(group, bytes, count), largest first"""
+        from color_palette import type_group
+
+        groups: Dict[str, List[int]] = {}
+        for ext, (size, count) in self.extensions.items():
+            totals = groups.setdefault(type_group(ext), [0, 0])
+            totals[0] += size
+            totals[1] += count
+        return sorted(((g, b, c) for g, (b, c) in groups.items()), key=lambda r: -r[1])
+
+    def size_histogram(self) -> List[Tuple[str, int, int]]:
+        """(range label, bytes, count) for the populated log2 size buckets"""
+        used = [b for b in range(SIZE_BUCKETS) if self.size_counts[b]]
+        if not used:
+            return []
+        return [(f"{_size_label(1 << (b - 1)) if b else '0B'}-{_size_label(1 << b)}",
+                 self.size_bytes[b], self.size_counts[b])
+                for b in range(used[0], used[-1] + 1)]
+
+    def age_histogram(self) -> List[Tuple[str, int, int]]:
+        return list(zip(AGE_LABELS, self.age_bytes, self.age_counts))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'files': self.file_count,
+            'directories': self.dir_count,
+            'bytes': self.total_bytes,
+            'reference_time': self.now,
+            'extensions': {ext: {'bytes': b, 'files': c} for ext, b, c in self.top_extensions()},
+            'type_groups': {g: {'bytes': b, 'files': c} for g, b, c in self.type_groups()},
+            'size_histogram': [{'range': r, 'bytes': b, 'files': c} for r, b, c in self.size_histogram()],
+            'age_histogram': [{'age': a, 'bytes': b, 'files': c} for a, b, c in self.age_histogram()],
+        }
+
+    def report_lines(self, view: str, rows: int = 8, width: int = 10) -> List[str]:
+        """Fixed-width text table of one view ('types', 'extensions', 'sizes' or 'ages') with bars"""
+        if view == 'types':
+            table = self.type_groups()[:rows]
+        elif view == 'extensions':
+            table = [(ext or '(none)', b, c) for ext, b, c in self.top_extensions(rows)]
+        elif view == 'sizes':
+            table = _merge_rows(self.size_histogram(), rows)
+        elif view == 'ages':
+            table = self.age_histogram()
+        else:
+            raise ValueError(f"Unknown stats view: {view}")
+
+        total = max(1, self.total_bytes)
+        label_width = max((len(label) for label, _, _ in table), default=0)
+        lines = []
+        for label, size, count in table:
+            share = size / total
+            bar = '█' * int(round(share * width))
+            lines.append(f"{label:<{label_width}} {_size_label(size):>5} {share:4.0%} {bar}".rstrip())
+        return lines
+
+
+def _merge_rows(table: List[Tuple[str, int, int]], rows: int) -> List[Tuple[str, int, int]]:
+    """Combine adjacent histogram rows so at most `rows` remain"""
+    if len(table) <= rows:
+        return table
+    step = -(-len(table) // rows)
+    merged = []
+    for i in range(0, len(table), step):
+        chunk = table[i:i + step]
+        label = f"{chunk[0][0].split('-')[0]}-{chunk[-1][0].split('-')[1]}"
+        merged.append((label, sum(r[1] for r in chunk), sum(r[2] for r in chunk)))
+    return merged
@@ -0,0 +1,159 @@
+import os
+import shutil
+import struct
+import logging
+import tempfile
+import threading
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from disk_analyzer import FileInfo
+
+logger = logging.getLogger(__name__)
+
+# size, mtime, depth, device, inode, link count, is_dir, path length; followed by the UTF-8 path
+_RECORD = struct.Struct('<QdHQQI?H')
+
+
+class SegmentStore:
+    """Append-only on-disk list of FileInfo records, for scans too large to keep in RAM.
+
+    Records go to numbered segment files of at most segment_bytes each. The
+    scanner lists one directory at a time, so a directory's entries are
+    almost always contiguous; the only index kept in memory is a list of
+    (segment, start, end) extents per parent directory, which makes reading
+    back a subtree a few sequential reads. Used as an analyzer's `files`, it
+    supports append, len and iteration like the list it replaces.
+    """
+
+    def __init__(self, directory: Optional[str] = None, segment_bytes: int = 64 << 20):
+        self.directory = tempfile.mkdtemp(prefix='visualdisk-', dir=directory)
+        self.segment_bytes = segment_bytes
+        self.segments: List[str] = []
+        self.extents: Dict[str, List[List[int]]] = {}  # parent directory -> [[segment, start, end], ...]
+        self.bytes_written = 0
+        self._count = 0
+        self._writer: Optional[BinaryIO] = None
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, file_info: FileInfo) -> None:
+        path = file_info.path.encode('utf-8', 'surrogateescape')
+        record = _RECORD.pack(file_info.size, file_info.mtime, file_info.depth, file_info.dev, file_info.ino,
+                              min(file_info.nlink, 0xffffffff), file_info.is_dir, len(path)) + path
+        parent = os.path.dirname(file_info.path)
+        with self._lock:
+            if self._writer is None or self._offset + len(record) > self.segment_bytes:
+                self._next_segment()
+            segment = len(self.segments) - 1
+            start = self._offset
+            self._writer.write(record)
+            self._offset += len(record)
+            self.bytes_written += len(record)
+            self._count += 1
+            extents = self.extents.get(parent)
+            if extents is None:
+                self.extents[parent] = [[segment, start, self._offset]]
+            elif extents[-1][0] == segment and extents[-1][2] == start:
+                extents[-1][2] = self._offset
+            else:
+                extents.append([segment, start, self._offset])
+
+    def _next_segment(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        path = os.path.join(self.directory, f'segment-{len(self.segments):05d}.bin')
+        self.segments.append(path)
+        self._writer = open(path, 'wb')
+        self._offset = 0
+
+    def _read(self, ranges: List[Tuple[int, int, int]]) -> Iterator[FileInfo]:
+        with self._lock:
+            if self._writer is not None:
+                self._writer.flush()
+        for segment, start, end in ranges:
+            with open(self.segments[segment], 'rb') as f:
+                f.seek(start)
+                data = f.read(end - start)
+            offset = 0
+            while offset < len(data):
+                size, mtime, depth, dev, ino, nlink, is_dir, length = _RECORD.unpack_from(data, offset)
+                offset += _RECORD.size
+                path = data[offset:offset + length].decode('utf-8', 'surrogateescape')
+                offset += length
+                yield FileInfo(path=path, size=size, is_dir=is_dir, depth=depth, mtime=mtime, dev=dev, ino=ino,
+                               nlink=nlink)
+
+    def __iter__(self) -> Iterator[FileInfo]:
+        """Every record in the order written, read one segment at a time"""
+        with self._lock:
+            ranges = [(i, 0, os.path.getsize(path) if i < len(self.segments) - 1 else self._offset)
+                      for i, path in enumerate(self.segments)]
+        return self._read(ranges)
+
+    def subtree(self, path: str) -> Iterator[FileInfo]:
+        """Records under directory path, read back in segment order"""
+        path = os.path.normpath(path)
+        prefix = path if path.endswith(os.sep) else path + os.sep
+        with self._lock:
+            ranges = [tuple(extent) for parent, extents in self.extents.items()
+                      if parent == path or parent.startswith(prefix) for extent in extents]
+        ranges.sort()
+        return self._read(ranges)
+
+    def listing(self, path: str) -> Iterator[FileInfo]:
+        """Records whose parent is directory path, i.e. what listing it found"""
+        with self._lock:
+            ranges = [tuple(extent) for extent in self.extents.get(path, ())]
+        return self._read(ranges)
+
+    def sorted_records(self) -> Iterator[FileInfo]:
+        """Every record in path order, as a snapshot lists them, without sorting them all in memory.
+
+        Paths under a directory all start with its path plus a separator, so
+        the records of a listing can be sorted among the prefixes of the
+        listed directories below it, and each prefix expanded in place. Only
+        one listing per level of the walk is held at a time.
+        """
+        with self._lock:
+            parents = set(self.extents)
+        # Each listed directory hangs under the closest listed directory above it
+        below: Dict[str, List[str]] = {}
+        tops = []
+        for parent in parents:
+            above = os.path.dirname(parent)
+            while above not in parents and above != os.path.dirname(above):
+                above = os.path.dirname(above)
+            if above in parents and above != parent:
+                below.setdefault(above, []).append(parent)
+            else:
+                tops.append(parent)
+
+        def level(records, directories):
+            items = [(f.path, f) for f in records]
+            items += [(d if d.endswith(os.sep) else d + os.sep, d) for d in directories]
+            items.sort(key=lambda item: item[0])
+            return iter(items)
+
+        stack = [level((), tops)]
+        while stack:
+            item = next(stack[-1], None)
+            if item is None:
+                stack.pop()
+            elif isinstance(item[1], str):
+                stack.append(level(self.listing(item[1]), below.get(item[1], ())))
+            else:
+                yield item[1]
+
+    def close(self) -> None:
+        """Delete the segment files"""
+        if not os.path.isdir(self.directory):
+            return
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        shutil.rmtree(self.directory, ignore_errors=True)
+        logger.info(f"Removed spill store {self.directory} ({self._count:,} records, {self.bytes_written:,} bytes)")
@@ -0,0 +1,101 @@
+import gzip
+import json
+import time
+import logging
+from typing import Iterable, Iterator, List, Dict, Any, Tuple, IO, Optional
+
+from disk_analyzer import FileInfo
+from scan_stats import ScanStats
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 'visualdisk-snapshot'
+SNAPSHOT_VERSION = 1
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def write_snapshot(path: str, root: str, files: Iterable[FileInfo], extra: Optional[Dict[str, Any]] = None,
+                   inodes: bool = False) -> int:
+    """Write a scan as JSON lines sorted by path: one header line, then one entry per line.
+
+    Sorting by path lets two snapshots be compared with a streaming merge-join.
+    A `.gz` suffix selects gzip compression. Entries with several hard links
+    carry their device, inode and link count, so a loaded snapshot can still
+    tell links to one file apart from copies; with inodes every entry carries
+    its device and inode, as a resumable checkpoint needs. A
+    SegmentStore (--spill) is written in path order straight from its
+    segments rather than sorted in memory.
+    """
+    if hasattr(files, 'sorted_records'):
+        entries, count = files.sorted_records(), len(files)
+    else:
+        entries = sorted(files, key=lambda f: f.path)
+        count = len(entries)
+    header = {
+        'format': SNAPSHOT_FORMAT,
+        'version': SNAPSHOT_VERSION,
+        'root': str(root),
+        'created': time.time(),
+        'entries': count,
+    }
+    if extra:
+        header.update(extra)
+
+    with _open(path, 'w') as f:
+        f.write(json.dumps(header) + '\n')
+        for e in entries:
+            row = [e.path, e.size, int(e.is_dir), e.depth, e.mtime]
+            if e.nlink > 1:
+                row += [e.dev, e.ino, e.nlink]
+            elif inodes:
+                row += [e.dev, e.ino]
+            f.write(json.dumps(row) + '\n')
+    logger.info(f"Wrote snapshot {path} with {count} entries")
+    return count
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    with _open(path, 'r') as f:
+        return _parse_header(f.readline(), path)
+
+
+def _parse_header(line: str, path: str) -> Dict[str, Any]:
+    try:
+        header = json.loads(line)
+    except ValueError:
+        header = None
+    if not isinstance(header, dict) or header.get('format') != SNAPSHOT_FORMAT:
+        raise ValueError(f"Not a snapshot file: {path}")
+    if header.get('version', 0) > SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {header['version']} in {path}")
+    return header
+
+
+def iter_snapshot(path: str) -> Iterator[FileInfo]:
+    """Stream entries in path order without loading the whole file"""
+    # raw_decode skips json.loads' per-call wrapper; this loop is the cost of reading large snapshots
+    decode = json.JSONDecoder().raw_decode
+    with _open(path, 'r') as f:
+        _parse_header(f.readline(), path)
+        for line in f:
+            p, size, is_dir, depth, mtime, *inode = decode(line)[0]
+            yield FileInfo(p, size, bool(is_dir), depth, mtime, *inode)
+
+
+def load_snapshot(path: str, stats: Optional[ScanStats] = None) -> Tuple[Dict[str, Any], List[FileInfo]]:
+    """Read a whole snapshot; stats, if given, is filled in during the same pass"""
+    header = read_header(path)
+    if stats is not None:
+        stats.now = header.get('created', stats.now)
+    files = []
+    for file_info in iter_snapshot(path):
+        files.append(file_info)
+        if stats is not None:
+            stats.add_file(file_info)
+    logger.info(f"Loaded snapshot {path}: {len(files)} entries under {header['root']}")
+    return header, files
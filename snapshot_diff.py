@@ -0,0 +1,201 @@
+import os
+import heapq
+import itertools
+import logging
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Tuple
+
+from disk_analyzer import FileInfo
+from directory_tree import format_size
+
+logger = logging.getLogger(__name__)
+
+
+def _is_under(path: str, directory: str) -> bool:
+    """Whether path is directory or lies below it"""
+    return path == directory or path.startswith(directory if directory.endswith(os.sep) else directory + os.sep)
+
+
+@dataclass
+class DiffEntry:
+    path: str
+    old_size: int
+    new_size: int
+
+    @property
+    def delta(self) -> int:
+        return self.new_size - self.old_size
+
+    @property
+    def status(self) -> str:
+        if self.old_size == 0:
+            return 'added'
+        if self.new_size == 0:
+            return 'removed'
+        return 'grown' if self.new_size > self.old_size else 'shrunk'
+
+
+class _TopN:
+    """Keeps the n items with the largest key in O(n) memory"""
+
+    def __init__(self, n: int):
+        self.n = n
+        self._heap: List[Tuple[int, int, Any]] = []
+        self._counter = itertools.count()
+
+    def push(self, key: int, item: Any) -> None:
+        entry = (key, next(self._counter), item)
+        if len(self._heap) < self.n:
+            heapq.heappush(self._heap, entry)
+        elif key > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self) -> List[Any]:
+        return [item for _, _, item in sorted(self._heap, reverse=True)]
+
+
+def merge_join(old: Iterable[FileInfo], new: Iterable[FileInfo]) -> Iterator[Tuple[Optional[FileInfo], Optional[FileInfo]]]:
+    """Pair up entries of two path-sorted streams; a side is None where the path exists only in the other"""
+    old_iter, new_iter = iter(old), iter(new)
+    a, b = next(old_iter, None), next(new_iter, None)
+    last_a = last_b = ''
+    while a is not None or b is not None:
+        if a is not None and a.path < last_a or b is not None and b.path < last_b:
+            raise ValueError("Snapshot entries are not sorted by path")
+        if b is None or (a is not None and a.path < b.path):
+            last_a = a.path
+            yield a, None
+            a = next(old_iter, None)
+        elif a is None or b.path < a.path:
+            last_b = b.path
+            yield None, b
+            b = next(new_iter, None)
+        else:
+            last_a, last_b = a.path, b.path
+            yield a, b
+            a, b = next(old_iter, None), next(new_iter, None)
+
+
+class DiffReport:
+    """Totals and bounded top lists for the difference between two scans.
+
+    Both inputs are consumed as path-sorted streams. In sorted order, all
+    entries under a directory are contiguous, so directory deltas are
+    accumulated on a stack of the current path's ancestors. A directory's
+    total is final once the stream moves past it, and it is then folded
+    into its parent. Memory depends on the tree depth and the top-N sizes,
+    not on the number of entries.
+    """
+
+    def __init__(self, top_n: int = 20, treemap_limit: int = 100000, root: Optional[str] = None):
+        self.top_n = top_n
+        self.root = root  # Directories above it are not reported
+        self.treemap_limit = treemap_limit
+        self.counts = {'added': 0, 'removed': 0, 'grown': 0, 'shrunk': 0, 'unchanged': 0}
+        self.bytes = {'added': 0, 'removed': 0, 'grown': 0, 'shrunk': 0}
+        self.old_total = 0
+        self.new_total = 0
+        self.top_growth = _TopN(top_n)
+        self.top_shrink = _TopN(top_n)
+        self.top_dirs = _TopN(top_n)
+        self.top_dir_shrink = _TopN(top_n)
+        self._treemap = _TopN(treemap_limit)
+        self._stack: List[List[Any]] = []  # [dir path, delta]
+
+    def add(self, old: Optional[FileInfo], new: Optional[FileInfo]) -> None:
+        if (old is not None and old.is_dir) or (new is not None and new.is_dir):
+            return  # Directory sizes are derived from their files
+        entry = DiffEntry((old or new).path, old.size if old else 0, new.size if new else 0)
+        self.old_total += entry.old_size
+        self.new_total += entry.new_size
+        delta = entry.delta
+        self._enter(os.path.dirname(entry.path))
+        if delta == 0:
+            self.counts['unchanged'] += 1
+            return
+
+        status = entry.status
+        self.counts[status] += 1
+        self.bytes[status] += abs(delta)
+        self._stack[-1][1] += delta
+        if delta > 0:
+            self.top_growth.push(delta, entry)
+            self._treemap.push(delta, entry)
+        else:
+            self.top_shrink.push(-delta, entry)
+
+    def _enter(self, directory: str) -> None:
+        stack = self._stack
+        while stack and not _is_under(directory, stack[-1][0]):
+            self._close()
+        # Open the directories between the innermost open one (or the filesystem root) and this one
+        top = stack[-1][0] if stack else None
+        opened = []
+        while directory != top and os.path.dirname(directory) != directory:
+            opened.append(directory)
+            directory = os.path.dirname(directory)
+        if not stack and not opened:
+            opened.append(directory)  # Files directly under the filesystem root
+        stack.extend([path, 0] for path in reversed(opened))
+
+    def _close(self) -> None:
+        path, delta = self._stack.pop()
+        reported = self.root is None or _is_under(path, self.root)
+        if reported and delta > 0:
+            self.top_dirs.push(delta, (path, delta))
+        elif reported and delta < 0:
+            self.top_dir_shrink.push(-delta, (path, delta))
+        if self._stack:
+            self._stack[-1][1] += delta
+
+    def finish(self) -> 'DiffReport':
+        while self._stack:
+            self._close()
+        return self
+
+    def treemap_entries(self) -> List[Dict[str, Any]]:
+        """Growing files as visualizer entries sized by how much they grew"""
+        entries = []
+        for e in self._treemap.items():
+            growth = e.new_size / e.old_size if e.old_size else float('inf')
+            entries.append({
+                'path': e.path,
+                'size_bytes': e.delta,
+                'size_human': f"+{format_size(e.delta)}",
+                'file_type': 'new file' if e.old_size == 0 else
+                             f"{format_size(e.old_size)} -> {format_size(e.new_size)} (x{growth:.1f})",
+                'depth': e.path.count(os.sep),
+                'is_directory': False,
+                'growth': growth,
+            })
+        return entries
+
+    def report_lines(self) -> List[str]:
+        lines = [
+            f"Total: {format_size(self.old_total)} -> {format_size(self.new_total)} "
+            f"({'+' if self.new_total >= self.old_total else '-'}{format_size(abs(self.new_total - self.old_total))})",
+        ]
+        for status in ('added', 'removed', 'grown', 'shrunk'):
+            lines.append(f"  {status:<8} {self.counts[status]:>10,} files  {format_size(self.bytes[status]):>10}")
+        lines.append(f"  {'unchanged':<8} {self.counts['unchanged']:>9,} files")
+
+        lines.append("\nDirectories that grew most:")
+        lines.extend(f"  +{format_size(delta):>10}  {path}" for path, delta in self.top_dirs.items())
+        lines.append("\nFiles that grew most:")
+        lines.extend(f"  +{format_size(e.delta):>10}  {e.status:<6} {e.path}" for e in self.top_growth.items())
+        if self.top_dir_shrink.items():
+            lines.append("\nDirectories that shrank most:")
+            lines.extend(f"  -{format_size(-delta):>10}  {path}" for path, delta in self.top_dir_shrink.items())
+        return lines
+
+
+def diff_scans(old: Iterable[FileInfo], new: Iterable[FileInfo], top_n: int = 20,
+               treemap_limit: int = 100000, root: Optional[str] = None) -> DiffReport:
+    """Compare two path-sorted entry streams, e.g. iter_snapshot() of two snapshots"""
+    report = DiffReport(top_n, treemap_limit, root)
+    for old_entry, new_entry in merge_join(old, new):
+        report.add(old_entry, new_entry)
+    report.finish()
+    logger.info(f"Diff: {report.counts['added']:,} added, {report.counts['removed']:,} removed, "
+                f"{report.counts['grown']:,} grown, {report.counts['shrunk']:,} shrunk")
+    return report
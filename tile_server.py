@@ -0,0 +1,281 @@
+import json
+import logging
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, Tuple
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+from visualization_config import VisualizationConfig
+from directory_tree import DirectoryTree, format_size
+from treemap_layout import TreemapLayout
+from raster_renderer import RasterRenderer, rect_geometry, encode_png
+from color_palette import rects_rgba, hex_to_rgb
+
+logger = logging.getLogger(__name__)
+
+
+# Measured cost of a laid-out rect (FileRect plus the dicts made for aggregates), for cache accounting
+_RECT_BYTES = 450
+
+
+class Tile:
+    __slots__ = ('png', 'rects', 'ids', 'id_offset', 'nbytes')
+
+    def __init__(self, png: bytes, rects, id_buffer: np.ndarray):
+        self.png = png
+        self.rects = rects
+        # Rect index + 1 per pixel (0 for background) fits in 16 bits for all but the busiest tiles
+        if len(rects) < 0xffff:
+            self.ids = (id_buffer + 1).astype(np.uint16)
+            self.id_offset = 1
+        else:
+            self.ids = id_buffer
+            self.id_offset = 0
+        self.nbytes = len(png) + self.ids.nbytes + len(rects) * _RECT_BYTES
+
+    def rect_at(self, row: int, col: int):
+        index = int(self.ids[row, col]) - self.id_offset
+        return self.rects[index] if index >= 0 else None
+
+
+class TileRenderer:
+    """Renders a scanned tree as a pyramid of square PNG tiles.
+
+    Zoom level z is a treemap of (tile_size * 2**z) pixels square, laid out with
+    the usual min_rect_size culling, so every level shows as much detail as its
+    resolution allows. Each tile lays out only the part of the tree under its
+    viewport. Rendered tiles keep their pixel ID buffer for hover lookups and
+    are held in an LRU cache of at most cache_bytes (PNG, ID buffer and rects).
+    """
+
+    def __init__(self, tree: DirectoryTree, tile_size: int = 256, max_zoom: int = 8,
+                 cache_bytes: int = 256 << 20, config: Optional[VisualizationConfig] = None):
+        self.tree = tree
+        self.tile_size = tile_size
+        self.max_zoom = max_zoom
+        self.cache_bytes = cache_bytes
+        self.cached_bytes = 0
+        self.config = config or VisualizationConfig(interactive=False)
+        self.background = hex_to_rgb(self.config.background_color) + (255,)
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def world_size(self, z: int) -> int:
+        return self.tile_size << z
+
+    def tile(self, z: int, tx: int, ty: int) -> Tile:
+        if not (0 <= z <= self.max_zoom and 0 <= tx < (1 << z) and 0 <= ty < (1 << z)):
+            raise KeyError((z, tx, ty))
+        key = (z, tx, ty)
+        with self._lock:
+            tile = self._cache.get(key)
+            if tile is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return tile
+            self.misses += 1
+
+        tile = self._render(z, tx, ty)
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = tile
+                self.cached_bytes += tile.nbytes
+            while self.cached_bytes > self.cache_bytes and len(self._cache) > 1:
+                _, evicted = self._cache.popitem(last=False)
+                self.cached_bytes -= evicted.nbytes
+        return tile
+
+    def _viewport(self, z: int, tx: int, ty: int) -> Tuple[int, int, int, int]:
+        # Tile rows count down from the top, layout y counts up from the bottom
+        size = self.world_size(z)
+        x0 = tx * self.tile_size
+        y0 = size - (ty + 1) * self.tile_size
+        return x0, y0, x0 + self.tile_size, y0 + self.tile_size
+
+    def _render(self, z: int, tx: int, ty: int) -> Tile:
+        size = self.world_size(z)
+        viewport = self._viewport(z, tx, ty)
+        layout = TreemapLayout(size, size, self.config.padding, self.config.min_rect_size)
+        rects = layout.layout_tree(self.tree.root, viewport=viewport)
+
+        geometry = rect_geometry(rects)
+        if len(geometry):
+            geometry[:, 0] -= viewport[0]
+            geometry[:, 1] -= viewport[1]
+        renderer = RasterRenderer(self.tile_size, self.tile_size, self.background)
+        framebuffer = renderer.render(geometry, rects_rgba(rects))
+        png = encode_png(np.flipud(framebuffer))
+        return Tile(png, rects, renderer.id_buffer)
+
+    def hover(self, z: int, x: float, y: float) -> Optional[Dict[str, Any]]:
+        """File data under level-z pixel (x, y), measured from the top-left corner"""
+        size = self.world_size(z)
+        if not (0 <= x < size and 0 <= y < size):
+            return None
+        tx, ty = int(x // self.tile_size), int(y // self.tile_size)
+        tile = self.tile(z, tx, ty)
+        x0 = tx * self.tile_size
+        # Flipped after truncating: the top pixel row of the tile is the last buffer row
+        row = self.tile_size - 1 - int(y - ty * self.tile_size)
+        col = int(x - x0)
+        if not (0 <= row < self.tile_size and 0 <= col < self.tile_size):
+            return None
+        rect = tile.rect_at(row, col)
+        return rect.file_data if rect is not None else None
+
+    def info(self) -> Dict[str, Any]:
+        root = self.tree.root
+        return {
+            'root': root.path,
+            'size_bytes': root.size,
+            'size_human': format_size(root.size),
+            'file_count': root.file_count,
+            'tile_size': self.tile_size,
+            'max_zoom': self.max_zoom,
+            'cache': {'tiles': len(self._cache), 'bytes': self.cached_bytes, 'hits': self.hits, 'misses': self.misses},
+        }
+
+
+def _make_handler(renderer: TileRenderer):
+    class TileRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = url.path.strip('/').split('/')
+            try:
+                if url.path in ('/', '/index.html'):
+                    self._send(200, 'text/html; charset=utf-8', VIEWER_HTML.encode('utf-8'))
+                elif url.path == '/api/info':
+                    self._send_json(renderer.info())
+                elif url.path == '/api/hover':
+                    query = parse_qs(url.query)
+                    file_data = renderer.hover(int(query['z'][0]), float(query['x'][0]), float(query['y'][0]))
+                    self._send_json(file_data)
+                elif len(parts) == 4 and parts[0] == 'tiles' and parts[3].endswith('.png'):
+                    tile = renderer.tile(int(parts[1]), int(parts[2]), int(parts[3][:-4]))
+                    self._send(200, 'image/png', tile.png, cache=True)
+                else:
+                    self._send(404, 'text/plain', b'Not found')
+            except (KeyError, ValueError, IndexError):
+                self._send(400, 'text/plain', b'Bad request')
+            except Exception as e:
+                logger.error(f"Tile server error for {self.path}: {e}")
+                self._send(500, 'text/plain', b'Internal error')
+
+        def _send_json(self, payload: Any) -> None:
+            self._send(200, 'application/json', json.dumps(payload).encode('utf-8'))
+
+        def _send(self, status: int, content_type: str, body: bytes, cache: bool = False) -> None:
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            if cache:
+                self.send_header('Cache-Control', 'max-age=3600')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+    return TileRequestHandler
+
+
+def serve(tree: DirectoryTree, host: str = '127.0.0.1', port: int = 8765, **renderer_options) -> None:
+    renderer = TileRenderer(tree, **renderer_options)
+    server = ThreadingHTTPServer((host, port), _make_handler(renderer))
+    logger.info(f"Serving {tree.root.path} at http://{host}:{server.server_address[1]}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# Self-contained viewer: no external scripts, works offline
+VIEWER_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>VisualDisk</title>
+<style>
+  body { margin: 0; background: #0a283c; color: white; font: 13px sans-serif; overflow: hidden; }
+  #map { position: absolute; left: 0; top: 0; right: 320px; bottom: 0; overflow: hidden; cursor: grab; }
+  #map img { position: absolute; image-rendering: pixelated; user-select: none; -webkit-user-drag: none; }
+  #info { position: absolute; top: 0; right: 0; width: 300px; bottom: 0; padding: 10px;
+          background: #282832; word-break: break-all; }
+  #info b { display: inline-block; width: 50px; }
+</style>
+</head>
+<body>
+<div id="map"></div>
+<div id="info"><h3>VisualDisk</h3><div id="summary"></div><hr><div id="hover">Hover over the map.
+Drag to pan, scroll to zoom.</div></div>
+<script>
+const map = document.getElementById('map');
+let info = null, z = 0, ox = 0, oy = 0, tiles = {}, drag = null, hoverTimer = null;
+
+function esc(s) { const d = document.createElement('div'); d.textContent = s; return d.innerHTML; }
+
+function render() {
+  const ts = info.tile_size, n = 1 << z, w = map.clientWidth, h = map.clientHeight;
+  const wanted = {};
+  for (let ty = Math.max(0, Math.floor(oy / ts)); ty < Math.min(n, Math.ceil((oy + h) / ts)); ty++) {
+    for (let tx = Math.max(0, Math.floor(ox / ts)); tx < Math.min(n, Math.ceil((ox + w) / ts)); tx++) {
+      const key = z + '/' + tx + '/' + ty;
+      wanted[key] = true;
+      let img = tiles[key];
+      if (!img) {
+        img = document.createElement('img');
+        img.src = 'tiles/' + key + '.png';
+        img.draggable = false;
+        tiles[key] = img;
+        map.appendChild(img);
+      }
+      img.style.left = (tx * ts - ox) + 'px';
+      img.style.top = (ty * ts - oy) + 'px';
+    }
+  }
+  for (const key in tiles) {
+    if (!wanted[key]) { map.removeChild(tiles[key]); delete tiles[key]; }
+  }
+}
+
+map.addEventListener('mousedown', e => { drag = [e.clientX, e.clientY, ox, oy]; map.style.cursor = 'grabbing'; });
+window.addEventListener('mouseup', () => { drag = null; map.style.cursor = 'grab'; });
+map.addEventListener('mousemove', e => {
+  if (drag) { ox = drag[2] - (e.clientX - drag[0]); oy = drag[3] - (e.clientY - drag[1]); render(); return; }
+  clearTimeout(hoverTimer);
+  const x = ox + e.offsetX, y = oy + e.offsetY, level = z;
+  hoverTimer = setTimeout(() => {
+    fetch('api/hover?z=' + level + '&x=' + x + '&y=' + y).then(r => r.json()).then(d => {
+      document.getElementById('hover').innerHTML = d ?
+        '<b>Name</b>' + esc(d.path) + '<br><b>Size</b>' + esc(d.size_human) +
+        '<br><b>Type</b>' + esc(d.file_type) + '<br><b>Depth</b>' + d.depth : '';
+    });
+  }, 30);
+});
+map.addEventListener('wheel', e => {
+  e.preventDefault();
+  const nz = Math.max(0, Math.min(info.max_zoom, z + (e.deltaY < 0 ? 1 : -1)));
+  if (nz === z) return;
+  const f = Math.pow(2, nz - z), mx = e.offsetX, my = e.offsetY;
+  ox = (ox + mx) * f - mx; oy = (oy + my) * f - my; z = nz;
+  render();
+}, {passive: false});
+window.addEventListener('resize', () => info && render());
+
+fetch('api/info').then(r => r.json()).then(d => {
+  info = d;
+  document.getElementById('summary').innerHTML = esc(d.root) + '<br>' + esc(d.size_human) + ' in ' +
+    d.file_count.toLocaleString() + ' files';
+  render();
+});
+</script>
+</body>
+</html>
+"""
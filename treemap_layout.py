@@ -1,12 +1,15 @@
-from typing import List, Dict, Any, Tuple
-from disk_visualizer import FileRect
+from itertools import accumulate
+from typing import List, Dict, Any, Tuple, Optional
+from visualization_config import FileRect
+from directory_tree import DirNode, format_size
 
 
 class TreemapLayout:
-    def __init__(self, width: int, height: int, padding: int = 0):
+    def __init__(self, width: int, height: int, padding: int = 0, min_rect_size: int = 2):
         self.width = width
         self.height = height
         self.padding = padding
+        self.min_rect_size = min_rect_size
 
     def layout_files(self, file_data: List[Dict[str, Any]]) -> List[FileRect]:
         if not file_data:
@@ -30,61 +33,135 @@ class TreemapLayout:
 
         return self._layout_rectangles(rectangles, 0, 0, self.width, self.height)
 
+    def layout_tree(self, node: DirNode,
+                    viewport: Optional[Tuple[float, float, float, float]] = None) -> List[FileRect]:
+        """Nested layout of a directory subtree.
+
+        Directories are subdivided only while their rectangle is large enough to
+        show children, and entries smaller than min_rect_size are merged into a
+        single aggregate, so the amount of work is bounded by the pixel area
+        rather than by the number of scanned files.
+
+        With a viewport (x0, y0, x1, y1) only rectangles intersecting it are
+        produced and subtrees outside it are never visited. Positions do not
+        depend on the viewport, so this is the full layout clipped to it.
+        """
+        result = []
+        stack = [(node, 0, 0, self.width, self.height)]
+        min_side = max(1, self.min_rect_size)
+        min_area = min_side * min_side
+
+        while stack:
+            current, x, y, width, height = stack.pop()
+            entries = current.sorted_entries()
+            if not entries or current.size <= 0:
+                continue
+
+            scale_factor = (width * height) / current.size
+            rectangles = []
+            other_size = 0
+            other_count = 0
+            for size, file_data, child in entries:
+                area = size * scale_factor
+                if area < min_area:
+                    other_size += size
+                    other_count += child.file_count if child is not None else 1
+                    continue
+                rectangles.append(((file_data, child), area))
+
+            if other_size > 0:
+                rectangles.append(((self._other_entry(current, other_size, other_count), None),
+                                   max(min_area, other_size * scale_factor)))
+
+            for (file_data, child), rx, ry, rw, rh in self._split_rectangles(rectangles, x, y, width, height):
+                if viewport is not None and (rx >= viewport[2] or rx + rw <= viewport[0] or
+                                             ry >= viewport[3] or ry + rh <= viewport[1]):
+                    continue
+                if child is not None and rw > 2 * min_side and rh > 2 * min_side and child.sorted_entries():
+                    stack.append((child, rx, ry, rw, rh))
+                else:
+                    result.append(FileRect(file_data, rx, ry, rw, rh))
+
+        return result
+
+    def _other_entry(self, node: DirNode, size: int, count: int) -> Dict[str, Any]:
+        return {
+            'path': node.path,
+            'size_bytes': size,
+            'size_human': format_size(size),
+            'file_type': f'{count:,} smaller items',
+            'depth': node.depth + 1,
+            'is_directory': True,
+            'file_count': count,
+        }
+
     def _layout_rectangles(self, rectangles: List[Tuple[Dict[str, Any], float]],
                            x: int, y: int, width: int, height: int) -> List[FileRect]:
+        return [FileRect(file_data, rx, ry, rw, rh)
+                for file_data, rx, ry, rw, rh in self._split_rectangles(rectangles, x, y, width, height)]
+
+    def _split_rectangles(self, rectangles: List[Tuple[Any, float]],
+                          x: int, y: int, width: int, height: int) -> List[Tuple[Any, int, int, int, int]]:
         if not rectangles:
             return []
 
-        if len(rectangles) == 1:
-            file_data, _ = rectangles[0]
-            # No padding here since gap handled between rectangles
-            return [FileRect(file_data, x, y, width, height)]
-
-        total_area = sum(area for _, area in rectangles)
-        best_split = 1
-        best_ratio = float('inf')
-
-        for split in range(1, len(rectangles)):
-            group1_area = sum(area for _, area in rectangles[:split])
-            group2_area = total_area - group1_area
-
-            if width > height:
-                width1 = int(width * group1_area / total_area)
-                width2 = width - width1
-                if height > 0 and width1 > 0 and width2 > 0:
-                    ratio = max(width1 / height, height / width1, width2 / height, height / width2)
-                else:
-                    ratio = float('inf')
-            else:
-                height1 = int(height * group1_area / total_area)
-                height2 = height - height1
-                if width > 0 and height1 > 0 and height2 > 0:
-                    ratio = max(width / height1, height1 / width, width / height2, height2 / width)
+        placed = []
+        # Explicit stack instead of recursion: skewed size distributions split
+        # one item at a time and would otherwise exceed the recursion limit.
+        stack = [(rectangles, x, y, width, height)]
+        while stack:
+            items, x, y, width, height = stack.pop()
+
+            if len(items) == 1:
+                # No padding here since gap handled between rectangles
+                placed.append((items[0][0], x, y, width, height))
+                continue
+
+            prefix = list(accumulate(area for _, area in items))
+            total_area = prefix[-1]
+            best_split = 1
+            best_ratio = float('inf')
+
+            for split in range(1, len(items)):
+                group1_area = prefix[split - 1]
+
+                if width > height:
+                    width1 = int(width * group1_area / total_area)
+                    width2 = width - width1
+                    if height > 0 and width1 > 0 and width2 > 0:
+                        ratio = max(width1 / height, height / width1, width2 / height, height / width2)
+                    else:
+                        ratio = float('inf')
                 else:
-                    ratio = float('inf')
+                    height1 = int(height * group1_area / total_area)
+                    height2 = height - height1
+                    if width > 0 and height1 > 0 and height2 > 0:
+                        ratio = max(width / height1, height1 / width, width / height2, height2 / width)
+                    else:
+                        ratio = float('inf')
 
-            if ratio < best_ratio:
-                best_ratio = ratio
-                best_split = split
+                if ratio < best_ratio:
+                    best_ratio = ratio
+                    best_split = split
 
-        group1 = rectangles[:best_split]
-        group2 = rectangles[best_split:]
+            group1 = items[:best_split]
+            group2 = items[best_split:]
 
-        group1_area = sum(area for _, area in group1)
-        gap = 1  # 1 pixel gap between rectangles
+            group1_area = prefix[best_split - 1]
+            gap = 1  # 1 pixel gap between rectangles
 
-        result = []
-        if width > height:
-            width1 = max(1, int(width * group1_area / total_area))
-            width2 = max(1, width - width1 - gap)  # subtract gap here
+            # Push group2 first so group1 is laid out first, as before
+            if width > height:
+                width1 = max(1, int(width * group1_area / total_area))
+                width2 = max(1, width - width1 - gap)  # subtract gap here
 
-            result.extend(self._layout_rectangles(group1, x, y, width1, height))
-            result.extend(self._layout_rectangles(group2, x + width1 + gap, y, width2, height))
-        else:
-            height1 = max(1, int(height * group1_area / total_area))
-            height2 = max(1, height - height1 - gap)  # subtract gap here
+                stack.append((group2, x + width1 + gap, y, width2, height))
+                stack.append((group1, x, y, width1, height))
+            else:
+                height1 = max(1, int(height * group1_area / total_area))
+                height2 = max(1, height - height1 - gap)  # subtract gap here
 
-            result.extend(self._layout_rectangles(group1, x, y, width, height1))
-            result.extend(self._layout_rectangles(group2, x, y + height1 + gap, width, height2))
+                stack.append((group2, x, y + height1 + gap, width, height2))
+                stack.append((group1, x, y, width, height1))
 
-        return result
+        return placed